@@ -5,4 +5,10 @@ class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
 
     def ready(self):
+        from django.db.models import CharField
+        from django.db.models.functions import Lower
+
+        # `field__lower=...` (logins, car make filters) matches the functional
+        # Lower() indexes; registered once for every app
+        CharField.register_lookup(Lower)
         from . import signals  # noqa
@@ -5,7 +5,7 @@ ROLE_TO_SCOPES = {
     "customer": {"car:read", "booking:read", "booking:create"},
     "fleet_manager": {"car:read", "car:write", "doc:verify", "booking:read"},
     "support": {"booking:read", "booking:write"},
-    "finance": {"payment:read", "payment:write"},
+    "finance": {"payment:read", "payment:write", "booking:read"},
     "admin": {"*"},
 }
 
@@ -0,0 +1,115 @@
+# accounts/authentication.py
+"""
+Stateless JWT authentication.
+
+simplejwt's JWTAuthentication loads the User row on every request. Our access
+tokens already carry what the API needs (user id, role, scp scopes), so
+request.user is built from the verified claims instead. Revocation still works:
+the token's "ver" claim must equal the user's current token_version, which is
+read through a small cache (user id -> version) invalidated whenever the user
+row is saved or the version is bumped. Saving a change to role, is_staff or
+is_superuser bumps it (accounts.signals), so stale role/scp claims stop working.
+
+The invalidation only reaches workers sharing the cache. Without CACHE_URL
+each worker has its own local cache, and the others honour a revocation only
+once their entry expires (TOKEN_VERSION_CACHE_TTL).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+TOKEN_VERSION_KEY = "auth:tokver:{}"
+_INACTIVE = -1  # cached marker for missing/inactive users
+
+
+def invalidate_token_version(user_id) -> None:
+    cache.delete(TOKEN_VERSION_KEY.format(user_id))
+
+
+def current_token_version(user_id) -> int:
+    """The user's token_version, or -1 if the user is gone or inactive."""
+    key = TOKEN_VERSION_KEY.format(user_id)
+    ver = cache.get(key)
+    if ver is None:
+        row = get_user_model().objects.filter(pk=user_id).values_list("token_version", "is_active").first()
+        ver = row[0] if row and row[1] else _INACTIVE
+        cache.set(key, ver, settings.TOKEN_VERSION_CACHE_TTL)
+    return ver
+
+
+async def acurrent_token_version(user_id) -> int:
+    """current_token_version for async views (async cache + ORM)."""
+    key = TOKEN_VERSION_KEY.format(user_id)
+    ver = await cache.aget(key)
+    if ver is None:
+        row = await get_user_model().objects.filter(pk=user_id).values_list("token_version", "is_active").afirst()
+        ver = row[0] if row and row[1] else _INACTIVE
+        await cache.aset(key, ver, settings.TOKEN_VERSION_CACHE_TTL)
+    return ver
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user built from token claims: id, role and scopes without a query.
+    Anything else (has_perm fallback, email, ...) loads the real row once, lazily.
+    """
+    is_authenticated = True
+
+    @cached_property
+    def role(self) -> str:
+        return self.token.get("role", "")
+
+    @cached_property
+    def scopes(self) -> set:
+        return set((self.token.get("scp") or "").split())
+
+    @cached_property
+    def db_user(self):
+        return get_user_model().objects.get(pk=self.pk)
+
+    def has_perm(self, perm, obj=None) -> bool:
+        return self.db_user.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None) -> bool:
+        return self.db_user.has_perms(perm_list, obj)
+
+    def __getattr__(self, name):
+        # Only reached for attributes not derived from claims
+        if name.startswith("_") or name == "token":
+            raise AttributeError(name)
+        return getattr(self.db_user, name)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        return self._claims_user(validated_token, current_token_version(self._user_id(validated_token)))
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; None when no bearer token was sent."""
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        ver = await acurrent_token_version(self._user_id(validated_token))
+        return self._claims_user(validated_token, ver), validated_token
+
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    @staticmethod
+    def _claims_user(validated_token, ver):
+        if ver == _INACTIVE:
+            raise AuthenticationFailed("User not found or inactive", code="user_not_found")
+        if validated_token.get("ver", 0) != ver:
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return ClaimsUser(validated_token)
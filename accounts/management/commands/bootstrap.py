@@ -0,0 +1,126 @@
+# accounts/management/commands/bootstrap.py
+"""
+Container start-up in one process: migrate, collectstatic, seed roles.
+
+Each step is skipped when there's nothing to do:
+  * migrate: every migration file on disk is already recorded in
+    django_migrations (one query, no migration modules imported). The DB is
+    the stored fingerprint, so it holds across pods.
+  * collectstatic: a hash of the source files (path, size, mtime) and the
+    storage settings matches the one written to STATIC_ROOT by the last run.
+  * roles: accounts.roles.sync_role_permissions() diff-applies the groups,
+    so an unchanged spec costs a few reads and no writes.
+
+Per-step timings are printed (or emitted as JSON with --json).
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from accounts.roles import sync_role_permissions
+
+STATIC_FINGERPRINT_FILE = ".bootstrap-fingerprint"
+
+
+def migration_files() -> set[tuple[str, str]]:
+    """(app_label, migration name) for every migration module on disk."""
+    found = set()
+    for app in apps.get_app_configs():
+        directory = Path(app.path) / "migrations"
+        if not (directory / "__init__.py").exists():
+            continue
+        found |= {(app.label, p.stem) for p in directory.glob("*.py") if p.stem != "__init__"}
+    return found
+
+
+def pending_migrations(database: str = DEFAULT_DB_ALIAS) -> set[tuple[str, str]]:
+    recorder = MigrationRecorder(connections[database])
+    if not recorder.has_table():
+        return migration_files()
+    applied = set(recorder.migration_qs.values_list("app", "name"))
+    return migration_files() - applied
+
+
+def static_fingerprint() -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{settings.STATIC_ROOT}|{settings.STORAGES['staticfiles']['BACKEND']}".encode())
+    entries = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(["CVS", ".*", "*~"]):
+            stat = os.stat(storage.path(path))
+            entries.append(f"{getattr(storage, 'prefix', None) or ''}/{path}|{stat.st_size}|{stat.st_mtime_ns}")
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = "Migrate, collect static files and seed roles in one process, skipping what's up to date"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="run every step even if up to date")
+        parser.add_argument("--skip-migrate", action="store_true")
+        parser.add_argument("--skip-static", action="store_true")
+        parser.add_argument("--skip-roles", action="store_true")
+        parser.add_argument("--json", action="store_true", help="print the step report as JSON")
+
+    def handle(self, *args, **options):
+        self.force = options["force"]
+        self.quiet = options["json"] or options["verbosity"] < 1
+        steps = [
+            ("migrate", self.migrate, options["skip_migrate"]),
+            ("collectstatic", self.collectstatic, options["skip_static"]),
+            ("roles", self.roles, options["skip_roles"]),
+        ]
+        report, started = [], time.perf_counter()
+        for name, step, skipped in steps:
+            t0 = time.perf_counter()
+            outcome = {"status": "disabled"} if skipped else step()
+            report.append({"step": name, **outcome, "ms": round((time.perf_counter() - t0) * 1000, 1)})
+            if not self.quiet:
+                self.stdout.write(f"{name:<14} {report[-1]['status']:<9} {report[-1]['ms']:>9.1f} ms"
+                                  + (f"  {outcome['detail']}" if outcome.get("detail") else ""))
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"steps": report, "total_ms": total_ms}))
+        elif not self.quiet:
+            self.stdout.write(self.style.SUCCESS(f"bootstrap done in {total_ms:.1f} ms"))
+
+    def migrate(self) -> dict:
+        pending = pending_migrations()
+        if not pending and not self.force:
+            return {"status": "skipped", "detail": "no unapplied migrations"}
+        call_command("migrate", interactive=False, verbosity=0 if self.quiet else 1)
+        return {"status": "ran", "detail": f"{len(pending)} migration(s) pending"}
+
+    def collectstatic(self) -> dict:
+        stamp = Path(settings.STATIC_ROOT) / STATIC_FINGERPRINT_FILE
+        fingerprint = static_fingerprint()
+        if not self.force and stamp.exists() and stamp.read_text().strip() == fingerprint:
+            return {"status": "skipped", "detail": "static files unchanged"}
+        call_command("collectstatic", interactive=False, verbosity=0)
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.write_text(fingerprint)
+        return {"status": "ran"}
+
+    def roles(self) -> dict:
+        # Never blocks start-up (entrypoint used to run `seed_roles || true`)
+        try:
+            changes = sync_role_permissions()
+        except Exception as exc:
+            self.stderr.write(self.style.WARNING(f"role seeding failed: {exc}"))
+            return {"status": "failed", "detail": str(exc)}
+        changed = any(changes.values())
+        return {"status": "ran" if changed else "unchanged",
+                "detail": ", ".join(f"{k}={v}" for k, v in changes.items())}
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, Group
 from django.db import models
+from django.db.models.functions import Lower
 
 class Roles(models.TextChoices):
     CUSTOMER = "customer", "Customer"
@@ -31,6 +32,16 @@ class User(AbstractUser):
     phone = models.CharField(max_length=32, blank=True)
     # e.g., branch, city, etc. add as needed
 
+    # Embedded as the JWT "ver" claim; bumping it revokes every issued token
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # login resolves username-or-email case-insensitively (LoginSerializer)
+            models.Index(Lower("username"), name="user_username_lower_idx"),
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
+
     # Convenience helpers
     @property
     def is_customer(self) -> bool:
@@ -52,6 +63,14 @@ class User(AbstractUser):
     def is_admin_role(self) -> bool:
         return self.role == Roles.ADMIN
 
+    def bump_token_version(self):
+        """Revoke all outstanding tokens for this user."""
+        from accounts.authentication import invalidate_token_version
+
+        User.objects.filter(pk=self.pk).update(token_version=models.F("token_version") + 1)
+        self.refresh_from_db(fields=["token_version"])
+        invalidate_token_version(self.pk)
+
     def sync_role_group(self, *, save: bool = True):
         """
         Ensure the user's 'role' is reflected in Group membership.
@@ -0,0 +1,87 @@
+# accounts/roles.py
+"""
+Role groups and their permissions, applied as a diff.
+
+sync_role_permissions() reads the groups, the wanted permissions and the
+current group<->permission rows in a handful of queries, then bulk-inserts
+what's missing and deletes what's extra. A run with nothing to change writes
+nothing, so it's cheap to repeat on every container start.
+"""
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models import Q
+
+# group -> {"app_label.model": [codenames]}, or ALL for every permission
+ALL = "__all__"
+ROLE_PERMISSIONS = {
+    "customer": {
+        "rental.car": ["view_car"],
+        "rental.booking": ["add_booking", "view_booking", "change_booking"],
+        "rental.document": ["add_document", "view_document"],
+        "rental.payment": ["view_payment"],
+    },
+    "fleet_manager": {
+        "rental.car": ["view_car", "add_car", "change_car", "delete_car", "edit_status", "view_maintenance"],
+        "rental.booking": ["view_booking", "change_booking"],
+        "rental.document": ["view_document", "verify_document"],
+    },
+    "support": {
+        "rental.car": ["view_car"],
+        "rental.booking": ["view_booking", "change_booking"],
+        "rental.payment": ["view_payment"],
+        "rental.document": ["view_document"],
+    },
+    "finance": {
+        "rental.payment": ["view_payment", "change_payment"],
+        "rental.booking": ["view_booking"],
+        "rental.car": ["view_car"],
+    },
+    "admin": ALL,  # full access
+}
+ROLE_GROUPS = list(ROLE_PERMISSIONS)
+
+
+def _wanted_permission_ids() -> dict[str, set[int]]:
+    rows = Permission.objects.values_list("id", "content_type__app_label", "content_type__model", "codename")
+    by_name = {(f"{app}.{model}", codename): pk for pk, app, model, codename in rows}
+    every = set(by_name.values())
+    wanted = {}
+    for group, spec in ROLE_PERMISSIONS.items():
+        if spec == ALL:
+            wanted[group] = every
+            continue
+        # unknown codenames are skipped, as the old Permission filters did
+        wanted[group] = {by_name[(model, c)] for model, codenames in spec.items() for c in codenames
+                         if (model, c) in by_name}
+    return wanted
+
+
+@transaction.atomic
+def sync_role_permissions() -> dict:
+    """Ensure role groups exist with exactly ROLE_PERMISSIONS; returns change counts."""
+    existing = set(Group.objects.filter(name__in=ROLE_GROUPS).values_list("name", flat=True))
+    missing = [Group(name=name) for name in ROLE_GROUPS if name not in existing]
+    if missing:
+        Group.objects.bulk_create(missing, ignore_conflicts=True)
+    groups = dict(Group.objects.filter(name__in=ROLE_GROUPS).values_list("name", "id"))
+
+    through = Group.permissions.through
+    current: dict[int, set[int]] = {gid: set() for gid in groups.values()}
+    for gid, pid in through.objects.filter(group_id__in=groups.values()).values_list("group_id", "permission_id"):
+        current[gid].add(pid)
+
+    to_add, to_remove = [], Q()
+    added = removed = 0
+    for name, wanted in _wanted_permission_ids().items():
+        gid = groups[name]
+        new, stale = wanted - current[gid], current[gid] - wanted
+        to_add += [through(group_id=gid, permission_id=pid) for pid in new]
+        if stale:
+            to_remove |= Q(group_id=gid, permission_id__in=stale)
+        added, removed = added + len(new), removed + len(stale)
+
+    if to_add:
+        through.objects.bulk_create(to_add, ignore_conflicts=True)
+    if removed:
+        through.objects.filter(to_remove).delete()
+    return {"groups_created": len(missing), "added": added, "removed": removed}
@@ -1,7 +1,8 @@
 # accounts/serializers.py
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from django.db.models import Q
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
@@ -32,6 +33,19 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+def login_user_queryset(username_or_email):
+    """
+    Both branches hit functional indexes:
+    LOWER(username) = LOWER(%s) OR LOWER(email) = LOWER(%s)
+    """
+    needle = Lower(Value(username_or_email))
+    return User.objects.filter(Q(username__lower=needle) | Q(email__lower=needle)).order_by("pk")
+
+
+def resolve_login_user(username_or_email):
+    return login_user_queryset(username_or_email).first()
+
+
 class LoginSerializer(serializers.Serializer):
     username_or_email = serializers.CharField()
     password = serializers.CharField()
@@ -40,17 +54,13 @@ class LoginSerializer(serializers.Serializer):
         ue = attrs.get("username_or_email")
         password = attrs.get("password")
 
-        # Resolve to username if an email was provided
-        user = User.objects.filter(Q(username__iexact=ue) | Q(email__iexact=ue)).first()
+        user = resolve_login_user(ue)
         if not user:
             raise serializers.ValidationError({"username_or_email": "User not found."})
 
-        user = authenticate(username=user.username, password=password)
-        if not user:
+        # What ModelBackend.authenticate() checks, minus its second user lookup
+        if not user.check_password(password) or not user.is_active:
             raise serializers.ValidationError({"password": "Invalid credentials."})
 
-        if not user.is_active:
-            raise serializers.ValidationError({"non_field_errors": ["User is inactive."]})
-
         attrs["user"] = user
         return attrs
@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from accounts.authentication import invalidate_token_version
 
 User = get_user_model()
 
@@ -12,3 +13,30 @@ def _sync_role_group_on_save(sender, instance: User, created, **kwargs):
     except Exception:
         # Avoid breaking user creation if groups not seeded yet
         pass
+
+
+@receiver(post_save, sender=User)
+def _drop_cached_token_version(sender, instance: User, **kwargs):
+    # Deactivation or a saved token_version change must reach the authenticator
+    invalidate_token_version(instance.pk)
+
+
+# Access tokens carry role/scp claims: a change to any of these must revoke them
+TOKEN_CLAIM_FIELDS = ("role", "is_staff", "is_superuser")
+
+
+@receiver(pre_save, sender=User)
+def _remember_token_claims(sender, instance: User, raw=False, update_fields=None, **kwargs):
+    instance._claims_before = None
+    if raw or not instance.pk or (update_fields is not None and not set(update_fields) & set(TOKEN_CLAIM_FIELDS)):
+        return
+    instance._claims_before = User.objects.filter(pk=instance.pk).values_list(*TOKEN_CLAIM_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def _revoke_tokens_on_claim_change(sender, instance: User, created, raw=False, **kwargs):
+    before = getattr(instance, "_claims_before", None)
+    if created or raw or before is None:
+        return
+    if before != tuple(getattr(instance, f) for f in TOKEN_CLAIM_FIELDS):
+        instance.bump_token_version()
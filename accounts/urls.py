@@ -1,8 +1,9 @@
 # accounts/urls.py
 from django.urls import path
-from .views import RegisterView, LoginView
+from .views import RegisterView, LoginView, AsyncLoginView
 
 urlpatterns = [
     path("register", RegisterView.as_view(), name="register"),
     path("login", LoginView.as_view(), name="login"),
+    path("login/async", AsyncLoginView.as_view(), name="login-async"),
 ]
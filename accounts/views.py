@@ -1,4 +1,11 @@
 # accounts/views.py
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views import View
 from drf_spectacular.utils import (
     extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
 )
@@ -6,21 +13,34 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.throttling import ScopedRateThrottle
+from lcr.throttling import SlidingScopedRateThrottle
 from .serializers import RegisterSerializer, LoginSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import ValidationError
+from lcr.executors import BoundedExecutor, Overloaded
+from .auth import tokens_for_user  # role + scp claims drive the rental permission fast path
+
+# PBKDF2 + RS256 signing for AsyncLoginView, off the event loop and bounded
+LOGIN_EXECUTOR = BoundedExecutor(
+    "login", max_workers=settings.LOGIN_EXECUTOR_WORKERS, max_in_flight=settings.LOGIN_MAX_IN_FLIGHT
+)
+
+def login_data(user):
+    return {
+        "user": {"id": user.id, "username": user.username, "email": user.email, "role": user.role},
+        "tokens": tokens_for_user(user),
+    }
 
-def tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
-    refresh["role"] = user.role
-    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+def _login(payload):
+    s = LoginSerializer(data=payload)
+    s.is_valid(raise_exception=True)
+    return login_data(s.validated_data["user"])
 
 X_REQUEST_ID = OpenApiParameter(
     name="X-Request-ID",
     type=str,
     location=OpenApiParameter.HEADER,
     required=False,
-    description="Optional idempotency/trace header echoed as 'X-Request-ID' in responses.",
+    description="Optional trace header echoed as 'X-Request-ID' in responses (retries: use Idempotency-Key).",
 )
 
 @extend_schema(
@@ -44,17 +64,13 @@ X_REQUEST_ID = OpenApiParameter(
 class RegisterView(APIView):
     permission_classes = [AllowAny]
     throttle_scope = "auth"
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingScopedRateThrottle]
 
     def post(self, request):
         s = RegisterSerializer(data=request.data)
         s.is_valid(raise_exception=True)
         user = s.save()
-        data = {
-            "user": {"id": user.id, "username": user.username, "email": user.email, "role": user.role},
-            "tokens": tokens_for_user(user),
-        }
-        return Response({"success": True, "data": data, "error": None, "trace_id": request.request_id},
+        return Response({"success": True, "data": login_data(user), "error": None, "trace_id": request.request_id},
                         status=status.HTTP_201_CREATED)
 
 @extend_schema(
@@ -78,15 +94,50 @@ class RegisterView(APIView):
 class LoginView(APIView):
     permission_classes = [AllowAny]
     throttle_scope = "auth"
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingScopedRateThrottle]
 
     def post(self, request):
-        s = LoginSerializer(data=request.data)
-        s.is_valid(raise_exception=True)
-        user = s.validated_data["user"]
-        data = {
-            "user": {"id": user.id, "username": user.username, "email": user.email, "role": user.role},
-            "tokens": tokens_for_user(user),
-        }
-        return Response({"success": True, "data": data, "error": None, "trace_id": request.request_id},
-                        status=status.HTTP_200_OK)
+        return Response({"success": True, "data": _login(request.data), "error": None,
+                         "trace_id": request.request_id}, status=status.HTTP_200_OK)
+
+
+class AsyncLoginView(View):
+    """
+    POST /api/v1/auth/login/async -> same contract as LoginView, for ASGI workers.
+
+    The user lookup, password hash check and token signing run on LOGIN_EXECUTOR,
+    so a login burst queues there (or gets a 503) instead of stalling the event
+    loop's other requests. Shares LoginView's "auth" throttle bucket.
+    """
+    throttle_scope = "auth"
+
+    async def post(self, request):
+        trace_id = getattr(request, "request_id", None)
+
+        def fail(code, status_code, message, details=None):
+            error = {"code": code, "message": message, "details": details}
+            return JsonResponse({"success": False, "data": None, "error": error, "trace_id": trace_id},
+                                status=status_code)
+
+        if not hasattr(request, "user"):
+            request.user = AnonymousUser()  # no AuthenticationMiddleware; throttles key on it
+        throttle = SlidingScopedRateThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, self):
+            resp = fail("rate_limited", 429, "Too many requests. Try later.", {"wait": throttle.wait()})
+            resp["Retry-After"] = str(int(throttle.wait() or 1))
+            return resp
+
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return fail("bad_request", 400, "Malformed JSON body.")
+
+        try:
+            data = await LOGIN_EXECUTOR.run(_login, payload)
+        except ValidationError as exc:
+            return fail("bad_request", 400, "Validation error", exc.detail)
+        except Overloaded:
+            resp = fail("overloaded", 503, "Login capacity exhausted. Retry shortly.")
+            resp["Retry-After"] = "1"
+            return resp
+        return JsonResponse({"success": True, "data": data, "error": None, "trace_id": trace_id})
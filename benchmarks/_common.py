@@ -0,0 +1,65 @@
+# benchmarks/_common.py
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(settings_module: str = "lcr.settings.base"):
+    """Bootstrap Django against whatever DATABASE_URL/CACHE_URL the env points at."""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def jwt_signing_fallback() -> str:
+    """
+    Without RS256 keys configured, sign and verify tokens in this process
+    with a throwaway HS256 secret. Returns what tokens are signed with.
+    """
+    from django.conf import settings
+
+    if settings.SIMPLE_JWT.get("SIGNING_KEY"):
+        return settings.SIMPLE_JWT.get("ALGORITHM", "RS256")
+    from rest_framework_simplejwt.backends import TokenBackend
+    from rest_framework_simplejwt.tokens import Token
+    backend = TokenBackend("HS256", "bench-" + "k" * 32, audience=settings.SIMPLE_JWT.get("AUDIENCE"),
+                           issuer=settings.SIMPLE_JWT.get("ISSUER"))
+    Token.get_token_backend = lambda self: backend
+    return "HS256 (no RS256 keys configured)"
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile; `samples` need not be sorted."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(samples_s) -> dict:
+    """Seconds in, milliseconds out."""
+    if not samples_s:
+        return {"count": 0}
+    ms = [s * 1000.0 for s in samples_s]
+    return {
+        "count": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+    }
+
+
+def emit(result: dict, out: str | None = None):
+    text = json.dumps(result, indent=2, default=str)
+    if out:
+        Path(out).write_text(text + "\n")
+    print(text)
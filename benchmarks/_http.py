@@ -0,0 +1,133 @@
+# benchmarks/_http.py
+"""
+Minimal asyncio HTTP/1.1 keep-alive client for the load benchmarks (stdlib
+only, so the harness runs anywhere the app does). One connection per virtual
+user; handles Content-Length and chunked bodies.
+
+InProcessConnection has the same request() interface but calls the ASGI
+application in this process (django.test.AsyncClient: full middleware
+stack, no sockets).
+"""
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class HTTPConnection:
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, *, headers=None, json_body=None):
+        """-> (status, headers, body bytes). Reconnects once if the server closed the socket."""
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        if json_body is not None:
+            lines.append("Content-Type: application/json")
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+        for attempt in (1, 2):
+            try:
+                if self.writer is None:
+                    await self._connect()
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt == 2:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, headers, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+class InProcessConnection:
+    def __init__(self):
+        from django.test import AsyncClient
+        self.client = AsyncClient()
+
+    async def request(self, method: str, path: str, *, headers=None, json_body=None):
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        res = await self.client.generic(method, path, body, content_type="application/json", headers=headers)
+        content = b"".join([chunk async for chunk in res]) if res.streaming else res.content
+        return res.status_code, {k.lower(): v for k, v in res.items()}, content
+
+    async def close(self):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env: dict, *, timeout: float = 30.0, log_path=None) -> subprocess.Popen:
+    """The production command from entrypoint.sh (Gunicorn + UvicornWorker), on localhost."""
+    # Logs go to a file, not a pipe: nobody drains it during the run, and a full pipe blocks the server
+    log = open(log_path, "w+b") if log_path else tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "lcr.asgi:application", "-k", "uvicorn.workers.UvicornWorker",
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"server exited: {log.read().decode()[-2000:]}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            time.sleep(0.5 * workers)  # let every worker boot, not just the arbiter's socket
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start in time")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
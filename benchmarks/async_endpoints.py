@@ -0,0 +1,158 @@
+# benchmarks/async_endpoints.py
+"""
+Requests/sec per worker: sync DRF viewsets vs the native async endpoints
+(rental.async_views), served the way entrypoint.sh serves them
+(Gunicorn + UvicornWorker, fixed WEB_CONCURRENCY).
+
+For each scenario it drives --connections keep-alive clients for --duration
+seconds against the sync route, then the async route:
+
+  vehicles-list   GET  /api/v1/vehicles/       vs /api/v1/async/vehicles/
+  bookings-list   GET  /api/v1/bookings/       vs /api/v1/async/bookings/
+  bookings-create POST /api/v1/bookings/       vs /api/v1/async/bookings/
+
+    WEB_CONCURRENCY=2 python -m benchmarks.async_endpoints --duration 15 --connections 64
+
+Needs a migrated DATABASE_URL shared with the server, and the same JWT keys
+the deployment uses (tokens are minted here, verified by the server);
+--token skips minting. The seeded user is a customer, which can create
+bookings. A status outside EXPECTED_STATUSES (a 403, 5xx or timeout) fails
+the run after the report is written, so a scenario can't quietly measure
+error responses.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from datetime import timedelta
+
+from benchmarks._common import REPO_ROOT, emit, latency_summary, setup_django
+from benchmarks._http import HTTPConnection, free_port, start_server, stop_server
+
+ROUTES = {
+    "vehicles-list": ("GET", "/api/v1/vehicles/", "/api/v1/async/vehicles/"),
+    "bookings-list": ("GET", "/api/v1/bookings/", "/api/v1/async/bookings/"),
+    "bookings-create": ("POST", "/api/v1/bookings/", "/api/v1/async/bookings/"),
+}
+# 400/409: a lost race for a slot is still a booking write
+EXPECTED_STATUSES = {"GET": {200}, "POST": {201, 400, 409}}
+
+
+def _seed(cars: int, bookings_per_car: int):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rental.models import Booking, Car
+
+    user, _ = get_user_model().objects.update_or_create(
+        username="bench-async", defaults={"email": "bench-async@example.com", "role": "customer"})
+    Booking.objects.filter(customer=user).delete()
+    Car.objects.filter(plate_no__startswith="BAS-").delete()
+    fleet = Car.objects.bulk_create([
+        Car(plate_no=f"BAS-{i}", make="Bench", model=f"Async{i % 7}", year=2024) for i in range(cars)
+    ])
+    base = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    Booking.objects.bulk_create([
+        Booking(customer=user, car=car, start=base + timedelta(days=2 * j), end=base + timedelta(days=2 * j + 1))
+        for car in fleet for j in range(bookings_per_car)
+    ])
+    return user, [c.pk for c in fleet], base + timedelta(days=2 * bookings_per_car + 30)
+
+
+def _cleanup(user):
+    from rental.models import Booking, Car
+    Booking.objects.filter(customer=user).delete()
+    Car.objects.filter(plate_no__startswith="BAS-").delete()
+
+
+async def _drive(port, method, path, token, *, connections, duration, payloads, timeout):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        conn = HTTPConnection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < deadline:
+                body = next(payloads) if method == "POST" else None
+                t0 = time.perf_counter()
+                try:
+                    status, _, _ = await asyncio.wait_for(
+                        conn.request(method, path, headers=headers, json_body=body), timeout)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    await conn.close()  # the late response would desync this connection
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            await conn.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return time.perf_counter() - t0, latencies, statuses
+
+
+def _create_payloads(car_ids, after):
+    # Every request books a fresh (car, hour) slot, so creates measure throughput, not conflicts
+    for n in itertools.count():
+        start = after + timedelta(hours=n // len(car_ids))
+        yield {"car": car_ids[n % len(car_ids)], "start": start.isoformat(),
+               "end": (start + timedelta(minutes=59)).isoformat()}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenario", default=",".join(ROUTES), help="comma-separated: " + ", ".join(ROUTES))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    ap.add_argument("--connections", type=int, default=64)
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds per route")
+    ap.add_argument("--cars", type=int, default=200)
+    ap.add_argument("--bookings-per-car", type=int, default=5)
+    ap.add_argument("--token", help="use this access token instead of minting one")
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-request timeout, seconds")
+    ap.add_argument("--server-log", help="keep the server's stdout/stderr in this file")
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args(argv)
+
+    setup_django()
+    from accounts.auth import tokens_for_user
+
+    user, car_ids, after = _seed(args.cars, args.bookings_per_car)
+    token = args.token or tokens_for_user(user)["access"]
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT), "WEB_CONCURRENCY": str(args.workers)}
+    server = start_server(port, args.workers, env, log_path=args.server_log)
+    payloads = _create_payloads(car_ids, after)
+    results, unexpected = [], []
+    try:
+        for name in (s.strip() for s in args.scenario.split(",") if s.strip()):
+            method, sync_path, async_path = ROUTES[name]
+            for flavour, path in (("sync", sync_path), ("async", async_path)):
+                elapsed, latencies, statuses = asyncio.run(_drive(
+                    port, method, path, token,
+                    connections=args.connections, duration=args.duration, payloads=payloads,
+                    timeout=args.timeout,
+                ))
+                ok = sum(v for k, v in statuses.items() if k != "timeout" and k < 400)
+                unexpected += [f"{name}/{flavour}: {v} x {k}" for k, v in statuses.items()
+                               if k not in EXPECTED_STATUSES[method]]
+                results.append({
+                    "scenario": name,
+                    "flavour": flavour,
+                    "path": path,
+                    "requests_per_s": round(ok / elapsed, 1),
+                    "requests_per_s_per_worker": round(ok / elapsed / args.workers, 1),
+                    "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+                    "latency": latency_summary(latencies),
+                })
+    finally:
+        stop_server(server)
+        _cleanup(user)
+    emit({"benchmark": "async_endpoints", "web_concurrency": args.workers,
+          "connections": args.connections, "duration_s": args.duration, "results": results}, args.out)
+    if unexpected:
+        raise SystemExit("unexpected statuses: " + "; ".join(unexpected))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/booking_contention.py
+"""
+Same-car booking contention, per lock strategy (rental.services.locks).
+
+N threads or processes create bookings for ONE car over a shared set of hourly
+slots, so a fraction of attempts collide on purpose. For each strategy it
+reports bookings/sec, conflicts, lock timeouts, latency percentiles (incl. p99)
+and the strategy's own wait/retry/exhausted metrics as JSON.
+
+    # against the configured DATABASE_URL (migrated schema required)
+    python -m benchmarks.booking_contention --strategy row,advisory,optimistic,constraint \\
+        --workers 16 --concurrency processes --attempts 200
+
+Strategies that need PostgreSQL (constraint, advisory) fall back to `row`
+elsewhere; the report's "resolved" field says what actually ran.
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks._common import emit, latency_summary, setup_django
+
+
+def _hammer(strategy_name: str, car_id: int, user_id: int, base_iso: str,
+            attempts: int, slots: int, seed: int, barrier=None, own_metrics: bool = False) -> dict:
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from rest_framework import serializers
+    from rental.models import Car
+    from rental.services.booking_service import BookingService
+    from rental.services.locks import CarBusy, get_lock_strategy
+
+    user = get_user_model().objects.get(pk=user_id)
+    car = Car.objects.get(pk=car_id)
+    base = datetime.fromisoformat(base_iso)
+    strategy = get_lock_strategy(strategy_name)
+    if own_metrics:
+        strategy.metrics.reset()  # process mode: one job at a time per process
+    service = BookingService(lock_strategy=strategy)
+    rng = random.Random(seed)
+    latencies, counts = [], {"created": 0, "conflicts": 0, "busy": 0, "errors": 0}
+
+    if barrier is not None:
+        barrier.wait()
+    try:
+        for _ in range(attempts):
+            start = base + timedelta(hours=rng.randrange(slots))
+            t0 = time.perf_counter()
+            try:
+                service.create_booking(user=user, car=car, start=start, end=start + timedelta(hours=1))
+                counts["created"] += 1
+            except serializers.ValidationError:
+                counts["conflicts"] += 1
+            except CarBusy:
+                counts["busy"] += 1
+            except Exception:
+                counts["errors"] += 1
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        connections.close_all()
+    out = {"resolved": strategy.name, "latencies": latencies, "counts": counts}
+    if own_metrics:
+        out["metrics"] = strategy.metrics.snapshot()
+    return out
+
+
+def _process_entry(args):
+    return _hammer(*args, own_metrics=True)
+
+
+def _merge_metrics(snapshots) -> dict:
+    merged = {"acquisitions": 0, "wait_total_s": 0.0, "wait_max_s": 0.0, "retries": 0, "timeouts": 0,
+              "exhausted": 0}
+    for snap in snapshots:
+        for k, v in snap.items():
+            merged[k] = max(merged[k], v) if k == "wait_max_s" else merged[k] + v
+    merged["wait_mean_ms"] = round(1000 * merged["wait_total_s"] / merged["acquisitions"], 3) if merged["acquisitions"] else 0.0
+    merged["wait_max_ms"] = round(1000 * merged.pop("wait_max_s"), 3)
+    merged.pop("wait_total_s")
+    return merged
+
+
+def run_strategy(strategy_name: str, *, workers: int, concurrency: str, attempts: int, slots: int, seed: int) -> dict:
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.utils import timezone
+    from rental.models import Booking, Car
+    from rental.services.locks import get_lock_strategy, lock_metrics
+
+    user, _ = get_user_model().objects.get_or_create(
+        username="bench-contention", defaults={"email": "bench-contention@example.com"})
+    car = Car.objects.create(plate_no=f"BENCH-{strategy_name[:3].upper()}-{int(time.time() * 1000) % 100000}",
+                             make="Bench", model="Contention", year=2024)
+    base = (timezone.now() + timedelta(days=30)).replace(minute=0, second=0, microsecond=0).isoformat()
+    resolved = get_lock_strategy(strategy_name).name
+    lock_metrics(resolved).reset()
+    jobs = [(strategy_name, car.pk, user.pk, base, attempts, slots, seed + i) for i in range(workers)]
+
+    t0 = time.perf_counter()
+    if concurrency == "processes":
+        # spawn: children must not inherit the parent's DB connections
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(workers, initializer=setup_django) as pool:
+            outcomes = pool.map(_process_entry, jobs)
+        metric_snaps = [o.pop("metrics") for o in outcomes]
+    else:
+        barrier = threading.Barrier(workers)
+        outcomes, guard = [], threading.Lock()
+
+        def run(job):
+            res = _hammer(*job, barrier=barrier)
+            with guard:
+                outcomes.append(res)
+
+        threads = [threading.Thread(target=run, args=(job,)) for job in jobs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        metric_snaps = [lock_metrics(resolved).snapshot()]
+    elapsed = time.perf_counter() - t0
+
+    latencies = [s for o in outcomes for s in o["latencies"]]
+    counts = {k: sum(o["counts"][k] for o in outcomes) for k in ("created", "conflicts", "busy", "errors")}
+    starts = list(Booking.objects.filter(car=car).values_list("start", flat=True))
+    Booking.objects.filter(car=car).delete()
+    car.delete()
+
+    return {
+        "strategy": strategy_name,
+        "resolved": resolved,
+        "vendor": connection.vendor,
+        "concurrency": concurrency,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "bookings_per_s": round(counts["created"] / elapsed, 1) if elapsed else 0.0,
+        "attempts_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "double_booked": len(starts) - len(set(starts)),  # slots are aligned, so equal starts == overlap
+        **counts,
+        "latency": latency_summary(latencies),
+        "lock": _merge_metrics(metric_snaps),
+    }
+
+
+def main(argv=None, *, default_strategies="row,advisory,optimistic,constraint"):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--strategy", default=default_strategies, help="comma-separated strategy names")
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--concurrency", choices=["threads", "processes"], default="threads")
+    ap.add_argument("--attempts", type=int, default=200, help="booking attempts per worker")
+    ap.add_argument("--slots", type=int, default=2000, help="distinct hourly windows to pick from")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args(argv)
+
+    setup_django()
+    results = [
+        run_strategy(name.strip(), workers=args.workers, concurrency=args.concurrency,
+                     attempts=args.attempts, slots=args.slots, seed=args.seed)
+        for name in args.strategy.split(",") if name.strip()
+    ]
+    emit({"benchmark": "booking_contention", "attempts_per_worker": args.attempts, "results": results}, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+# benchmarks/booking_overlap.py
+"""
+DB exclusion constraint vs application overlap check under same-car contention.
+
+Thin preset over benchmarks.booking_contention comparing the `constraint`
+strategy (single INSERT) with `row` (lock car row + overlap query + INSERT):
+
+    python -m benchmarks.booking_overlap --workers 16 --attempts 200
+"""
+from benchmarks.booking_contention import main
+
+if __name__ == "__main__":
+    main(default_strategies="constraint,row")
@@ -0,0 +1,86 @@
+# benchmarks/cold_start.py
+"""
+Process cold start: wall time of fresh Python processes that import the
+settings and set Django up, the way every `manage.py` call in entrypoint.sh
+and every Gunicorn worker does.
+
+Runs each command --runs times per CACHE_URL scenario and reports the
+distribution as JSON:
+
+    python -m benchmarks.cold_start --runs 10
+    python -m benchmarks.cold_start --scenario unset,refused,blackhole --command setup,check
+
+Scenarios (CACHE_URL):
+  unset     - no Redis configured
+  refused   - Redis URL on a closed local port (fails fast)
+  blackhole - Redis URL on an unroutable address (connects hang until timeout)
+  stalled   - a local listener that accepts connections and never answers
+  custom    - whatever --cache-url says
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks._common import REPO_ROOT, emit, latency_summary
+
+SCENARIOS = {
+    "unset": "",
+    "refused": "redis://127.0.0.1:1/1",
+    "blackhole": "redis://10.255.255.1:6379/1",
+}
+COMMANDS = {
+    "setup": [sys.executable, "-c", "import django; django.setup()"],
+    "check": [sys.executable, "manage.py", "check"],
+}
+
+
+def _stalled_listener() -> tuple[socket.socket, str]:
+    # Accepts (via the listen backlog) but never reads or replies
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(64)
+    return sock, f"redis://127.0.0.1:{sock.getsockname()[1]}/1"
+
+
+def run(command: list[str], cache_url: str, *, runs: int, timeout: float) -> dict:
+    env = {**os.environ, "CACHE_URL": cache_url, "PYTHONPATH": str(REPO_ROOT)}
+    env.setdefault("DJANGO_SETTINGS_MODULE", "lcr.settings.base")
+    samples, failures, timeouts = [], 0, 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, timeout=timeout)
+            failures += proc.returncode != 0
+        except subprocess.TimeoutExpired:
+            timeouts += 1
+        samples.append(time.perf_counter() - t0)
+    return {"runs": runs, "failures": failures, "timeouts": timeouts, "wall": latency_summary(samples)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenario", default="unset,refused,blackhole,stalled")
+    ap.add_argument("--command", default="setup,check", help="comma-separated: setup, check")
+    ap.add_argument("--cache-url", default="", help="CACHE_URL for the 'custom' scenario")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=60.0, help="per-process cap, seconds")
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args(argv)
+
+    listener, stalled_url = _stalled_listener()
+    scenarios = {**SCENARIOS, "stalled": stalled_url, "custom": args.cache_url}
+    results = [
+        {"scenario": scenario, "command": command,
+         **run(COMMANDS[command], scenarios[scenario], runs=args.runs, timeout=args.timeout)}
+        for scenario in args.scenario.split(",") if scenario.strip()
+        for command in args.command.split(",") if command.strip()
+    ]
+    listener.close()
+    emit({"benchmark": "cold_start", "results": results}, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/login_throughput.py
+"""
+Login burst: sync LoginView vs AsyncLoginView (bounded executor).
+
+Drives the full ASGI stack in-process (django.test.AsyncClient) with
+--concurrency simultaneous logins, while a probe loop keeps issuing a cheap
+request on the same event loop. Reports logins/sec, login latency and the
+probe's latency during the burst (how much the logins starve everything else).
+
+    python -m benchmarks.login_throughput --mode sync,async --logins 200 --concurrency 32
+
+The auth throttle is disabled for the run. Without RS256 keys configured the
+tokens are HS256-signed; the report's "signing" field says which.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._common import emit, jwt_signing_fallback, latency_summary, setup_django
+
+PASSWORD = "Bench!Login-Pass1"
+URL_NAMES = {"sync": "login", "async": "login-async"}
+
+
+def _prepare(users: int) -> tuple[list[str], str]:
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.throttling import ScopedRateThrottle
+
+    ScopedRateThrottle.THROTTLE_RATES = {**ScopedRateThrottle.THROTTLE_RATES, "auth": None}
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]  # AsyncClient's Host header
+
+    signing = jwt_signing_fallback()
+
+    User = get_user_model()
+    names = [f"bench-login-{i}" for i in range(users)]
+    User.objects.filter(username__in=names).delete()
+    hashed = make_password(PASSWORD)  # one real hash, copied: setup shouldn't dominate the run
+    User.objects.bulk_create([User(username=n, email=f"{n}@example.com", password=hashed) for n in names])
+    return names, signing
+
+
+async def _burst(mode: str, names: list[str], logins: int, concurrency: int) -> dict:
+    from django.test import AsyncClient
+    from django.urls import reverse
+
+    client = AsyncClient()
+    url, probe_url = reverse(URL_NAMES[mode]), reverse("login-async")
+    sem = asyncio.Semaphore(concurrency)
+    latencies, probes, statuses = [], [], {}
+    done = asyncio.Event()
+
+    async def login(i):
+        async with sem:
+            # emails, upper-cased: exercises the Lower() lookup path
+            payload = {"username_or_email": f"{names[i % len(names)]}@EXAMPLE.com", "password": PASSWORD}
+            t0 = time.perf_counter()
+            r = await client.post(url, payload, content_type="application/json")
+            latencies.append(time.perf_counter() - t0)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    async def probe():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await client.get(probe_url)  # 405 from the async view: pure request overhead
+            probes.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.01)
+
+    prober = asyncio.ensure_future(probe())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await prober
+
+    ok = statuses.get(200, 0)
+    return {
+        "mode": mode,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(ok / elapsed, 1) if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "login_latency": latency_summary(latencies),
+        "probe_latency": latency_summary(probes),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mode", default="sync,async", help="comma-separated: sync, async")
+    ap.add_argument("--users", type=int, default=20)
+    ap.add_argument("--logins", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args(argv)
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    names, signing = _prepare(args.users)
+    try:
+        results = [asyncio.run(_burst(m.strip(), names, args.logins, args.concurrency))
+                   for m in args.mode.split(",") if m.strip()]
+    finally:
+        get_user_model().objects.filter(username__in=names).delete()
+    emit({
+        "benchmark": "login_throughput",
+        "signing": signing,
+        "executor": {"workers": settings.LOGIN_EXECUTOR_WORKERS, "max_in_flight": settings.LOGIN_MAX_IN_FLIGHT},
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "results": results,
+    }, args.out)
+
+
+if __name__ == "__main__":
+    main()
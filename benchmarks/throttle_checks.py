@@ -0,0 +1,131 @@
+# benchmarks/throttle_checks.py
+"""
+Throttle checks/sec: lcr.throttling backends vs DRF's SimpleRateThrottle.
+
+Each worker (thread or process) runs --checks checks spread over --keys
+client keys, at a rate high enough that nothing is denied, so the numbers
+are the pure cost of one check. Reports checks/sec and latency percentiles
+per backend as JSON.
+
+    python -m benchmarks.throttle_checks --backend file,drf --workers 8 --concurrency processes
+    python -m benchmarks.throttle_checks --backend redis,drf --redis-url redis://localhost:6379/1
+
+  file  - FileWindowBackend (mmap + flock), state in --state-file
+  redis - RedisWindowBackend, one EVALSHA per check
+  drf   - rest_framework SimpleRateThrottle history list in the default cache
+          (LocMemCache unless CACHE_URL is set; per-process then)
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks._common import emit, latency_summary, setup_django
+
+RATE = "1000000/hour"
+
+
+def _checker(backend: str, opts: dict):
+    from lcr.throttling import FileWindowBackend, RedisWindowBackend
+
+    if backend == "file":
+        b = FileWindowBackend(opts["state_file"], slots=opts["slots"])
+        return lambda key: b.hit(key, 1_000_000, 3600)[0]
+    if backend == "redis":
+        b = RedisWindowBackend(opts["redis_url"], timeout_s=1.0, prefix=f"bench-throttle-{os.getpid()}")
+        return lambda key: b.hit(key, 1_000_000, 3600)[0]
+
+    from rest_framework.throttling import SimpleRateThrottle
+
+    class Bench(SimpleRateThrottle):
+        scope = "bench"
+        THROTTLE_RATES = {"bench": RATE}
+
+        def get_cache_key(self, request, view):
+            return request
+
+    throttle = Bench()
+    return lambda key: throttle.allow_request(key, None)
+
+
+def _run(backend: str, opts: dict, seed: int, barrier=None) -> dict:
+    check = _checker(backend, opts)
+    keys = [f"bench:{seed}:{i}" for i in range(opts["keys"])]
+    latencies, denied = [], 0
+    if barrier is not None:
+        barrier.wait()
+    for i in range(opts["checks"]):
+        t0 = time.perf_counter()
+        if not check(keys[i % len(keys)]):
+            denied += 1
+        latencies.append(time.perf_counter() - t0)
+    return {"latencies": latencies, "denied": denied}
+
+
+def _process_entry(args):
+    return _run(*args)
+
+
+def run_backend(backend: str, *, workers: int, concurrency: str, opts: dict) -> dict:
+    t0 = time.perf_counter()
+    if concurrency == "processes":
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(workers, initializer=setup_django) as pool:
+            outcomes = pool.map(_process_entry, [(backend, opts, i) for i in range(workers)])
+    else:
+        barrier = threading.Barrier(workers)
+        outcomes, guard = [], threading.Lock()
+
+        def run(seed):
+            res = _run(backend, opts, seed, barrier)
+            with guard:
+                outcomes.append(res)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies = [s for o in outcomes for s in o["latencies"]]
+    return {
+        "backend": backend,
+        "concurrency": concurrency,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "checks_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "denied": sum(o["denied"] for o in outcomes),
+        "latency": latency_summary(latencies),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend", default="file,drf", help="comma-separated: file, redis, drf")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--concurrency", choices=["threads", "processes"], default="threads")
+    ap.add_argument("--checks", type=int, default=20000, help="checks per worker")
+    ap.add_argument("--keys", type=int, default=100, help="distinct client keys per worker")
+    ap.add_argument("--redis-url", default=os.environ.get("THROTTLE_REDIS_URL", "redis://localhost:6379/1"))
+    ap.add_argument("--state-file", default=os.path.join(tempfile.gettempdir(), "lcr-throttle-bench.bin"))
+    ap.add_argument("--slots", type=int, default=65536)
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args(argv)
+
+    setup_django()
+    if os.path.exists(args.state_file):
+        os.remove(args.state_file)
+    opts = {"checks": args.checks, "keys": args.keys, "redis_url": args.redis_url,
+            "state_file": args.state_file, "slots": args.slots}
+    results = [
+        run_backend(name.strip(), workers=args.workers, concurrency=args.concurrency, opts=opts)
+        for name in args.backend.split(",") if name.strip()
+    ]
+    emit({"benchmark": "throttle_checks", "checks_per_worker": args.checks, "results": results}, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,14 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-# Run DB migrations
-python manage.py migrate --noinput
-
-# Collect static files (toggle with env if you want to skip in dev)
+# Migrate, collect static files and seed RBAC roles in one Django process;
+# each step is skipped when already up to date (see `manage.py bootstrap --help`)
 : "${DJANGO_COLLECTSTATIC:=1}"
-if [ "$DJANGO_COLLECTSTATIC" = "1" ]; then
-  python manage.py collectstatic --noinput
+BOOTSTRAP_ARGS=()
+if [ "$DJANGO_COLLECTSTATIC" != "1" ]; then
+  BOOTSTRAP_ARGS+=(--skip-static)
 fi
-
-# Seed RBAC roles (safe to run repeatedly)
-python manage.py seed_roles || true
+python manage.py bootstrap "${BOOTSTRAP_ARGS[@]}"
 
 # Start ASGI via Gunicorn + Uvicorn workers
 # Tune WEB_CONCURRENCY/WEB_TIMEOUT via env
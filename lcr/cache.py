@@ -0,0 +1,146 @@
+# lcr/cache.py
+"""
+Redis cache backend that never blocks settings import and survives outages.
+
+  * Lazy: nothing connects until the first cache call (settings only build a
+    dict; no ping at import time, so manage.py commands and workers start
+    without a network round trip).
+  * Pool-aware: one redis-py connection pool per process and LOCATION, shared
+    by every thread's backend instance (Django builds one per thread), sized
+    and timed out by CACHES[...]["OPTIONS"] (max_connections, socket_timeout,
+    socket_connect_timeout, ...).
+  * Resilient: a connection error or timeout flips the LOCATION to "degraded";
+    calls then go straight to a process-local LocMemCache instead of paying a
+    timeout each, while a background thread pings Redis every
+    PROBE_INTERVAL_S and flips it back. Values written during an outage stay
+    local and are not replayed, so TTLs bound any staleness afterwards.
+  * Observable: cache_health() returns state and counters per LOCATION
+    (trips, errors, fallback operations, last error) for metrics.
+"""
+import logging
+import threading
+import time
+
+import redis
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
+
+logger = logging.getLogger(__name__)
+
+REDIS_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+
+class CacheHealth:
+    """Shared state for one LOCATION in this process."""
+
+    def __init__(self, location: str, probe_interval_s: float):
+        self.location = location
+        self.probe_interval_s = probe_interval_s
+        self.degraded = False
+        self.trips = 0
+        self.errors = 0
+        self.fallback_ops = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._probe = None
+
+    def trip(self, exc, ping):
+        with self._lock:
+            self.errors += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            if self.degraded:
+                return
+            self.degraded = True
+            self.trips += 1
+            if self._probe is None or not self._probe.is_alive():
+                self._probe = threading.Thread(target=self._run_probe, args=(ping,), daemon=True,
+                                               name=f"cache-probe-{self.location}")
+                self._probe.start()
+        logger.warning("cache %s unavailable (%s); using local fallback", self.location, self.last_error)
+
+    def _run_probe(self, ping):
+        while True:
+            time.sleep(self.probe_interval_s)
+            try:
+                ping()
+            except REDIS_ERRORS as exc:
+                with self._lock:
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                continue
+            with self._lock:
+                self.degraded = False
+            logger.info("cache %s recovered", self.location)
+            return
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallback_ops += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": "degraded" if self.degraded else "ok",
+                "trips": self.trips,
+                "errors": self.errors,
+                "fallback_ops": self.fallback_ops,
+                "last_error": self.last_error,
+            }
+
+
+_HEALTH: dict[str, CacheHealth] = {}
+_CLIENTS: dict[tuple, RedisCacheClient] = {}
+_registry_lock = threading.Lock()
+
+
+def cache_health() -> dict:
+    """{LOCATION: state and counters} for every ResilientRedisCache used in this process."""
+    with _registry_lock:
+        return {location: health.snapshot() for location, health in _HEALTH.items()}
+
+
+class ResilientRedisCache(RedisCache):
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._location = server if isinstance(server, str) else ",".join(server)
+        with _registry_lock:
+            self.health = _HEALTH.setdefault(
+                self._location, CacheHealth(self._location, float(params.get("PROBE_INTERVAL_S", 5)))
+            )
+        # Same key prefix/version/timeout semantics as this cache; storage shared per LOCATION
+        self._fallback = LocMemCache(f"lcr-fallback:{self._location}", {
+            k: v for k, v in params.items() if k in ("TIMEOUT", "KEY_PREFIX", "VERSION", "KEY_FUNCTION")
+        } | {"OPTIONS": {"MAX_ENTRIES": int(params.get("FALLBACK_MAX_ENTRIES", 10000))}})
+
+    @property
+    def _cache(self):
+        # One client (and so one connection pool) per process, not per thread
+        key = (self._location, repr(sorted(self._options.items())))
+        client = _CLIENTS.get(key)
+        if client is None:
+            with _registry_lock:
+                client = _CLIENTS.setdefault(key, self._class(self._servers, **self._options))
+        return client
+
+    def ping(self):
+        self._cache.get_client(write=True).ping()
+
+
+def _guarded(name):
+    redis_method = getattr(RedisCache, name)
+
+    def method(self, *args, **kwargs):
+        if not self.health.degraded:
+            try:
+                return redis_method(self, *args, **kwargs)
+            except REDIS_ERRORS as exc:
+                self.health.trip(exc, lambda: self.ping())
+        self.health.record_fallback()
+        return getattr(self._fallback, name)(*args, **kwargs)
+
+    method.__name__ = name
+    return method
+
+
+for _name in ("add", "get", "set", "touch", "delete", "get_many", "has_key", "incr", "set_many",
+              "delete_many", "clear"):
+    setattr(ResilientRedisCache, _name, _guarded(_name))
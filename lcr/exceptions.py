@@ -1,30 +1,38 @@
 # core/exceptions.py
+from django.conf import settings
 from rest_framework.views import exception_handler
 from rest_framework.exceptions import Throttled
 from django.utils.translation import gettext_lazy as _
-import traceback
 import logging
 
+from lcr.log import LogSampler
+
 logger = logging.getLogger(__name__)
 
+# Routine 4xx (validation, auth, throttling) are logged once per kind per
+# interval, with a count of the ones skipped; 5xx always, with the traceback.
+_client_errors = LogSampler(settings.LOG_4XX_SAMPLE_INTERVAL_S)
+
+
 def custom_exception_handler(exc, context):
-    # Print traceback to console
-    print("=" * 80)
-    print("EXCEPTION CAUGHT:")
-    print(traceback.format_exc())
-    print("=" * 80)
-    
-    # Also log via Django logging system
-    logger.exception("Unhandled exception occurred", exc_info=exc)
-    
     resp = exception_handler(exc, context)
     request = context.get("request")
     trace_id = getattr(request, "request_id", None)
+    where = {
+        "method": getattr(request, "method", None),
+        "path": getattr(request, "path", None),
+        "view": type(context.get("view")).__name__,
+    }
 
     if resp is None:
         # Unhandled -> 500 envelope
-        logger.error(f"Unhandled exception for request {trace_id}: {exc}")
-        return _wrap(500, False, None, {"code": "server_error", "message": "Internal server error"}, trace_id)
+        logger.error("%s %s -> unhandled %s", where["method"], where["path"], type(exc).__name__,
+                     exc_info=exc, extra=where)
+        resp = _wrap(500, False, None, {"code": "server_error", "message": "Internal server error"}, trace_id)
+        resp._has_been_logged = True  # django.request would log it again, without the traceback
+        return resp
+
+    _log_client_error(exc, resp.status_code, where)
 
     # DRF already set status_code & data; normalize into our envelope
     detail = resp.data
@@ -38,6 +46,8 @@ def custom_exception_handler(exc, context):
         error["code"] = "unauthorized" if resp.status_code == 401 else "forbidden"
     elif resp.status_code == 404:
         error["code"] = "not_found"
+    elif resp.status_code in (409, 422):
+        error["code"] = getattr(exc, "default_code", "conflict")
     elif resp.status_code == 429 or isinstance(exc, Throttled):
         error["code"] = "rate_limited"
         error["message"] = _("Too many requests. Try later.")
@@ -46,6 +56,20 @@ def custom_exception_handler(exc, context):
 
     return _wrap(resp.status_code, False, None, error, trace_id)
 
+def _log_client_error(exc, status_code, where):
+    if status_code >= 500:  # an APIException raised on purpose
+        logger.error("%s %s -> %s %s", where["method"], where["path"], status_code, type(exc).__name__,
+                     exc_info=exc, extra=where)
+        return
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    allowed, suppressed = _client_errors.allow((status_code, type(exc).__name__, where["view"]))
+    if allowed:
+        logger.info("%s %s -> %s %s%s", where["method"], where["path"], status_code, type(exc).__name__,
+                    f" (+{suppressed} similar since last logged)" if suppressed else "",
+                    extra={**where, "status": status_code, "suppressed": suppressed})
+
+
 def _wrap(status_code, success, data, error, trace_id):
     from rest_framework.response import Response
     body = {"success": success, "data": data, "error": error, "trace_id": trace_id}
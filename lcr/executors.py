@@ -0,0 +1,58 @@
+# lcr/executors.py
+"""
+Bounded offloading of blocking work (password hashing, token signing, ORM
+writes) from async views.
+
+A fixed worker pool caps CPU/DB parallelism, and a cap on in-flight calls
+(running + queued) turns a burst into fast 503s instead of an ever-growing
+queue inside the worker process.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when the executor is at its in-flight cap."""
+
+
+def _with_db_cleanup(fn):
+    # Pool threads outlive requests: apply CONN_MAX_AGE / drop broken connections
+    # the way request_started/request_finished would.
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return run
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, *, max_workers: int, max_in_flight: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_in_flight = max(max_in_flight, max_workers)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        # Created on first use: no threads at import time / in management commands
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+        return self._pool
+
+    async def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise Overloaded(self.name)
+        try:
+            call = sync_to_async(_with_db_cleanup(fn), thread_sensitive=False, executor=self.pool)
+            return await call(*args, **kwargs)
+        finally:
+            self._slots.release()
@@ -0,0 +1,170 @@
+# lcr/log.py
+"""
+Logging that stays off the request thread.
+
+  * QueueingStreamHandler: the handler in settings.LOGGING. A request thread
+    only captures the record (message, trace_id) and drops it on a bounded
+    queue. A QueueListener thread formats it, including any traceback, and
+    writes it to stderr. If the queue is full the record is dropped and
+    counted; a request never waits on stdout.
+  * JsonFormatter: one JSON object per line (ts, level, logger, msg, trace_id,
+    extra fields, exc).
+  * trace_id: RequestIdMiddleware sets it in a ContextVar, so every record
+    logged while serving a request carries the request's X-Request-ID.
+  * LogSampler: lets the first of a kind through per interval and counts
+    the rest (repetitive 4xx in lcr.exceptions).
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+trace_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("trace_id", default=None)
+
+# LogRecord attributes that aren't user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "trace_id", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", None),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The plain format, with the trace id appended when there is one."""
+
+    def format(self, record):
+        line = super().format(record)
+        trace_id = getattr(record, "trace_id", None)
+        return f"{line} [trace_id={trace_id}]" if trace_id else line
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is at the time (it may be swapped after setup)."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _DrainingListener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # blocking: wait for room rather than lose the stop signal
+
+
+class QueueingStreamHandler(QueueHandler):
+    """
+    QueueHandler that owns its StreamHandler and listener thread. The listener
+    is started lazily on first use in each process, so forked workers get
+    their own.
+    """
+
+    def __init__(self, stream=None, queue_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream) if stream is not None else _StderrHandler()
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # dictConfig's "formatter" applies to the output, which the listener formats
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = _DrainingListener(self.queue, self.target, respect_handler_level=False)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.flush_and_stop)
+
+    def prepare(self, record):
+        # Just enough on the request thread to make the record safe to hand
+        # over; formatting (and traceback rendering) happens in the listener.
+        record = logging.makeLogRecord(vars(record))
+        record.msg, record.args = record.getMessage(), None
+        if not hasattr(record, "trace_id"):
+            record.trace_id = trace_id_var.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def flush_and_stop(self):
+        """Write out what's queued and stop the listener (atexit, tests)."""
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                try:
+                    self.target.flush()
+                except (OSError, ValueError):  # stream already closed at interpreter exit
+                    pass
+            self._listener = self._pid = None
+
+
+class LogSampler:
+    """
+    allow(key) is True for the first call per key in each `interval_s`; the
+    calls it refused in between are returned with the next allowed one.
+    interval_s <= 0 allows everything.
+    """
+
+    def __init__(self, interval_s: float, *, max_keys: int = 1024, clock=time.monotonic):
+        self.interval_s = interval_s
+        self.max_keys = max_keys
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._seen: dict = {}  # key -> [window start, suppressed]
+
+    def allow(self, key) -> tuple[bool, int]:
+        if self.interval_s <= 0:
+            return True, 0
+        now = self.clock()
+        with self._lock:
+            slot = self._seen.get(key)
+            if slot is not None and now - slot[0] < self.interval_s:
+                slot[1] += 1
+                return False, 0
+            if slot is None and len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 0]
+            return True, slot[1] if slot else 0
@@ -0,0 +1,338 @@
+# lcr/metrics.py
+"""
+Per-request timings: Server-Timing headers and Prometheus histograms.
+
+MetricsMiddleware puts a RequestTimings in a ContextVar for each request;
+instrumented code adds to it:
+
+  db         every query, through a connection execute wrapper (count + time)
+  perm       DRF permission checks (TimedPermissionsMixin) and scope_or_perm()
+  serialize  serializer .data (TimedSerializerMixin) and JSON rendering
+
+Phases are exclusive: queries run inside a serializer or a permission check
+count as db, not twice. Outside a request (or with METRICS_ENABLED off) the
+hooks find no RequestTimings and do nothing else; with it off the middleware
+isn't loaded and no execute wrapper is installed.
+
+Aggregates go to MetricsFile, an mmap'd table shared by every worker on the
+host (like lcr.throttling.FileWindowBackend), keyed by (route, method,
+status class). GET /api/metrics renders it in the Prometheus text format,
+so any worker answering a scrape reports the whole host.
+"""
+import bisect
+import fcntl
+import hashlib
+import hmac
+import itertools
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("total", "db", "perm", "serialize")
+BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_U64, _F64 = struct.Struct("<Q"), struct.Struct("<d")
+
+
+class RequestTimings:
+    __slots__ = ("db_s", "db_queries", "perm_s", "serialize_s", "_open")
+
+    def __init__(self):
+        self.db_s = self.perm_s = self.serialize_s = 0.0
+        self.db_queries = 0
+        self._open = set()
+
+    def server_timing(self, total_s: float) -> str:
+        ms = lambda s: f"{s * 1000:.1f}"  # noqa: E731
+        return (f'db;dur={ms(self.db_s)};desc="{self.db_queries} queries", perm;dur={ms(self.perm_s)}, '
+                f"ser;dur={ms(self.serialize_s)}, total;dur={ms(total_s)}")
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the block's wall time, minus queries run inside it, to `phase`."""
+    timings = current_timings.get()
+    if timings is None or phase in timings._open:  # not measuring, or nested
+        yield
+        return
+    timings._open.add(phase)
+    db_before, t0 = timings.db_s, time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(phase)
+        own = max(0.0, time.perf_counter() - t0 - (timings.db_s - db_before))
+        setattr(timings, f"{phase}_s", getattr(timings, f"{phase}_s") + own)
+
+
+# ── hooks ─────────────────────────────────────────────────────────────────────
+
+def _db_wrapper(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_s += time.perf_counter() - t0
+        timings.db_queries += 1
+
+
+def instrument_connection(connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def instrument_connections():
+    """Hook new connections, and this thread's already open ones."""
+    connection_created.connect(instrument_connection, dispatch_uid="lcr.metrics")
+    for connection in connections.all(initialized_only=True):
+        instrument_connection(connection)
+
+
+class TimedPermissionsMixin:
+    """APIView mixin: DRF permission checks count as `perm`."""
+
+    def check_permissions(self, request):
+        with timed("perm"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed("perm"):
+            super().check_object_permissions(request, obj)
+
+
+class TimedSerializerMixin:
+    """Serializer mixin: building .data counts as `serialize`."""
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    """For Meta.list_serializer_class, so many=True output is timed once, not per item."""
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("serialize"):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+# ── shared store ──────────────────────────────────────────────────────────────
+
+class MetricsFile:
+    """
+    Fixed-size open-addressing table in a shared file. Each slot holds a label
+    (route, method, status class), a histogram per phase (sum, then a count
+    per bucket interval and one above the last) and a query counter. Labels that don't fit go to the
+    last slot, labelled route="__overflow__".
+    """
+    HEADER = struct.Struct("<4sII")
+    MAGIC = b"LCRM"
+    LABEL = 112
+    SLOT = struct.Struct(f"<Q{LABEL}s" + ("d" + "Q" * (len(BUCKETS_S) + 1)) * len(PHASES) + "Q")
+    OVERFLOW = ("__overflow__", "*", "*")
+
+    def __init__(self, path: str, *, slots: int = 512):
+        self.path = path
+        self.slots = slots
+        self._size = self.HEADER.size + slots * self.SLOT.size
+        self._layout = zlib.crc32(repr((self.SLOT.format, PHASES, BUCKETS_S)).encode())
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.Lock()
+        self._offsets = {}  # label -> slot offset, re-checked against the slot's hash
+        with self._locked():
+            if os.fstat(self._fd).st_size < self._size:
+                os.ftruncate(self._fd, self._size)
+            self._map = mmap.mmap(self._fd, self._size)
+            if self.HEADER.unpack_from(self._map, 0) != (self.MAGIC, self._layout, slots):
+                self._map[:] = bytes(self._size)  # new file, or written by another layout
+                self.HEADER.pack_into(self._map, 0, self.MAGIC, self._layout, slots)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _locked(self, mode=fcntl.LOCK_EX):
+        with self._thread_lock:  # flock doesn't exclude threads sharing the fd
+            fcntl.flock(self._fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, index):
+        return self.HEADER.size + index * self.SLOT.size
+
+    def _find(self, labels):
+        """Offset of the slot for `labels`, claiming an empty one if needed."""
+        raw = "\x1f".join(labels).encode()[: self.LABEL]
+        h = int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little") | 1  # 0 = empty
+        offset = self._offsets.get(raw)
+        if offset is not None and _U64.unpack_from(self._map, offset)[0] == h:
+            return offset
+        for i in range(self.slots - 1):  # the last slot is the overflow
+            offset = self._offset((h + i) % (self.slots - 1))
+            slot_hash = _U64.unpack_from(self._map, offset)[0]
+            if slot_hash == 0:
+                struct.pack_into(f"<Q{self.LABEL}s", self._map, offset, h, raw)
+            if slot_hash in (0, h):
+                self._offsets[raw] = offset
+                return offset
+        offset = self._offset(self.slots - 1)
+        struct.pack_into(f"<Q{self.LABEL}s", self._map, offset, 1, "\x1f".join(self.OVERFLOW).encode())
+        return offset
+
+    def record(self, labels: tuple[str, str, str], seconds: dict[str, float], db_queries: int):
+        # Touches only what changes: per phase the sum and one bucket (buckets
+        # are stored per interval and made cumulative by read())
+        with self._locked():
+            pos = self._find(labels) + 8 + self.LABEL
+            for phase in PHASES:
+                value = seconds[phase]
+                _F64.pack_into(self._map, pos, _F64.unpack_from(self._map, pos)[0] + value)
+                bucket = pos + 8 + 8 * bisect.bisect_left(BUCKETS_S, value)
+                _U64.pack_into(self._map, bucket, _U64.unpack_from(self._map, bucket)[0] + 1)
+                pos += 8 * (len(BUCKETS_S) + 2)
+            _U64.pack_into(self._map, pos, _U64.unpack_from(self._map, pos)[0] + db_queries)
+
+    def read(self) -> list[dict]:
+        rows = []
+        with self._locked(fcntl.LOCK_SH):
+            for index in range(self.slots):
+                values = self.SLOT.unpack_from(self._map, self._offset(index))
+                if values[0] == 0:
+                    continue
+                route, method, status = values[1].rstrip(b"\0").decode(errors="replace").split("\x1f")
+                row, pos = {"labels": {"route": route, "method": method, "status": status}}, 2
+                for phase in PHASES:
+                    counts = values[pos + 1: pos + 2 + len(BUCKETS_S)]
+                    row[phase] = {"sum": values[pos], "buckets": tuple(itertools.accumulate(counts))}
+                    pos += 2 + len(BUCKETS_S)
+                row["db_queries"] = values[pos]
+                rows.append(row)
+        return rows
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store() -> MetricsFile:
+    global _store, _store_pid
+    if _store_pid != os.getpid():  # opened per process: flock must not be shared across a fork
+        with _store_lock:
+            if _store_pid != os.getpid():
+                _store = MetricsFile(settings.METRICS_STATE_FILE, slots=settings.METRICS_FILE_SLOTS)
+                _store_pid = os.getpid()
+    return _store
+
+
+def reset_metrics_store():
+    """Drop the process's store (settings changed, tests)."""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is not None and _store_pid == os.getpid():
+            _store.close()
+        _store = _store_pid = None
+
+
+def record_request(request, status_code: int, timings: RequestTimings, total_s: float):
+    match = getattr(request, "resolver_match", None)
+    labels = (match.view_name if match else "unmatched", request.method, f"{status_code // 100}xx")
+    seconds = {"total": total_s, "db": timings.db_s, "perm": timings.perm_s, "serialize": timings.serialize_s}
+    try:
+        get_metrics_store().record(labels, seconds, timings.db_queries)
+    except OSError as exc:  # never fail a request over metrics
+        logger.warning("metrics store unavailable: %s", exc)
+
+
+def server_timing_allowed(request) -> bool:
+    mode = settings.SERVER_TIMING
+    if mode == "all":
+        return True
+    if mode != "roles":
+        return False
+    role = (getattr(getattr(request, "user", None), "role", "") or "").lower()
+    return role in settings.SERVER_TIMING_ROLES
+
+
+# ── exposition ────────────────────────────────────────────────────────────────
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict, **extra) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in {**labels, **extra}.items())
+
+
+def render_prometheus(rows: list[dict]) -> str:
+    out = [
+        "# HELP lcr_http_request_duration_seconds Request wall time in the Django middleware stack.",
+        "# TYPE lcr_http_request_duration_seconds histogram",
+    ]
+
+    def histogram(name, labels, hist):
+        for bound, count in zip((*BUCKETS_S, "+Inf"), hist["buckets"]):
+            out.append(f"{name}_bucket{{{_labels(labels, le=bound)}}} {count}")
+        out.append(f"{name}_sum{{{_labels(labels)}}} {hist['sum']:.6f}")
+        out.append(f"{name}_count{{{_labels(labels)}}} {hist['buckets'][-1]}")
+
+    for row in rows:
+        histogram("lcr_http_request_duration_seconds", row["labels"], row["total"])
+    out += [
+        "# HELP lcr_http_request_phase_seconds Time per request spent in db, perm and serialize.",
+        "# TYPE lcr_http_request_phase_seconds histogram",
+    ]
+    for row in rows:
+        for phase in PHASES[1:]:
+            histogram("lcr_http_request_phase_seconds", {**row["labels"], "phase": phase}, row[phase])
+    out += [
+        "# HELP lcr_http_request_db_queries_total Database queries run by requests.",
+        "# TYPE lcr_http_request_db_queries_total counter",
+    ]
+    out += [f"lcr_http_request_db_queries_total{{{_labels(row['labels'])}}} {row['db_queries']}" for row in rows]
+    return "\n".join(out) + "\n"
+
+
+def metrics_view(request):
+    """
+    GET /api/metrics: Prometheus text format, for Bearer METRICS_TOKEN. Without
+    a token it's only served with DEBUG on: route names and their latency and
+    query profiles aren't public.
+    """
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=404)
+    if token:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render_prometheus(get_metrics_store().read()),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
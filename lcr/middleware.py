@@ -1,13 +1,97 @@
 # core/middleware.py
+import time
 import uuid
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from lcr import metrics
+from lcr.log import trace_id_var
+
+
 class RequestIdMiddleware:
+    # Native under both WSGI and ASGI, so async views don't get bounced through a sync thread
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        rid = self._tag(request)
+        token = trace_id_var.set(rid)  # stamped on every log record for this request
+        try:
+            response = self.get_response(request)
+        finally:
+            trace_id_var.reset(token)
+        response["X-Request-ID"] = rid
+        return response
+
+    async def __acall__(self, request):
+        rid = self._tag(request)
+        token = trace_id_var.set(rid)
+        try:
+            response = await self.get_response(request)
+        finally:
+            trace_id_var.reset(token)
+        response["X-Request-ID"] = rid
+        return response
+
+    @staticmethod
+    def _tag(request):
         rid = request.META.get("HTTP_X_REQUEST_ID") or str(uuid.uuid4())
         request.request_id = rid
-        response = self.get_response(request)
-        response["X-Request-ID"] = rid
+        return rid
+
+
+class MetricsMiddleware:
+    """
+    Times each request (lcr.metrics): db / perm / serialize / total, recorded
+    per route in the shared histograms and, when allowed, sent back as a
+    Server-Timing header. Not loaded at all when METRICS_ENABLED is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.instrument_connections()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics.instrument_connections()  # this thread's connection may predate the hook
+        timings, t0 = metrics.RequestTimings(), time.perf_counter()
+        token = metrics.current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_timings.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - t0)
+
+    async def __acall__(self, request):
+        timings, t0 = metrics.RequestTimings(), time.perf_counter()
+        token = metrics.current_timings.set(timings)  # copied into sync_to_async threads
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_timings.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - t0)
+
+    @staticmethod
+    def _finish(request, response, timings, total_s):
+        metrics.record_request(request, response.status_code, timings, total_s)
+        if metrics.server_timing_allowed(request):
+            response["Server-Timing"] = timings.server_timing(total_s)
         return response
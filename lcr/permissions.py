@@ -1,11 +1,37 @@
 # core/permissions.py
+from asgiref.sync import sync_to_async
 from rest_framework.permissions import BasePermission
 
+from lcr.metrics import timed
+
 def _claims(request):
     tok = getattr(request, "auth", None)
     # SimpleJWT returns a token (mapping-like). Prefer .payload if present.
     return getattr(tok, "payload", tok) or {}
 
+def token_scopes(request):
+    """Scopes granted by the verified token, or None when it carries no `scp` claim."""
+    scp = _claims(request).get("scp")
+    return None if scp is None else set(scp.split())
+
+def scope_or_perm(request, scope, *perms) -> bool:
+    """
+    Authorize from token scopes when present (no DB work); otherwise fall back
+    to Django model permissions (any of `perms`) for session/scopeless tokens.
+    """
+    scopes = token_scopes(request)
+    if scopes is not None:
+        return "*" in scopes or scope in scopes
+    with timed("perm"):
+        return any(request.user.has_perm(p) for p in perms)
+
+async def ascope_or_perm(request, scope, *perms) -> bool:
+    """scope_or_perm for async views; only the DB fallback leaves the event loop."""
+    scopes = token_scopes(request)
+    if scopes is not None:
+        return "*" in scopes or scope in scopes
+    return await sync_to_async(scope_or_perm)(request, scope, *perms)
+
 class HasAnyRole(BasePermission):
     ALLOWED = {"admin"}  # override per view
 
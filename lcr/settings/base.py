@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
 
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "lcr.middleware.MetricsMiddleware",  # outermost: its total covers the whole stack
     "django.middleware.security.SecurityMiddleware",
     # "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -100,24 +102,85 @@ else:
 
 # ── Cache ──────────────────────────────────────────────────────────────────────
 # Use Redis via CACHE_URL like: redis://:password@host:6379/1
+# No I/O here: lcr.cache.ResilientRedisCache connects on first use, shares one
+# pool per process, and serves from a local fallback while Redis is down
+# (state/counters via lcr.cache.cache_health()).
 CACHE_URL = os.getenv("CACHE_URL", "")
 if CACHE_URL:
-    try:
-        # Try to create a Redis cache configuration
-        CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
-        # Test the connection
-        import redis
-        from urllib.parse import urlparse
-        parsed = urlparse(CACHE_URL)
-        client = redis.Redis(host=parsed.hostname or 'localhost', port=parsed.port or 6379, db=parsed.path.lstrip('/') or 0)
-        client.ping()  # Test connection
-        print(f"✓ Redis cache connected at {CACHE_URL}")
-    except Exception as e:
-        print(f"⚠ Redis connection failed ({e}), falling back to local memory cache")
-        CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    CACHES = {
+        "default": {
+            "BACKEND": "lcr.cache.ResilientRedisCache",
+            "LOCATION": CACHE_URL,
+            "OPTIONS": {
+                "max_connections": int(os.getenv("CACHE_MAX_CONNECTIONS", "50")),
+                "socket_timeout": float(os.getenv("CACHE_SOCKET_TIMEOUT_S", "0.25")),
+                "socket_connect_timeout": float(os.getenv("CACHE_CONNECT_TIMEOUT_S", "0.25")),
+                "health_check_interval": 30,  # ping idle pooled connections before reuse
+            },
+            "PROBE_INTERVAL_S": float(os.getenv("CACHE_PROBE_INTERVAL_S", "5")),
+        }
+    }
 else:
     CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
+# Throttle counters (lcr.throttling): "redis" shares them across hosts; "file"
+# is an mmap'd table shared by the workers of one host (and Redis's fallback)
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "redis" if CACHE_URL else "file")
+THROTTLE_REDIS_URL = os.getenv("THROTTLE_REDIS_URL", CACHE_URL)
+THROTTLE_REDIS_TIMEOUT_S = float(os.getenv("THROTTLE_REDIS_TIMEOUT_S", "0.1"))
+THROTTLE_STATE_FILE = os.getenv("THROTTLE_STATE_FILE", os.path.join(tempfile.gettempdir(), "lcr-throttle.bin"))
+THROTTLE_FILE_SLOTS = int(os.getenv("THROTTLE_FILE_SLOTS", "65536"))  # 24 bytes each
+
+# GET /vehicles/ response cache (rental.services.catalogue_cache); entries are
+# also retired by the catalogue version bump on every Car/Booking write
+CATALOGUE_CACHE_TTL_S = int(os.getenv("CATALOGUE_CACHE_TTL_S", "300"))
+
+# ── Bookings ───────────────────────────────────────────────────────────────────
+# Per-car write serialization: auto | constraint | row | advisory | optimistic
+# (auto = PostgreSQL exclusion constraint when available, else row lock)
+BOOKING_LOCK_STRATEGY = os.getenv("BOOKING_LOCK_STRATEGY", "auto")
+BOOKING_LOCK_TIMEOUT_MS = int(os.getenv("BOOKING_LOCK_TIMEOUT_MS", "2000"))     # advisory: bounded wait
+BOOKING_OPTIMISTIC_ATTEMPTS = int(os.getenv("BOOKING_OPTIMISTIC_ATTEMPTS", "5"))  # optimistic: retries
+# async booking creates: transaction threads per worker, and max running + queued before 503
+BOOKING_WRITE_WORKERS = int(os.getenv("BOOKING_WRITE_WORKERS", "8"))
+BOOKING_WRITE_MAX_IN_FLIGHT = int(os.getenv("BOOKING_WRITE_MAX_IN_FLIGHT", "128"))
+# Idempotency-Key on POST /bookings/: how long outcomes are replayed, how long a
+# duplicate waits for the in-flight original, and when an unfinished claim is stale
+IDEMPOTENCY_TTL_S = int(os.getenv("IDEMPOTENCY_TTL_S", "86400"))
+IDEMPOTENCY_WAIT_S = float(os.getenv("IDEMPOTENCY_WAIT_S", "5"))
+IDEMPOTENCY_LOCK_TTL_S = int(os.getenv("IDEMPOTENCY_LOCK_TTL_S", "60"))
+
+# ── Payments ───────────────────────────────────────────────────────────────────
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "rental.payments.gateways.MockStripeGateway")
+# HTTP provider (rental.payments.http.HTTPDepositGateway)
+PAYMENT_API_BASE_URL = os.getenv("PAYMENT_API_BASE_URL", "http://localhost:12111")
+PAYMENT_API_KEY = os.getenv("PAYMENT_API_KEY", "")
+PAYMENT_CURRENCY = os.getenv("PAYMENT_CURRENCY", "pkr")
+PAYMENT_TIMEOUT_S = float(os.getenv("PAYMENT_TIMEOUT_S", "10"))
+PAYMENT_CONNECT_TIMEOUT_S = float(os.getenv("PAYMENT_CONNECT_TIMEOUT_S", "3"))
+PAYMENT_MAX_CONNECTIONS = int(os.getenv("PAYMENT_MAX_CONNECTIONS", "20"))
+PAYMENT_MAX_CONCURRENCY = int(os.getenv("PAYMENT_MAX_CONCURRENCY", "20"))
+PAYMENT_BREAKER_FAILURES = int(os.getenv("PAYMENT_BREAKER_FAILURES", "5"))
+PAYMENT_BREAKER_RESET_S = float(os.getenv("PAYMENT_BREAKER_RESET_S", "30"))
+# Deposit outbox worker (manage.py process_deposits)
+DEPOSIT_WORKER_BATCH_SIZE = int(os.getenv("DEPOSIT_WORKER_BATCH_SIZE", "100"))
+DEPOSIT_WORKER_CONCURRENCY = int(os.getenv("DEPOSIT_WORKER_CONCURRENCY", "8"))
+DEPOSIT_MAX_ATTEMPTS = int(os.getenv("DEPOSIT_MAX_ATTEMPTS", "5"))
+# GET /finance/summary: widest day range (reads PaymentDailyRollup only)
+FINANCE_SUMMARY_MAX_DAYS = int(os.getenv("FINANCE_SUMMARY_MAX_DAYS", "366"))
+
+# ── Analytics ──────────────────────────────────────────────────────────────────
+# GET /analytics/utilization (rental.services.utilization): car × hour matrices
+# cached per process (4 bytes per cell), kept current from a journal of booking
+# writes in the cache; a reader further behind than JOURNAL_MAX rebuilds, and
+# any matrix older than MATRIX_MAX_AGE_S does (the only refresh that sees other
+# workers' writes when the cache isn't shared, i.e. without CACHE_URL)
+ANALYTICS_MAX_RANGE_DAYS = int(os.getenv("ANALYTICS_MAX_RANGE_DAYS", "366"))
+ANALYTICS_CACHED_RANGES = int(os.getenv("ANALYTICS_CACHED_RANGES", "4"))
+ANALYTICS_JOURNAL_TTL_S = int(os.getenv("ANALYTICS_JOURNAL_TTL_S", "3600"))
+ANALYTICS_JOURNAL_MAX = int(os.getenv("ANALYTICS_JOURNAL_MAX", "1000"))
+ANALYTICS_MATRIX_MAX_AGE_S = int(os.getenv("ANALYTICS_MATRIX_MAX_AGE_S", "300"))
+
 # ── Static & Media ─────────────────────────────────────────────────────────────
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
@@ -154,26 +217,48 @@ TIME_ZONE = os.getenv("TZ", "UTC")
 USE_I18N = True
 USE_TZ = True
 
+# user id -> token_version map checked on every JWT request (accounts.authentication);
+# without CACHE_URL it's per worker, so other workers see a revocation only after this TTL
+TOKEN_VERSION_CACHE_TTL = int(os.getenv("TOKEN_VERSION_CACHE_TTL", "300"))
+# async login: PBKDF2/RS256 worker threads, and max logins running + queued before 503
+LOGIN_EXECUTOR_WORKERS = int(os.getenv("LOGIN_EXECUTOR_WORKERS", "4"))
+LOGIN_MAX_IN_FLIGHT = int(os.getenv("LOGIN_MAX_IN_FLIGHT", "64"))
+
+# Per-request timings (lcr.metrics): histograms shared by this host's workers in
+# an mmap'd file, scraped at /api/metrics with Bearer METRICS_TOKEN (no token: 404
+# unless DEBUG).
+# Server-Timing header: off | roles (users with a SERVER_TIMING_ROLES role) | all
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_STATE_FILE = os.getenv("METRICS_STATE_FILE", os.path.join(tempfile.gettempdir(), "lcr-metrics.bin"))
+METRICS_FILE_SLOTS = int(os.getenv("METRICS_FILE_SLOTS", "512"))  # (route, method, status class) rows
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "roles")
+SERVER_TIMING_ROLES = {r.strip() for r in os.getenv("SERVER_TIMING_ROLES", "admin,fleet_manager,support").split(",") if r.strip()}
+
 # ── Logging ────────────────────────────────────────────────────────────────────
+# Records are queued on the calling thread and written by a listener thread
+# (lcr.log.QueueingStreamHandler); every record carries the request's trace_id.
 LOG_LEVEL = os.getenv("DJANGO_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("DJANGO_LOG_FORMAT", "json")  # json | text
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped, not waited on
+# log each kind of 4xx (status, exception, view) at most once per interval; 0 logs every one
+LOG_4XX_SAMPLE_INTERVAL_S = float(os.getenv("LOG_4XX_SAMPLE_INTERVAL_S", "60"))
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
-        "standard": {"format": "[%(asctime)s] %(levelname)s %(name)s: %(message)s"},
-        "verbose": {
-            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}",
-            "style": "{",
-        },
-        "detailed": {
+        "json": {"()": "lcr.log.JsonFormatter"},
+        "text": {
+            "()": "lcr.log.TextFormatter",
             "format": "[%(asctime)s] %(levelname)s %(name)s [%(filename)s:%(lineno)d]: %(message)s",
         },
     },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler", 
-            "formatter": "detailed",
-            "level": "DEBUG"
+            "()": "lcr.log.QueueingStreamHandler",
+            "queue_size": LOG_QUEUE_SIZE,
+            "formatter": LOG_FORMAT,
+            "level": "DEBUG",
         },
     },
     "root": {"handlers": ["console"], "level": LOG_LEVEL},
@@ -193,11 +278,6 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
-        # Log all exceptions with full tracebacks
-        "": {
-            "handlers": ["console"],
-            "level": "ERROR",
-        },
     },
 }
 
@@ -206,27 +286,31 @@ LOGGING = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.StatelessJWTAuthentication",  # request.user from claims, no User query
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",  # default; open up per-view if needed
     ),
     "DEFAULT_RENDERER_CLASSES": (
-        "rest_framework.renderers.JSONRenderer",  # no browsable API
+        "lcr.metrics.TimedJSONRenderer",  # JSONRenderer, timed as "serialize"; no browsable API
     ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.ScopedRateThrottle",
+        # sliding-window counters shared by all workers (lcr.throttling)
+        "lcr.throttling.SlidingAnonRateThrottle",
+        "lcr.throttling.SlidingScopedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "60/min",       # generic anonymous burst control
-        "auth": "10/min",       # login/register scope
+        "anon": os.getenv("THROTTLE_RATE_ANON", "60/min"),   # generic anonymous burst control
+        "auth": os.getenv("THROTTLE_RATE_AUTH", "10/min"),   # login/register scope
     },
     "EXCEPTION_HANDLER": "lcr.exceptions.custom_exception_handler",
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS" : [
         "django_filters.rest_framework.DjangoFilterBackend"
-    ]
+    ],
+    # Keyset pagination (no OFFSET/COUNT) inside the standard envelope
+    "DEFAULT_PAGINATION_CLASS": "rental.pagination.EnvelopeCursorPagination",
+    "PAGE_SIZE": 50,
 }
 
 
@@ -289,6 +373,9 @@ SPECTACULAR_SETTINGS = {
 
 CORS_ALLOW_CREDENTIALS = False
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "https://your-frontend.example,").split(",")
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "Server-Timing"]
 CSRF_COOKIE_SECURE = True
 CSRF_COOKIE_SAMESITE = "Lax"    # or "Strict" if your UX allows
 CSRF_COOKIE_HTTPONLY = False    # JS must read csrftoken to echo in header
\ No newline at end of file
@@ -0,0 +1,218 @@
+# lcr/throttling.py
+"""
+Sliding-window rate limiting shared by every worker process.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per key in the
+Django cache (read, trim, write back: two round trips, O(rate) memory and a
+lost-update race between workers), and with LocMemCache each Gunicorn worker
+counts on its own, so the real limit is WEB_CONCURRENCY x the configured one.
+
+Here a key costs two integers: the hit count of the current fixed window and
+of the previous one. The sliding-window estimate is
+
+    previous * (1 - elapsed_fraction_of_current_window) + current
+
+and a check is one atomic read-modify-write:
+
+  * RedisWindowBackend: one EVALSHA of a small Lua script (all workers on all
+    hosts share the counters);
+  * FileWindowBackend: a fixed-size table in an mmap'd file under flock (all
+    workers on one host share it; for single-host deployments without Redis).
+
+If Redis is unreachable the check falls back to the local file backend, so
+limits degrade to per-host instead of failing open or taking login down.
+"""
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+
+def _wait_s(current: int, previous: int, limit: int, window_s: float, elapsed_s: float) -> float:
+    """Seconds until one more hit fits under the limit."""
+    remaining = window_s - elapsed_s
+    room = limit - 1 - current  # what this window can hold once the previous one's weight is gone
+    if room >= 0:
+        return max(0.0, remaining - room * window_s / previous) if previous else 0.0
+    # this window alone is over: wait for it to become the (decaying) previous one
+    return remaining + window_s * (1 - (limit - 1) / current)
+
+
+class WindowBackend:
+    def hit(self, key: str, limit: int, window_s: float) -> tuple[bool, float]:
+        """Count one request against `key` if allowed; (allowed, seconds to wait if not)."""
+        raise NotImplementedError
+
+
+_LUA_HIT = """
+local cur = tonumber(redis.call('GET', KEYS[1]) or '0')
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+if prev * tonumber(ARGV[2]) + cur + 1 > tonumber(ARGV[1]) then
+  return {0, cur, prev}
+end
+cur = redis.call('INCR', KEYS[1])
+if cur == 1 then redis.call('PEXPIRE', KEYS[1], ARGV[3]) end
+return {1, cur, prev}
+"""
+
+
+class RedisWindowBackend(WindowBackend):
+    def __init__(self, url: str, *, timeout_s: float = 0.1, prefix: str = "throttle"):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout_s, socket_connect_timeout=timeout_s)
+        self.script = self.client.register_script(_LUA_HIT)  # EVALSHA, re-loads on NOSCRIPT
+        self.prefix = prefix
+
+    def hit(self, key, limit, window_s):
+        now = time.time()
+        window = int(now // window_s)
+        elapsed = now - window * window_s
+        allowed, cur, prev = self.script(
+            keys=[f"{self.prefix}:{key}:{window}", f"{self.prefix}:{key}:{window - 1}"],
+            args=[limit, 1 - elapsed / window_s, int(window_s * 2000)],  # keep two windows
+        )
+        return bool(allowed), 0.0 if allowed else _wait_s(cur, prev, limit, window_s, elapsed)
+
+
+class FileWindowBackend(WindowBackend):
+    """
+    Fixed-size open-addressing table in a shared file: `slots` entries of
+    (key hash, window number, current count, previous count), 24 bytes each.
+    A key probes PROBE consecutive slots; when they're all live, the home slot
+    is overwritten (that key's count restarts), so memory never grows.
+    """
+    SLOT = struct.Struct("<QqII")
+    PROBE = 8
+
+    def __init__(self, path: str, *, slots: int = 65536):
+        self.path = path
+        self.slots = slots
+        size = slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._thread_lock = threading.Lock()  # flock doesn't exclude threads sharing the fd
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    def hit(self, key, limit, window_s):
+        now = time.time()
+        window = int(now // window_s)
+        elapsed = now - window * window_s
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") | 1  # 0 = empty
+        home = h % self.slots
+
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, cur, prev = self._find(h, home, window)
+                if prev * (1 - elapsed / window_s) + cur + 1 > limit:
+                    return False, _wait_s(cur, prev, limit, window_s, elapsed)
+                self.SLOT.pack_into(self._map, offset, h, window, cur + 1, prev)
+                return True, 0.0
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, h, home, window):
+        """(slot offset, current, previous) for hash `h`, counts rolled to `window`."""
+        free = None
+        for i in range(self.PROBE):
+            offset = ((home + i) % self.slots) * self.SLOT.size
+            slot_hash, slot_window, cur, prev = self.SLOT.unpack_from(self._map, offset)
+            if slot_hash == h:
+                if slot_window == window:
+                    return offset, cur, prev
+                return offset, 0, cur if slot_window == window - 1 else 0
+            if free is None and (slot_hash == 0 or slot_window < window - 1):
+                free = offset
+        return (free if free is not None else home * self.SLOT.size), 0, 0
+
+
+_backend = None
+_fallback = None
+_backend_lock = threading.RLock()
+_last_warning = 0.0
+
+
+def _local_backend() -> FileWindowBackend:
+    global _fallback
+    with _backend_lock:
+        if _fallback is None:
+            _fallback = FileWindowBackend(settings.THROTTLE_STATE_FILE, slots=settings.THROTTLE_FILE_SLOTS)
+        return _fallback
+
+
+def get_throttle_backend() -> WindowBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.THROTTLE_BACKEND == "redis":
+                    _backend = RedisWindowBackend(settings.THROTTLE_REDIS_URL, timeout_s=settings.THROTTLE_REDIS_TIMEOUT_S)
+                else:
+                    _backend = _local_backend()
+    return _backend
+
+
+def reset_throttle_backend():
+    """Drop the process's backends (settings changed, tests)."""
+    global _backend, _fallback
+    with _backend_lock:
+        if _fallback is not None:
+            _fallback.close()
+        _backend = _fallback = None
+
+
+def throttle_hit(key: str, limit: int, window_s: float) -> tuple[bool, float]:
+    global _last_warning
+    backend = get_throttle_backend()
+    try:
+        return backend.hit(key, limit, window_s)
+    except Exception as exc:
+        if isinstance(backend, FileWindowBackend):
+            raise
+        if time.monotonic() - _last_warning > 60:  # once a minute, not once a request
+            _last_warning = time.monotonic()
+            logger.warning("throttle backend unavailable (%s); counting on this host only", exc)
+        return _local_backend().hit(key, limit, window_s)
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle with its history list replaced by throttle_hit()."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self._wait = throttle_hit(self.key, self.num_requests, self.duration)
+        return allowed
+
+    def wait(self):
+        return getattr(self, "_wait", None)
+
+
+# Drop-in replacements for DRF's classes (same scopes, rates and cache keys)
+class SlidingAnonRateThrottle(AnonRateThrottle, SlidingWindowRateThrottle):
+    pass
+
+
+class SlidingUserRateThrottle(UserRateThrottle, SlidingWindowRateThrottle):
+    pass
+
+
+class SlidingScopedRateThrottle(ScopedRateThrottle, SlidingWindowRateThrottle):
+    pass
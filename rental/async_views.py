@@ -0,0 +1,160 @@
+# rental/async_views.py
+"""
+Native async twins of the list/create endpoints, for the uvicorn workers:
+
+  GET/POST /api/v1/async/vehicles/
+  GET/POST /api/v1/async/bookings/
+
+Same stateless JWT auth, scope-first permissions, querysets, keyset pagination
+and envelopes as VehicleViewSet/BookingViewSet. Reads go through the async ORM,
+so one worker interleaves many requests instead of parking each one on
+asgiref's thread-sensitive executor. The vehicle list shares the versioned
+catalogue cache and ETags with the sync list (rental.services.catalogue_cache);
+only its cache reads and writes hop to a thread. Booking creates, Idempotency-Key store
+included (rental.services.idempotency), run on a bounded thread pool
+(BOOKING_WRITE_EXECUTOR) that keeps each transaction on one connection.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views import View
+from django_filters.utils import translate_validation
+from rest_framework import status
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated, PermissionDenied
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+
+from accounts.authentication import StatelessJWTAuthentication
+from lcr.exceptions import custom_exception_handler
+from lcr.executors import Overloaded
+from lcr.permissions import ascope_or_perm
+from rental.filters import BookingFilter
+from rental.models import Car
+from rental.pagination import BookingCursorPagination, EnvelopeCursorPagination
+from rental.permissions import CAR_WRITE_PERMS
+from rental.serializers import BookingListSerializer, BookingSerializer, CarSerializer
+from rental.services.booking_service import BOOKING_WRITE_EXECUTOR, BookingService
+from rental.services.catalogue_cache import CATALOGUE_CACHE_STATS
+from rental.services.idempotency import idempotent
+from rental.views import bookings_for, catalogue_entry, conditional, envelope, vehicles_for, wants_active
+
+
+class WriteCapacityExhausted(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Write capacity exhausted. Retry shortly."
+    default_code = "overloaded"
+
+
+class AsyncEnvelopeView(View):
+    """Authenticate, dispatch to an async handler, render envelopes (errors via lcr.exceptions)."""
+    pagination_class = EnvelopeCursorPagination
+    authenticator = StatelessJWTAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        req = Request(request, parsers=[JSONParser()], authenticators=[])
+        try:
+            authed = await self.authenticator.aauthenticate(req)
+            if authed is None:
+                raise NotAuthenticated()
+            req.user, req.auth = authed
+            method = request.method.lower()
+            if method not in self.http_method_names or not hasattr(self, method):
+                raise MethodNotAllowed(request.method)
+            return await getattr(self, method)(req, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(req, exc)
+
+    def handle_exception(self, request, exc):
+        resp = custom_exception_handler(exc, {"request": request, "view": self})
+        out = JsonResponse(resp.data, status=resp.status_code)
+        for header, value in resp.items():
+            if header.lower() != "content-type":
+                out[header] = value
+        if isinstance(exc, APIException) and getattr(exc, "wait", None):
+            out["Retry-After"] = str(int(exc.wait))
+        return out
+
+    def envelope(self, request, data, code=status.HTTP_200_OK):
+        return JsonResponse({"success": True, "data": data, "error": None,
+                             "trace_id": getattr(request, "request_id", None)}, status=code)
+
+    async def paginated(self, request, queryset, serializer_class):
+        return self.envelope(request, await self.page_data(request, queryset, serializer_class))
+
+    async def page_data(self, request, queryset, serializer_class):
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        if page is None:
+            return {"items": serializer_class([r async for r in queryset], many=True).data}
+        return paginator.get_envelope_data(serializer_class(page, many=True).data)
+
+
+class AsyncVehicleListView(AsyncEnvelopeView):
+    http_method_names = ["get", "post"]
+
+    async def get(self, request):
+        is_writer = await ascope_or_perm(request, "car:write", *CAR_WRITE_PERMS)
+        qs = vehicles_for(request.user, request.query_params, is_writer=is_writer)
+        if not is_writer and wants_active(request.query_params):
+            # ?active= follows the clock: never cached or ETagged (as on the sync list)
+            response = await self.paginated(request, qs, CarSerializer)
+            response["Cache-Control"] = "private, no-store"
+            response["X-Cache"] = "BYPASS"
+            return response
+        entry = await sync_to_async(catalogue_entry)(request, is_writer=is_writer)
+        if entry.matches(request.headers.get("If-None-Match")):
+            CATALOGUE_CACHE_STATS.record("not_modified")
+            return conditional(HttpResponseNotModified(), entry, "REVALIDATED")
+
+        data, outcome = await sync_to_async(entry.get)(), "HIT"
+        if data is None:
+            data, outcome = await self.page_data(request, qs, CarSerializer), "MISS"
+            await sync_to_async(entry.set)(data)
+        return conditional(self.envelope(request, data), entry, outcome)
+
+    async def post(self, request):
+        if not await ascope_or_perm(request, "car:write", "rental.add_car"):
+            raise PermissionDenied()
+        s = CarSerializer(data=request.data)
+        await sync_to_async(s.is_valid)(raise_exception=True)  # plate_no uniqueness is a query
+        car = await Car.objects.acreate(**s.validated_data)
+        return self.envelope(request, CarSerializer(car).data, code=status.HTTP_201_CREATED)
+
+
+class AsyncBookingListView(AsyncEnvelopeView):
+    """Ordering is fixed to (-start, id); BookingFilter params as on the sync list."""
+    http_method_names = ["get", "post"]
+    pagination_class = BookingCursorPagination
+
+    async def get(self, request):
+        if not await ascope_or_perm(request, "booking:read", "rental.view_booking"):
+            raise PermissionDenied()
+        filterset = BookingFilter(request.query_params, queryset=bookings_for(request.user), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        qs = filterset.qs.values(*BookingListSerializer.columns)
+        return await self.paginated(request, qs, BookingListSerializer)
+
+    async def post(self, request):
+        if not await ascope_or_perm(request, "booking:create", "rental.add_booking"):
+            raise PermissionDenied()
+        try:
+            # The Idempotency-Key claim, the booking transaction and the stored
+            # outcome all block: run them together on one write-pool thread
+            response = await BOOKING_WRITE_EXECUTOR.run(idempotent, request, lambda: self._create(request))
+        except Overloaded:
+            raise WriteCapacityExhausted()
+        out = JsonResponse(response.data, status=response.status_code)
+        for header, value in response.items():
+            if header.lower() != "content-type":
+                out[header] = value
+        return out
+
+    @staticmethod
+    def _create(request):
+        s = BookingSerializer(data=request.data, context={"request": request})
+        s.is_valid(raise_exception=True)
+        booking = BookingService().create_booking(
+            user=request.user, car=s.validated_data["car"],
+            start=s.validated_data["start"], end=s.validated_data["end"], deposit_cents=10000,
+        )
+        return envelope(request, data=BookingSerializer(booking).data, code=status.HTTP_201_CREATED)
@@ -11,3 +11,10 @@ class BookingFilter(django_filters.FilterSet):
     class Meta:
         model = Booking
         fields = ["from_", "to", "status", "car"]
+
+    def __init__(self, data=None, *args, **kwargs):
+        # `from` is a Python keyword, so the filter is declared as `from_`; accept both spellings
+        if data is not None and "from" in data and "from_" not in data:
+            data = data.copy()
+            data["from_"] = data["from"]
+        super().__init__(data, *args, **kwargs)
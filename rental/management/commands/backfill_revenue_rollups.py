@@ -0,0 +1,44 @@
+# rental/management/commands/backfill_revenue_rollups.py
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rental.services.revenue import iter_chunks, payment_day_range, rebuild_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily revenue rollups from Payment rows, --chunk-days local days per transaction. "
+        "Payments written to a chunk while it's rebuilt can be missed; run with the deposit worker "
+        "stopped, or re-run for the days it touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="first day (default: first payment)")
+        parser.add_argument("--end", type=date.fromisoformat, help="day after the last (default: after the last payment)")
+        parser.add_argument("--chunk-days", type=int, default=31)
+
+    def handle(self, *args, **opts):
+        start, end = opts["start"], opts["end"]
+        if start is None or end is None:
+            bounds = payment_day_range()
+            if bounds is None:
+                self.stdout.write("No payments; nothing to rebuild")
+                return
+            start = start or bounds[0]
+            end = end or bounds[1] + timedelta(days=1)
+        if start >= end:
+            raise CommandError("--start must be before --end")
+        if opts["chunk_days"] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        t0, total = time.perf_counter(), 0
+        for lo, hi in iter_chunks(start, end, opts["chunk_days"]):
+            rows = rebuild_days(lo, hi)
+            total += rows
+            if opts["verbosity"] >= 2:
+                self.stdout.write(f"  {lo}..{hi}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {total} rollup rows for {start}..{end} in {time.perf_counter() - t0:.1f}s"
+        ))
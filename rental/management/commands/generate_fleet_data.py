@@ -0,0 +1,263 @@
+# rental/management/commands/generate_fleet_data.py
+"""
+Synthetic users, cars, bookings and payments at performance-test volume.
+
+Rows go in with bulk_create, or COPY on PostgreSQL, so nothing runs per row:
+  * users share one precomputed password hash, and their role groups are
+    attached through the membership table in bulk (no sync_role_group());
+  * each car's bookings are laid end to end (a gap, then a rental), so they
+    never overlap and prevent_overlap_pre_save has nothing to check. On
+    PostgreSQL the booking_no_overlap constraint still checks every row;
+  * revenue rollups are rebuilt once for the days the payments fall on;
+  * the vehicle catalogue cache and utilization matrices are invalidated
+    once, at the end.
+
+The data is a function of --seed and --anchor: each car draws from its own
+Random(seed, car), so --batch-size and --method don't change what's written.
+Rows are marked by the GEN- plate and gen- username prefixes; --clear deletes
+them, and whatever hangs off them, first.
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import ROLE_TO_GROUP, Roles
+from accounts.roles import sync_role_permissions
+from rental.models import Booking, Car, DepositOutbox, Payment
+from rental.services.catalogue_cache import bump_catalogue_version
+from rental.services.revenue import payment_day_range, rebuild_range
+from rental.services.utilization import note_fleet_change
+
+CAR_PREFIX = "GEN-"
+USER_PREFIX = "gen-"
+STAFF_ROLES = (Roles.FLEET_MANAGER, Roles.SUPPORT, Roles.FINANCE)
+FLEET = {
+    "Toyota": ("Corolla", "Yaris", "Camry", "Fortuner", "Hilux"),
+    "Honda": ("Civic", "City", "BR-V", "HR-V"),
+    "Suzuki": ("Alto", "Cultus", "Swift", "Wagon R"),
+    "Hyundai": ("Elantra", "Tucson", "Sonata"),
+    "Kia": ("Sportage", "Picanto", "Sorento"),
+}
+RENTAL_HOURS = (4, 8, 12, 24, 24, 48, 72, 168)
+
+
+def car_bookings(seed: int, index: int, first_start: datetime, count: int, anchor: datetime):
+    """
+    (start, end, status, amount_cents or None) for car `index`, in time order.
+    Windows touch at most (end == next start), so none overlap.
+    """
+    rng = random.Random(f"{seed}:car:{index}")
+    rate_cents = rng.randrange(500, 3001, 50) * 100  # per hour
+    start = first_start + timedelta(hours=rng.randrange(24))
+    for _ in range(count):
+        start += timedelta(hours=int(rng.expovariate(1 / 24)))  # idle gap, mean a day
+        hours = rng.choice(RENTAL_HOURS)
+        end = start + timedelta(hours=hours)
+        roll = rng.random()
+        if end <= anchor:
+            status = "cancelled" if roll < 0.08 else "completed"
+        elif start < anchor:
+            status = "confirmed"
+        else:
+            status = "cancelled" if roll < 0.1 else "pending" if roll < 0.3 else "confirmed"
+        # Paid when confirmed or done; some cancellations were paid, then refunded
+        if status in ("completed", "confirmed") or (status == "cancelled" and roll < 0.04):
+            amount = rate_cents * hours
+        else:
+            amount = None
+        yield start, end, status, amount
+        start = end
+
+
+def payment_status(status: str) -> str:
+    return "refunded" if status == "cancelled" else "succeeded"
+
+
+def clear_generated() -> int:
+    """Delete generated rows and their dependents; returns bookings deleted."""
+    User = get_user_model()
+    cars = Car.objects.filter(plate_no__startswith=CAR_PREFIX)
+    bookings = Booking.objects.filter(Q(car__in=cars) | Q(customer__username__startswith=USER_PREFIX))
+    with transaction.atomic():
+        payments = Payment.objects.filter(booking__in=bookings)
+        paid_days = payment_day_range(payments)
+        payments._raw_delete(payments.db)  # per-row signals would each adjust the rollups
+        DepositOutbox.objects.filter(booking__in=bookings).delete()
+        # Raw deletes: the post_delete receivers would load every row; the cache is bumped once below
+        deleted = bookings._raw_delete(bookings.db)
+        cars._raw_delete(cars.db)
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        if paid_days:
+            rebuild_range(*paid_days)
+    bump_catalogue_version()
+    note_fleet_change()
+    return deleted
+
+
+class BulkWriter:
+    """bulk_create; needs a backend that returns ids from a bulk insert."""
+
+    def __init__(self, batch_size: int):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(f"{connection.vendor} doesn't return ids from bulk inserts; use --method copy")
+        self.batch_size = batch_size
+
+    def bookings(self, rows) -> list[int]:
+        objs = [Booking(car_id=car, customer_id=customer, start=start, end=end, status=status)
+                for car, customer, start, end, status in rows]
+        return [b.pk for b in Booking.objects.bulk_create(objs, batch_size=self.batch_size)]
+
+    def payments(self, rows):
+        Payment.objects.bulk_create(
+            [Payment(booking_id=booking, amount_cents=amount, status=status, created_at=created_at)
+             for booking, amount, status, created_at in rows],
+            batch_size=self.batch_size,
+        )
+
+
+class CopyWriter:
+    """COPY ... FROM STDIN (psycopg 3), with booking ids drawn from the sequence up front."""
+
+    def __init__(self, batch_size: int):
+        if connection.vendor != "postgresql":
+            raise CommandError("--method copy needs PostgreSQL")
+
+    def _copy(self, model, columns, rows):
+        qn = connection.ops.quote_name
+        sql = f"COPY {qn(model._meta.db_table)} ({', '.join(map(qn, columns))}) FROM STDIN"
+        with connection.cursor() as cursor, cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+    def bookings(self, rows) -> list[int]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [Booking._meta.db_table, len(rows)],
+            )
+            ids = [r[0] for r in cursor.fetchall()]
+        self._copy(Booking, ("id", "car_id", "customer_id", "start", "end", "status"),
+                   ((pk, *row) for pk, row in zip(ids, rows)))
+        return ids
+
+    def payments(self, rows):
+        self._copy(Payment, ("booking_id", "amount_cents", "status", "created_at"), rows)
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, cars, bookings and payments (deterministic from --seed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cars", type=int, default=100)
+        parser.add_argument("--users", type=int, default=1000, help="customers")
+        parser.add_argument("--staff", type=int, default=2, help="users per staff role (fleet_manager, support, finance)")
+        parser.add_argument("--bookings-per-car", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--anchor", help="ISO date splitting past from upcoming bookings (default: today, UTC)")
+        parser.add_argument("--history-days", type=int, default=365, help="first bookings start this long before --anchor")
+        parser.add_argument("--password", default="fleet-data", help="password for every generated user")
+        parser.add_argument("--batch-size", type=int, default=5000, help="bookings per transaction")
+        parser.add_argument("--method", choices=["auto", "bulk", "copy"], default="auto",
+                            help="auto: COPY on PostgreSQL, bulk_create elsewhere")
+        parser.add_argument("--clear", action="store_true", help="delete previously generated data first")
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        anchor = self._anchor(opts["anchor"])
+        first_start = anchor - timedelta(days=opts["history_days"])
+        method = opts["method"]
+        if method == "auto":
+            method = "copy" if connection.vendor == "postgresql" else "bulk"
+        writer = (CopyWriter if method == "copy" else BulkWriter)(opts["batch_size"])
+        t0 = time.perf_counter()
+
+        if opts["clear"]:
+            self.stdout.write(f"Cleared {clear_generated()} generated bookings")
+        if User.objects.filter(username__startswith=USER_PREFIX).exists() or \
+                Car.objects.filter(plate_no__startswith=CAR_PREFIX).exists():
+            raise CommandError("Generated data already exists; re-run with --clear")
+
+        customer_ids = self._users(opts["users"], opts["staff"], opts["password"], opts["batch_size"])
+        car_ids = self._cars(opts["cars"], opts["seed"], opts["batch_size"])
+
+        rng = random.Random(f"{opts['seed']}:customers")
+        pending, booked, paid = [], 0, 0
+        for index, car_id in enumerate(car_ids):
+            for start, end, status, amount in car_bookings(
+                    opts["seed"], index, first_start, opts["bookings_per_car"], anchor):
+                pending.append((car_id, customer_ids[rng.randrange(len(customer_ids))], start, end, status, amount))
+            if len(pending) >= opts["batch_size"] or index == len(car_ids) - 1:
+                paid += self._flush(writer, pending)
+                booked += len(pending)
+                pending = []
+                if opts["verbosity"] >= 2:
+                    self.stdout.write(f"  {booked} bookings ({index + 1}/{len(car_ids)} cars)")
+
+        if paid:
+            paid_days = payment_day_range(Payment.objects.filter(booking__car_id__in=car_ids))
+            rebuild_range(*paid_days)  # bulk writes skip the Payment signals too
+        bump_catalogue_version()  # bulk writes skip the Car/Booking signals
+        note_fleet_change()
+        elapsed = time.perf_counter() - t0
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(customer_ids)} customers, {len(car_ids)} cars, {booked} bookings, "
+            f"{paid} payments via {method} in {elapsed:.1f}s ({booked / max(elapsed, 1e-9):.0f} bookings/s)"
+        ))
+
+    def _anchor(self, value) -> datetime:
+        if not value:
+            now = datetime.now(dt_timezone.utc)
+            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            anchor = datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise CommandError(f"--anchor: {exc}") from exc
+        return anchor if anchor.tzinfo else anchor.replace(tzinfo=dt_timezone.utc)
+
+    def _users(self, customers: int, staff: int, password: str, batch_size: int) -> list[int]:
+        """Create users with one shared hash; returns customer ids."""
+        User = get_user_model()
+        sync_role_permissions()  # role groups must exist before memberships are attached
+        groups = dict(Group.objects.filter(name__in=ROLE_TO_GROUP.values()).values_list("name", "id"))
+        hashed = make_password(password)
+        specs = [(f"{USER_PREFIX}{i:07d}", Roles.CUSTOMER) for i in range(customers)]
+        specs += [(f"{USER_PREFIX}{role}-{i}", role) for role in STAFF_ROLES for i in range(staff)]
+
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=name, email=f"{name}@example.com", password=hashed, role=role,
+                     is_staff=role != Roles.CUSTOMER)
+                for name, role in specs
+            ], batch_size=batch_size)
+            through = User.groups.through
+            through.objects.bulk_create(
+                [through(user_id=u.pk, group_id=groups[ROLE_TO_GROUP[u.role]]) for u in users],
+                batch_size=batch_size,
+            )
+        return [u.pk for u in users if u.role == Roles.CUSTOMER]
+
+    def _cars(self, count: int, seed: int, batch_size: int) -> list[int]:
+        rng = random.Random(f"{seed}:cars")
+        makes = sorted(FLEET)
+        cars = []
+        for i in range(count):
+            make = rng.choice(makes)
+            cars.append(Car(plate_no=f"{CAR_PREFIX}{i:07d}", make=make, model=rng.choice(FLEET[make]),
+                            year=rng.randint(2015, 2025)))
+        return [c.pk for c in Car.objects.bulk_create(cars, batch_size=batch_size)]
+
+    def _flush(self, writer, rows) -> int:
+        with transaction.atomic():
+            ids = writer.bookings([row[:5] for row in rows])
+            # Paid when booked: dated by the booking's start
+            payments = [(pk, row[5], payment_status(row[4]), row[2]) for pk, row in zip(ids, rows) if row[5] is not None]
+            if payments:
+                writer.payments(payments)
+        return len(payments)
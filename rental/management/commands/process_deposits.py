@@ -0,0 +1,60 @@
+# rental/management/commands/process_deposits.py
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from rental.services.deposits import BatchReport, DepositWorker
+
+
+class Command(BaseCommand):
+    help = "Deliver booking deposits from the outbox to the payment gateway"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.DEPOSIT_WORKER_BATCH_SIZE)
+        parser.add_argument("--concurrency", type=int, default=settings.DEPOSIT_WORKER_CONCURRENCY,
+                            help="gateway calls in flight per batch (async gateways use PAYMENT_MAX_CONCURRENCY)")
+        parser.add_argument("--max-attempts", type=int, default=settings.DEPOSIT_MAX_ATTEMPTS)
+        parser.add_argument("--lease", type=float, default=60.0, help="seconds a claimed row stays hidden")
+        parser.add_argument("--idle-sleep", type=float, default=1.0, help="seconds to wait when the outbox is empty")
+        parser.add_argument("--once", action="store_true", help="drain what is due now, then exit")
+
+    def handle(self, *args, **opts):
+        worker = DepositWorker(batch_size=opts["batch_size"], concurrency=opts["concurrency"],
+                               max_attempts=opts["max_attempts"], lease_s=opts["lease"])
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True  # finish the current batch, then exit
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        total = BatchReport()
+        try:
+            while not stopping:
+                close_old_connections()
+                report = worker.run_once()
+                total.merge(report)
+                if report.claimed:
+                    self.stdout.write(
+                        f"claimed={report.claimed} succeeded={report.succeeded} declined={report.declined} "
+                        f"retried={report.retried} gave_up={report.gave_up} "
+                        f"deferred={report.deferred} lease_lost={report.lease_lost}"
+                    )
+                    for error in report.errors[:5]:
+                        self.stderr.write(f"  {error}")
+                elif opts["once"]:
+                    break
+                else:
+                    time.sleep(opts["idle_sleep"])
+        finally:
+            worker.close()  # releases an async gateway's connection pool
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: succeeded={total.succeeded} declined={total.declined} "
+            f"retried={total.retried} gave_up={total.gave_up} deferred={total.deferred}"
+        ))
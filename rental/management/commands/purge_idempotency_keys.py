@@ -0,0 +1,17 @@
+# rental/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand, CommandError
+
+from rental.services.idempotency import IdempotencyStore
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than IDEMPOTENCY_TTL_S (they are never replayed again)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="rows deleted per statement")
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        deleted = IdempotencyStore().purge_expired(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency records"))
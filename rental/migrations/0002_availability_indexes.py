@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:19
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=['car', 'start', 'end'], name='booking_car_active_win_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(django.db.models.functions.text.Lower('make'), name='car_make_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# PostgreSQL-only: enforce "no overlapping active bookings per car" in the database.
+#
+# Adds a stored tstzrange column derived from [start, end) and a GiST exclusion
+# constraint over (car_id =, period &&) for active statuses. Other backends are
+# left untouched and rely on rental.services.overlap.has_overlap().
+#
+# NOTE: the constraint cannot be created while overlapping active bookings
+# exist; resolve them (e.g. cancel duplicates) before migrating.
+
+from django.db import migrations
+
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE rental_booking
+        ADD COLUMN period tstzrange
+        GENERATED ALWAYS AS (tstzrange("start", "end", '[)')) STORED
+    """,
+    """
+    ALTER TABLE rental_booking
+        ADD CONSTRAINT booking_no_overlap
+        EXCLUDE USING gist (car_id WITH =, period WITH &&)
+        WHERE (status IN ('pending', 'confirmed'))
+    """,
+]
+
+BACKWARD_SQL = [
+    "ALTER TABLE rental_booking DROP CONSTRAINT IF EXISTS booking_no_overlap",
+    "ALTER TABLE rental_booking DROP COLUMN IF EXISTS period",
+]
+
+
+def _run(statements):
+    def op(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return op
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0002_availability_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# PostgreSQL-only: trigram GIN indexes for the vehicle list's make/model
+# `icontains` filters, which Django renders as UPPER(col::text) LIKE UPPER(%s).
+# A btree can't serve a leading-wildcard LIKE; pg_trgm can.
+TRGM_FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS car_make_trgm_idx ON rental_car USING gin (UPPER(make::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS car_model_trgm_idx ON rental_car USING gin (UPPER(model::text) gin_trgm_ops)",
+]
+
+TRGM_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS car_make_trgm_idx",
+    "DROP INDEX IF EXISTS car_model_trgm_idx",
+]
+
+
+def _run(statements):
+    def op(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return op
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0004_car_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', '-start', 'id'], name='booking_customer_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-start', 'id'], name='booking_start_id_idx'),
+        ),
+        # Drop the plain FK index only once booking_customer_start_idx covers it
+        migrations.AlterField(
+            model_name='booking',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(_run(TRGM_FORWARD_SQL), _run(TRGM_BACKWARD_SQL)),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0007_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('make', models.CharField(max_length=64)),
+                ('gross_cents', models.BigIntegerField(default=0)),
+                ('succeeded_count', models.IntegerField(default=0)),
+                ('failed_cents', models.BigIntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('refunded_cents', models.BigIntegerField(default=0)),
+                ('refunded_count', models.IntegerField(default=0)),
+            ],
+        ),
+        # Existing rows stay NULL (their real time is unknown), new rows get now()
+        migrations.AddField(
+            model_name='payment',
+            name='created_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payment_created_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'make'), name='payment_rollup_day_make_uniq'),
+        ),
+    ]
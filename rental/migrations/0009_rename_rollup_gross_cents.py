@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0008_payment_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='paymentdailyrollup',
+            old_name='gross_cents',
+            new_name='succeeded_cents',
+        ),
+    ]
@@ -1,6 +1,9 @@
 # rental/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.conf import settings
+from django.utils import timezone
 
 from django.contrib.auth import get_user_model
 
@@ -18,24 +21,120 @@ class Car(models.Model):
     model = models.CharField(max_length=64)
     year = models.PositiveIntegerField()
     status = models.CharField(max_length=16, choices=STATUS, default="available")
+    # Bumped by the optimistic booking lock strategy (rental.services.locks)
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         permissions = [
             ("view_maintenance", "Can view maintenance details"),
             ("edit_status", "Can change car status"),
         ]
+        indexes = [
+            models.Index(Lower("make"), name="car_make_lower_idx"),
+        ]
 
 class Booking(models.Model):
-    customer = models.ForeignKey(User, on_delete=models.CASCADE)
+    # FK index dropped: booking_customer_start_idx leads with customer_id
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     car = models.ForeignKey(Car, on_delete=models.PROTECT)
     start = models.DateTimeField()
     end = models.DateTimeField()
     status = models.CharField(max_length=16, default="pending")
 
+    class Meta:
+        indexes = [
+            # Overlap probes / availability anti-join only ever look at blocking bookings
+            models.Index(
+                fields=["car", "start", "end"],
+                condition=Q(status__in=["pending", "confirmed"]),
+                name="booking_car_active_win_idx",
+            ),
+            # Customer list: WHERE customer_id = ? ORDER BY start DESC, id (keyset)
+            models.Index(fields=["customer", "-start", "id"], name="booking_customer_start_idx"),
+            # Staff list / export: ORDER BY start DESC, id (keyset)
+            models.Index(fields=["-start", "id"], name="booking_start_id_idx"),
+        ]
+
 class Payment(models.Model):
     booking = models.OneToOneField(Booking, on_delete=models.CASCADE)
     amount_cents = models.PositiveIntegerField()
     status = models.CharField(max_length=16, choices=[("succeeded","Succeeded"),("failed","Failed"),("refunded","Refunded")])
+    # Null only for rows older than this column; rollups date those by booking start
+    created_at = models.DateTimeField(default=timezone.now, null=True)
+
+    class Meta:
+        indexes = [
+            # Rollup backfill walks payments by day (manage.py backfill_revenue_rollups)
+            models.Index(fields=["created_at"], name="payment_created_at_idx"),
+        ]
+
+    # The revenue rollup signals (rental.signals) write in the same transaction
+    # as the row, in autocommit too
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+class PaymentDailyRollup(models.Model):
+    """
+    Payment totals per local day and car make, kept current by
+    rental.services.revenue as payments are written; read by /finance/summary.
+    """
+    day = models.DateField()
+    make = models.CharField(max_length=64)
+    succeeded_cents = models.BigIntegerField(default=0)  # refunds move out to refunded_cents
+    succeeded_count = models.IntegerField(default=0)
+    failed_cents = models.BigIntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    refunded_cents = models.BigIntegerField(default=0)
+    refunded_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "make"], name="payment_rollup_day_make_uniq")]
+
+class DepositOutbox(models.Model):
+    """
+    Deposit request written in the booking's transaction; delivered to the
+    payment gateway later by `manage.py process_deposits`.
+    A claimed row is hidden until `available_at` (lease / retry backoff).
+    """
+    STATUS = [("pending", "Pending"), ("done", "Done"), ("failed", "Failed")]
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name="deposit_outbox")
+    amount_cents = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=STATUS, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim query: WHERE status = 'pending' AND available_at <= now ORDER BY available_at, id
+            models.Index(fields=["available_at", "id"], condition=Q(status="pending"), name="outbox_pending_idx"),
+        ]
+
+class IdempotencyRecord(models.Model):
+    """
+    Outcome of a POST made with an Idempotency-Key (rental.services.idempotency).
+    Claimed as "in_progress" before the handler runs; marked "done" with the
+    response in the handler's own transaction, so it commits with the booking.
+    """
+    STATUS = [("in_progress", "In progress"), ("done", "Done")]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+    status = models.CharField(max_length=16, choices=STATUS, default="in_progress")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    locked_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "key"], name="idempotency_user_key_uniq")]
 
 class Document(models.Model):
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
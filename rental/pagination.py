@@ -0,0 +1,151 @@
+# rental/pagination.py
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class EnvelopeCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination that renders into the standard
+    {"success", "data", "error", "trace_id"} envelope.
+
+    Unlike DRF's CursorPagination (first ordering field + OFFSET for ties), the
+    cursor carries the full sort key of the boundary row, and the next page is a
+    row-value comparison over every ordering field, e.g. for ("-start", "id"):
+        start < s OR (start = s AND id > i)
+    No OFFSET scans and no COUNT(*): each page is a single indexed range read.
+    """
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200  # server-side cap, whatever the client asks for
+    unique_field = "id"  # appended to the ordering when missing so the key is total
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if self.unique_field not in {f.lstrip("-") for f in ordering}:
+            ordering += (self.unique_field,)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        # Fetch one extra row to learn whether another page follows
+        return self._set_page(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views: the page is read with the async ORM."""
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([row async for row in queryset[:self.page_size + 1]])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor["r"])
+
+        ordering = _reverse_ordering(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(self._after(ordering, self.cursor["p"]))
+        return queryset
+
+    def _set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = bool(self.page), has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(self.cursor and self.page)
+        return self.page
+
+    def _after(self, ordering, values) -> Q:
+        # Lexicographic "strictly after `values`" in `ordering`
+        q = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip("-")
+            term = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": values[i]})
+            for prev, value in zip(ordering[:i], values):
+                term &= Q(**{prev.lstrip("-"): value})
+            q |= term
+        return q
+
+    def _position(self, row):
+        names = [f.lstrip("-") for f in self.ordering]
+        if isinstance(row, dict):
+            return [row[n] for n in names]
+        return [row.serializable_value(n) for n in names]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor({"p": self._position(self.page[-1]), "r": 0})
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor({"p": self._position(self.page[0]), "r": 1})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if not isinstance(cursor["p"], list) or len(cursor["p"]) != len(self.ordering):
+                raise ValueError("cursor does not match ordering")
+            return {"p": self._cursor_values(cursor["p"]), "r": int(cursor.get("r", 0))}
+        except (TypeError, ValueError, KeyError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _cursor_values(self, values):
+        # A client can send anything: parse each value as its ordering field would
+        parsed = []
+        for field, value in zip(self.ordering, values):
+            if value is None or isinstance(value, (dict, list)):
+                raise ValueError("cursor values must be scalars")
+            parsed.append(self.model._meta.get_field(field.lstrip("-")).to_python(value))
+        return parsed
+
+    def encode_cursor(self, cursor):
+        # Full-precision isoformat: DjangoJSONEncoder would truncate datetimes to ms
+        raw = json.dumps(cursor, default=_encode_value, separators=(",", ":"))
+        encoded = urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_envelope_data(self, items):
+        return {"items": items, "next": self.get_next_link(), "prev": self.get_previous_link()}
+
+    def get_paginated_response(self, data):
+        return Response({
+            "success": True,
+            "data": self.get_envelope_data(data),
+            "error": None,
+            "trace_id": getattr(self.request, "request_id", None),
+        })
+
+
+class BookingCursorPagination(EnvelopeCursorPagination):
+    """Newest bookings first; id breaks ties between identical start times."""
+    ordering = ("-start", "id")
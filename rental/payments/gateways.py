@@ -20,3 +20,9 @@ class MockStripeGateway(PaymentGateway):
     def create_deposit(self, *, booking, amount_cents: int, meta: dict | None = None) -> DepositResult:
         fake_tx_id = f"cs_test_{booking.id:06d}"
         return DepositResult(ok=True, provider="mock_stripe", transaction_id=fake_tx_id, meta={"amount_cents": amount_cents})
+
+def get_payment_gateway() -> PaymentGateway:
+    """The gateway named by settings.PAYMENT_GATEWAY (dotted path)."""
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+    return import_string(settings.PAYMENT_GATEWAY)()
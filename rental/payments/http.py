@@ -0,0 +1,218 @@
+# rental/payments/http.py
+"""
+Async HTTP payment gateways.
+
+AsyncPaymentGateway gives a real provider integration what the synchronous
+PaymentGateway interface can't:
+
+  * one keep-alive connection pool per gateway (httpx.AsyncClient), so deposits
+    reuse TLS connections instead of opening one per call;
+  * per-call connect/read/pool timeouts;
+  * a concurrency limit on calls in flight (a semaphore in front of the pool);
+  * a circuit breaker: after `breaker_failures` consecutive transport errors /
+    5xx / timeouts the gateway fails fast with CircuitOpen for
+    `breaker_reset_s`, then lets a single probe through;
+  * a batch `create_deposits` that fans a list of deposits out over the pool.
+
+Outcomes follow DepositWorker's contract: a DepositResult (ok or declined) is
+final; GatewayUnavailable (and CircuitOpen) means "try again later".
+
+The pooled client and semaphore belong to the event loop that created them; a
+long-lived caller (DepositWorker) keeps one loop so the pool is reused. The
+sync `create_deposit` uses a throwaway client and gets no connection reuse.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from rental.payments.gateways import DepositResult, PaymentGateway
+
+
+class GatewayUnavailable(Exception):
+    """Transport error, timeout or 5xx: the deposit may be retried."""
+
+
+class CircuitOpen(GatewayUnavailable):
+    """The breaker is open; the provider wasn't called. Retry after `retry_after_s`."""
+
+    def __init__(self, message: str, retry_after_s: float = 0.0):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+    probe_wait_s = 1.0  # retry hint while the half-open probe is in flight
+
+    def __init__(self, *, failures: int = 5, reset_s: float = 30.0, clock=time.monotonic):
+        self.failures = failures
+        self.reset_s = reset_s
+        self.clock = clock
+        self.state = "closed"
+        self._failed = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                remaining = self.reset_s - (self.clock() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpen("payment provider circuit is open", retry_after_s=remaining)
+                self.state = "half_open"  # this caller is the probe
+            elif self.state == "half_open":
+                raise CircuitOpen("payment provider circuit is half-open; probe in flight",
+                                  retry_after_s=self.probe_wait_s)
+
+    def record_success(self):
+        with self._lock:
+            self.state, self._failed = "closed", 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self.state == "half_open" or self._failed >= self.failures:
+                self.state, self._opened_at = "open", self.clock()
+
+
+class AsyncPaymentGateway(PaymentGateway):
+    """
+    Base for HTTP providers. Subclasses implement `deposit_request` and
+    `deposit_result`; the base handles pooling, timeouts, limits and the breaker.
+    """
+    provider = "http"
+
+    def __init__(self, *, base_url: str, headers: dict | None = None, timeout_s: float = 10.0,
+                 connect_timeout_s: float = 3.0, max_connections: int = 20, max_concurrency: int = 20,
+                 breaker_failures: int = 5, breaker_reset_s: float = 30.0, transport=None):
+        self.base_url = base_url
+        self.headers = headers or {}
+        # pool= bounds the wait for a free connection, so a saturated pool is a timeout too
+        self.timeout = httpx.Timeout(timeout_s, connect=connect_timeout_s, pool=timeout_s)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failures=breaker_failures, reset_s=breaker_reset_s)
+        self._transport = transport
+        self._loop = None
+        self._client = None
+        self._slots = None
+
+    # ── provider-specific ────────────────────────────────────────────────────
+    def deposit_request(self, *, booking, amount_cents: int, meta: dict | None) -> dict:
+        """kwargs for httpx.AsyncClient.request (method, url, json, headers, ...)."""
+        raise NotImplementedError
+
+    def deposit_result(self, response: httpx.Response) -> DepositResult:
+        """Map a non-5xx response to a DepositResult."""
+        raise NotImplementedError
+
+    # ── plumbing ─────────────────────────────────────────────────────────────
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=self.base_url, headers=self.headers, timeout=self.timeout,
+                                 limits=self.limits, transport=self._transport)
+
+    def _pool(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A client can't be shared across event loops; the old one (if any)
+            # died with its loop.
+            self._client = self._new_client()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client, self._slots
+
+    async def _send(self, client: httpx.AsyncClient, request: dict) -> DepositResult:
+        self.breaker.before_call()
+        try:
+            response = await client.request(**request)
+        except httpx.HTTPError as exc:  # timeouts, connect/read errors
+            self.breaker.record_failure()
+            raise GatewayUnavailable(f"{type(exc).__name__}: {exc}") from exc
+        except asyncio.CancelledError:
+            self.breaker.record_failure()  # don't leave a half-open probe dangling
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+            raise GatewayUnavailable(f"provider returned HTTP {response.status_code}")
+        self.breaker.record_success()
+        return self.deposit_result(response)
+
+    async def acreate_deposit(self, *, booking, amount_cents: int, meta: dict | None = None) -> DepositResult:
+        request = self.deposit_request(booking=booking, amount_cents=amount_cents, meta=meta)
+        client, slots = self._pool()
+        async with slots:
+            return await self._send(client, request)
+
+    async def create_deposits(self, deposits: list[dict]) -> list:
+        """
+        Run many deposits concurrently (bounded by max_concurrency). `deposits`
+        are create_deposit kwargs; returns a DepositResult or the exception
+        for each, in order.
+        """
+        return await asyncio.gather(*(self.acreate_deposit(**d) for d in deposits), return_exceptions=True)
+
+    def create_deposit(self, *, booking, amount_cents: int, meta: dict | None = None) -> DepositResult:
+        request = self.deposit_request(booking=booking, amount_cents=amount_cents, meta=meta)
+
+        async def once():
+            async with self._new_client() as client:
+                return await self._send(client, request)
+        return async_to_sync(once)()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = self._loop = self._slots = None
+
+
+class HTTPDepositGateway(AsyncPaymentGateway):
+    """
+    Generic JSON deposit API:
+
+        POST {base_url}/deposits  {"amount", "currency", "reference", "metadata"}
+        2xx -> {"id", "status"}   4xx -> {"error"}
+
+    Configured from settings.PAYMENT_API_* so PAYMENT_GATEWAY can name it.
+    The booking id doubles as the Idempotency-Key, so a retried deposit
+    can't charge twice.
+    """
+    provider = "http_deposits"
+
+    def __init__(self, **kwargs):
+        options = dict(
+            base_url=settings.PAYMENT_API_BASE_URL,
+            headers={"Authorization": f"Bearer {settings.PAYMENT_API_KEY}"} if settings.PAYMENT_API_KEY else {},
+            timeout_s=settings.PAYMENT_TIMEOUT_S,
+            connect_timeout_s=settings.PAYMENT_CONNECT_TIMEOUT_S,
+            max_connections=settings.PAYMENT_MAX_CONNECTIONS,
+            max_concurrency=settings.PAYMENT_MAX_CONCURRENCY,
+            breaker_failures=settings.PAYMENT_BREAKER_FAILURES,
+            breaker_reset_s=settings.PAYMENT_BREAKER_RESET_S,
+        )
+        options.update(kwargs)
+        super().__init__(**options)
+
+    def deposit_request(self, *, booking, amount_cents, meta):
+        return {
+            "method": "POST",
+            "url": "/deposits",
+            "json": {"amount": amount_cents, "currency": settings.PAYMENT_CURRENCY,
+                     "reference": f"booking-{booking.id}", "metadata": meta or {}},
+            "headers": {"Idempotency-Key": f"deposit-{booking.id}"},
+        }
+
+    def deposit_result(self, response):
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.is_success:
+            status = body.get("status")
+            return DepositResult(ok=status == "succeeded", provider=self.provider, transaction_id=body.get("id"),
+                                 error=None if status == "succeeded" else (status or "unknown status"), meta=body)
+        return DepositResult(ok=False, provider=self.provider, transaction_id=None,
+                             error=body.get("error") or f"HTTP {response.status_code}", meta=body)
@@ -1,5 +1,9 @@
 # rental/api/permissions.py
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from lcr.permissions import HasAnyRole, scope_or_perm
+
+# token scope -> equivalent Django permissions (DB fallback when the token has no scopes)
+CAR_WRITE_PERMS = ("rental.add_car", "rental.change_car", "rental.delete_car")
 
 class CarPermission(BasePermission):
     """
@@ -15,11 +19,11 @@ class CarPermission(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         if request.method == "POST":
-            return u.has_perm("rental.add_car")
+            return scope_or_perm(request, "car:write", "rental.add_car")
         if request.method in ("PUT", "PATCH"):
-            return u.has_perm("rental.change_car")
+            return scope_or_perm(request, "car:write", "rental.change_car")
         if request.method == "DELETE":
-            return u.has_perm("rental.delete_car")
+            return scope_or_perm(request, "car:write", "rental.delete_car")
         return False
 
     def has_object_permission(self, request, view, obj):
@@ -35,13 +39,31 @@ class BookingPermission(BasePermission):
         if not u or not u.is_authenticated:
             return False
         if request.method in SAFE_METHODS:
-            return u.has_perm("rental.view_booking")
+            return scope_or_perm(request, "booking:read", "rental.view_booking")
         if request.method == "POST":
-            return u.has_perm("rental.add_booking")
+            return scope_or_perm(request, "booking:create", "rental.add_booking")
         return False  # only list/create per spec
 
     def has_object_permission(self, request, view, obj):
         # For future retrieve/update, customers should only access their own objects
-        if request.method in SAFE_METHODS:
-            return request.user.has_perm("rental.view_booking")
-        return request.user.has_perm("rental.add_booking")
+        return self.has_permission(request, view)
+
+
+class RolePermission(HasAnyRole):
+    """HasAnyRole by the token's role claim, or by the user's role without a token (session / forced auth)."""
+
+    def has_permission(self, request, view):
+        u = request.user
+        if not u or not u.is_authenticated:
+            return False
+        if request.auth is None:  # no claims to read
+            return u.role in self.ALLOWED or u.is_superuser
+        return super().has_permission(request, view)
+
+
+class AnalyticsPermission(RolePermission):
+    ALLOWED = {"fleet_manager", "admin"}
+
+
+class FinancePermission(RolePermission):
+    ALLOWED = {"finance", "admin"}
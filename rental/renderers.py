@@ -0,0 +1,29 @@
+# rental/renderers.py
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    Content-negotiation hooks for the streaming export (`?format=ndjson|csv`).
+    Rows are streamed by rental.exports; these renderers only ever see the
+    enveloped error responses, which are emitted as a single JSON document.
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, cls=encoders.JSONEncoder).encode(self.charset) + b"\n"
+
+
+class NDJSONRenderer(_ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
@@ -4,9 +4,12 @@ from drf_spectacular.utils import extend_schema_field
 import datetime, re
 from rest_framework import serializers
 from rental.models import Booking, Car
+from rental.validators import validate_start_end
+from lcr.metrics import TimedListSerializer, TimedSerializerMixin
 
 
 # rental/api/serializers.py
+from django.conf import settings
 from django.utils import timezone
 # from rest_framework import serializers
 # from rental.models import Booking, Car
@@ -16,11 +19,12 @@ User = get_user_model()
 
 _PLATE_RE = re.compile(r"^[A-Z0-9-]{3,16}$", re.I)
 
-ACTIVE_BOOKING_STATUSES = {"pending", "confirmed"}  # considered blocking for overlap
+from rental.services.overlap import ACTIVE_BOOKING_STATUSES  # noqa: F401  (re-exported)
 
-class CarSerializer(serializers.ModelSerializer):
+class CarSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Car
+        list_serializer_class = TimedListSerializer
         fields = ["id", "make", "model", "year", "plate_no", "status"]
         read_only_fields = ["id", "status"]  # status changes via a separate workflow/perm
 
@@ -37,17 +41,62 @@ class CarSerializer(serializers.ModelSerializer):
         return v
 
 
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """Query params for GET /vehicles/available/"""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    make = serializers.CharField(required=False, max_length=64)
+
+    def validate(self, attrs):
+        validate_start_end(attrs["start"], attrs["end"])
+        return attrs
+
+
+class UtilizationQuerySerializer(serializers.Serializer):
+    """Query params for GET /analytics/utilization: days [start, end) in local time"""
+    start = serializers.DateField()
+    end = serializers.DateField()
+    granularity = serializers.ChoiceField(choices=["day", "week"], default="day")
+    make = serializers.CharField(required=False, max_length=64)
+    idle_below = serializers.FloatField(required=False, default=0.0, min_value=0.0, max_value=1.0)
+    top_hours = serializers.IntegerField(required=False, default=3, min_value=1, max_value=24)
+
+    def validate(self, attrs):
+        days = (attrs["end"] - attrs["start"]).days
+        if days < 1:
+            raise serializers.ValidationError("start must be before end.")
+        if days > settings.ANALYTICS_MAX_RANGE_DAYS:
+            raise serializers.ValidationError(f"range is limited to {settings.ANALYTICS_MAX_RANGE_DAYS} days.")
+        return attrs
 
 
+class FinanceSummaryQuerySerializer(serializers.Serializer):
+    """Query params for GET /finance/summary: days [start, end) in local time, default the last 30"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    make = serializers.CharField(required=False, max_length=64)
 
+    def validate(self, attrs):
+        attrs.setdefault("end", timezone.localdate() + datetime.timedelta(days=1))
+        attrs.setdefault("start", attrs["end"] - datetime.timedelta(days=30))
+        days = (attrs["end"] - attrs["start"]).days
+        if days < 1:
+            raise serializers.ValidationError("start must be before end.")
+        if days > settings.FINANCE_SUMMARY_MAX_DAYS:
+            raise serializers.ValidationError(f"range is limited to {settings.FINANCE_SUMMARY_MAX_DAYS} days.")
+        return attrs
 
-class BookingSerializer(serializers.ModelSerializer):
+
+
+
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Write: car id; Read: include a compact car summary
     car = serializers.PrimaryKeyRelatedField(queryset=Car.objects.all())
     car_summary = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Booking
+        list_serializer_class = TimedListSerializer
         fields = ["id", "car", "car_summary", "start", "end", "status"]
         read_only_fields = ["id", "status", "car_summary"]  # status can be managed by staff later
 
@@ -79,27 +128,46 @@ class BookingSerializer(serializers.ModelSerializer):
         # if end <= timezone.now():
         #     raise serializers.ValidationError("Booking window must be in the future.")
 
-        # Car availability (simple overlap check)
-        # Two ranges [a,b) & [c,d) overlap when a < d AND c < b
-        qs = Booking.objects.filter(
-            car=car,
-            start__lt=end,
-            end__gt=start,
-            status__in=ACTIVE_BOOKING_STATUSES,
-        )
-        # On update, exclude self
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-
-        if qs.exists():
-            raise serializers.ValidationError(
-                {"car": f"Car {car.plate_no} is already booked in the requested window."}
-            )
+        # Car availability is enforced once, on the write path (BookingService):
+        # the DB exclusion constraint on PostgreSQL, rental.services.overlap elsewhere.
         return attrs
 
     def create(self, validated):
         # Always book for the authenticated user unless staff explicitly passes a customer and is allowed
         request = self.context.get("request")
         user = request.user if request else None
-        validated["customer"] = user
+        validated["customer_id"] = user.pk  # may be a claims-only user (no model instance)
         return super().create(validated)
+
+
+class BookingListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only fast path for booking lists.
+
+    Consumes `queryset.values(*BookingListSerializer.columns)` rows (car columns
+    joined in the same SELECT) and builds exactly the BookingSerializer output,
+    without per-row model instances, field binding or SerializerMethodField calls.
+    """
+    columns = ("id", "car_id", "start", "end", "status",
+               "car__plate_no", "car__make", "car__model", "car__year")
+    _datetime = serializers.DateTimeField()  # same rendering (tz + "Z") as the ModelSerializer
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    def to_representation(self, row):
+        dt = self._datetime.to_representation
+        return {
+            "id": row["id"],
+            "car": row["car_id"],
+            "car_summary": {
+                "id": row["car_id"],
+                "plate_no": row["car__plate_no"],
+                "make": row["car__make"],
+                "model": row["car__model"],
+                "year": row["car__year"],
+            },
+            "start": dt(row["start"]),
+            "end": dt(row["end"]),
+            "status": row["status"],
+        }
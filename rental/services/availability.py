@@ -0,0 +1,27 @@
+# rental/services/availability.py
+from django.db.models import Exists, OuterRef
+from rental.models import Booking, Car
+from rental.services.overlap import ACTIVE_BOOKING_STATUSES
+
+RENTABLE_CAR_STATUSES = {"available", "booked"}  # maintenance/retired cars are never offered
+
+
+def available_cars(*, start, end, make=None):
+    """
+    Cars with no blocking booking in [start, end).
+
+    One set-based anti-join (NOT EXISTS) against Booking, using the same overlap
+    rule as the booking write path: [a,b) & [c,d) overlap when a < d AND c < b.
+    Backed by the partial (car, start, end) index on active bookings and the
+    lower(make) index on cars.
+    """
+    blocking = Booking.objects.filter(
+        car=OuterRef("pk"),
+        start__lt=end,
+        end__gt=start,
+        status__in=ACTIVE_BOOKING_STATUSES,
+    )
+    qs = Car.objects.filter(status__in=RENTABLE_CAR_STATUSES).filter(~Exists(blocking))
+    if make:
+        qs = qs.filter(make__lower=make.strip().lower())
+    return qs
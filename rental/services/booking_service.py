@@ -1,44 +1,68 @@
 # rental/services/booking_service.py
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.utils import timezone
-from rental.models import Booking, Car, Payment
-from rental.payments.gateways import MockStripeGateway
+from rest_framework import serializers
+from rental.models import Booking, Car, DepositOutbox
+from rental.services.locks import CarBusy, LockStrategy, StaleCarVersion, get_lock_strategy
+from rental.services.overlap import (
+    ACTIVE_BOOKING_STATUSES,
+    has_overlap,
+    is_overlap_violation,
+    overlap_message,
+)
 from rental.validators import validate_start_end
+from lcr.executors import BoundedExecutor
 
-ACTIVE_BOOKING_STATUSES = {"pending", "confirmed"}
+# Booking writes from async views (rental.async_views): a transaction can't span
+# awaits, so each create (lock, overlap check, insert, deposit outbox row) runs
+# whole on one of these threads and its connection
+BOOKING_WRITE_EXECUTOR = BoundedExecutor(
+    "booking-write", max_workers=settings.BOOKING_WRITE_WORKERS, max_in_flight=settings.BOOKING_WRITE_MAX_IN_FLIGHT
+)
 
 class BookingService:
-    def __init__(self, gateway=None):
-        self.gateway = gateway or MockStripeGateway()
+    def __init__(self, *, lock_strategy: LockStrategy | str | None = None):
+        # None/"auto" -> settings.BOOKING_LOCK_STRATEGY, resolved per call (see rental.services.locks)
+        self.lock_strategy = lock_strategy
+
+    def _strategy(self) -> LockStrategy:
+        if isinstance(self.lock_strategy, LockStrategy):
+            return self.lock_strategy
+        return get_lock_strategy(self.lock_strategy)
 
     @transaction.atomic
     def create_booking(self, *, user, car: Car, start, end, deposit_cents: int | None = None) -> Booking:
         start, end = validate_start_end(start, end)
+        booking = self._insert(self._strategy(), user=user, car=car, start=start, end=end)
 
-        # Serialize same-car operations by locking the row (works across DBs)
-        Car.objects.select_for_update().filter(pk=car.pk).first()
-
-        # Re-check overlap inside the lock (two ranges overlap if a<d and c<b)
-        exists = Booking.objects.select_for_update(skip_locked=True).filter(
-            car=car, start__lt=end, end__gt=start, status__in=ACTIVE_BOOKING_STATUSES
-        ).exists()
-        if exists:
-            from rest_framework import serializers
-            raise serializers.ValidationError({"car": f"Car {car.plate_no} is already booked in that window."})
-
-        # Create booking
-        booking = Booking.objects.create(customer=user, car=car, start=start, end=end, status="pending")
-
-        # Optionally schedule a deposit after commit (do not do network inside txn)
+        # Deposit request commits (or rolls back) with the booking; the gateway call
+        # and the Payment row happen in `manage.py process_deposits` (rental.services.deposits)
         if deposit_cents:
-            def on_commit():
-                res = self.gateway.create_deposit(booking=booking, amount_cents=deposit_cents, meta={"type":"deposit"})
-                # Persist a Payment row either way for audit
-                Payment.objects.update_or_create(
-                    booking=booking,
-                    defaults={"amount_cents": deposit_cents, "status": "succeeded" if res.ok else "failed"},
-                )
-            transaction.on_commit(on_commit)
+            DepositOutbox.objects.create(booking=booking, amount_cents=deposit_cents)
 
         return booking
+
+    def _insert(self, strategy: LockStrategy, *, user, car: Car, start, end) -> Booking:
+        for attempt in range(1, strategy.max_attempts + 1):
+            booking = Booking(customer_id=user.pk, car=car, start=start, end=end, status="pending")
+            try:
+                # One savepoint per attempt, so a lost race or a constraint violation
+                # doesn't poison the caller's transaction.
+                with transaction.atomic(), strategy.guard(car):
+                    if strategy.check_overlap:
+                        if has_overlap(car_id=car.pk, start=start, end=end):
+                            raise serializers.ValidationError({"car": overlap_message(car)})
+                        booking._overlap_checked = True  # don't repeat the check in pre_save
+                    booking.save(force_insert=True)
+                return booking
+            except IntegrityError as exc:
+                if is_overlap_violation(exc):
+                    raise serializers.ValidationError({"car": overlap_message(car)})
+                raise
+            except StaleCarVersion:
+                strategy.metrics.record_retry()
+                strategy.backoff(attempt)
+        strategy.metrics.record_exhausted()
+        raise CarBusy()
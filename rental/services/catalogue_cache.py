@@ -0,0 +1,107 @@
+# rental/services/catalogue_cache.py
+"""
+Versioned response cache + strong ETags for GET /vehicles/ (and /async/vehicles/).
+
+Every cache key and ETag embeds a catalogue version number held in the
+configured cache. Car and Booking writes bump it (when written and again
+after commit). Old entries are never deleted; they just stop being
+addressed and age out.
+
+A response is scoped to who is asking and what they asked for:
+  * writers (car:write) all see the whole catalogue -> one shared scope;
+  * everyone else sees the cars they booked -> one scope per user;
+plus the query params (filters, cursor, page size). The ETag is derived from
+(version, scope, params) alone, so If-None-Match is answered with 304 before
+any queryset, serializer or cache read runs. The body's trace_id is per
+request and isn't covered by the ETag.
+
+A customer's `?active=` list depends on the clock (bookings start and end
+without any write), so the view serves it uncached and without an ETag.
+
+Bulk writes that bypass signals (QuerySet.update/bulk_create) must call
+bump_catalogue_version() themselves.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "rental:catalogue:version"
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters (per process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.not_modified = 0
+
+    def record(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / served, 4) if served else 0.0,
+            }
+
+
+CATALOGUE_CACHE_STATS = CacheStats()
+
+
+def catalogue_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # evicted / never set: any fresh value retires old keys
+        cache.add(VERSION_KEY, 2, timeout=None)
+
+
+def bump_catalogue_version():
+    # Now, and again on commit: a reader between the two may cache the
+    # pre-commit rows under the intermediate version.
+    _bump()
+    transaction.on_commit(_bump)
+
+
+class CatalogueEntry:
+    def __init__(self, *, scope: str, params):
+        raw = "&".join(f"{k}={v}" for k, v in sorted((k, v) for k in params for v in params.getlist(k)))
+        digest = hashlib.sha256(f"v{catalogue_version()}|{scope}|{raw}".encode()).hexdigest()
+        self.key = f"rental:catalogue:{digest}"
+        self.etag = f'"{digest[:32]}"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        # weak comparison, as RFC 9110 requires for If-None-Match
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+    def get(self):
+        data = cache.get(self.key)
+        CATALOGUE_CACHE_STATS.record("misses" if data is None else "hits")
+        return data
+
+    def set(self, data):
+        cache.set(self.key, data, settings.CATALOGUE_CACHE_TTL_S)
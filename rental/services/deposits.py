@@ -0,0 +1,190 @@
+# rental/services/deposits.py
+"""
+Deposit outbox delivery (run by `manage.py process_deposits`).
+
+BookingService writes a DepositOutbox row in the booking's own transaction, so
+a committed booking always has its deposit request. The worker then:
+
+  1. claims a batch in a short transaction: SELECT ... FOR UPDATE SKIP LOCKED,
+     then pushes available_at forward by a lease so other workers (and this one,
+     if it crashes) don't pick the rows up again until the lease expires. The
+     claim counts the attempt, so a row whose delivery keeps crashing or
+     hanging the worker still runs out of attempts;
+  2. calls the gateway for the batch on a bounded thread pool, outside any
+     transaction;
+  3. in one transaction, locks the rows that still carry its lease (one that
+     expired mid-delivery may have been re-claimed; that worker's outcome
+     stands), bulk-upserts their Payment rows (and revenue rollups,
+     rental.services.revenue) and marks them done / failed, or reschedules
+     them with exponential backoff.
+
+A declined deposit (DepositResult.ok is False) is final and becomes a failed
+Payment; an exception (timeout, 5xx, ...) is retried up to max_attempts. A
+CircuitOpen fast-fail never reached the provider: it doesn't use up an attempt
+and the row waits until the breaker lets calls through again.
+
+An AsyncPaymentGateway (rental.payments.http) gets the whole batch through
+its `create_deposits` on an event loop the worker keeps for its lifetime, so
+the gateway's connection pool survives between batches.
+"""
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from rental.models import DepositOutbox, Payment
+from rental.payments.gateways import PaymentGateway, get_payment_gateway
+from rental.payments.http import AsyncPaymentGateway, CircuitOpen
+from rental.services.revenue import existing_states, record_payment_upserts
+
+
+@dataclass
+class BatchReport:
+    claimed: int = 0
+    succeeded: int = 0
+    declined: int = 0
+    retried: int = 0
+    gave_up: int = 0
+    deferred: int = 0  # circuit open: the provider wasn't called
+    lease_lost: int = 0  # re-claimed by another worker before this one finished
+    errors: list = field(default_factory=list)
+
+    def merge(self, other: "BatchReport"):
+        for name in ("claimed", "succeeded", "declined", "retried", "gave_up", "deferred", "lease_lost"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.errors.extend(other.errors)
+
+
+class DepositWorker:
+    def __init__(self, gateway: PaymentGateway | None = None, *, batch_size: int = 100, concurrency: int = 8,
+                 max_attempts: int = 5, lease_s: float = 60.0, backoff_base_s: float = 2.0,
+                 backoff_max_s: float = 300.0):
+        self.gateway = gateway or get_payment_gateway()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lease = timedelta(seconds=lease_s)
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._loop = None
+
+    def claim(self) -> list[DepositOutbox]:
+        now = timezone.now()
+        lease_until = now + self.lease
+        with transaction.atomic():
+            rows = list(
+                DepositOutbox.objects.select_for_update(skip_locked=True, of=("self",))
+                .select_related("booking")
+                .filter(status="pending", available_at__lte=now)
+                .order_by("available_at", "id")[:self.batch_size]
+            )
+            if rows:
+                DepositOutbox.objects.filter(pk__in=[r.pk for r in rows]).update(
+                    available_at=lease_until, attempts=F("attempts") + 1
+                )
+        for row in rows:
+            row.attempts += 1
+            row.available_at = lease_until
+        return rows
+
+    @staticmethod
+    def _deposit(row: DepositOutbox) -> dict:
+        return {"booking": row.booking, "amount_cents": row.amount_cents,
+                "meta": {"type": "deposit", "outbox_id": row.pk}}
+
+    def _deliver(self, row: DepositOutbox):
+        try:
+            return self.gateway.create_deposit(**self._deposit(row)), None
+        except Exception as exc:  # transport-level failure: retryable
+            return None, exc
+
+    def deliver(self, rows: list[DepositOutbox]) -> list:
+        """(DepositResult | None, exception | None) per row."""
+        if isinstance(self.gateway, AsyncPaymentGateway):
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            results = self._loop.run_until_complete(self.gateway.create_deposits([self._deposit(r) for r in rows]))
+            return [(None, r) if isinstance(r, Exception) else (r, None) for r in results]
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(rows))) as pool:
+            return list(pool.map(self._deliver, rows))
+
+    def close(self):
+        if self._loop is not None:
+            self._loop.run_until_complete(self.gateway.aclose())
+            self._loop.close()
+            self._loop = None
+
+    def backoff(self, attempts: int) -> timedelta:
+        delay = min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))  # jitter spreads retry storms
+
+    def run_once(self) -> BatchReport:
+        rows = self.claim()
+        report = BatchReport(claimed=len(rows))
+        if not rows:
+            return report
+
+        # Claimed more often than max_attempts: earlier deliveries never finished
+        abandoned = [r for r in rows if r.attempts > self.max_attempts]
+        due = [r for r in rows if r.attempts <= self.max_attempts]
+        outcomes = self.deliver(due) if due else []
+        outcomes += [(None, TimeoutError("lease expired on every attempt"))] * len(abandoned)
+        lease_until = rows[0].available_at  # claim() gives the whole batch one lease
+
+        with transaction.atomic():
+            # A delivery that outlived its lease may have been re-claimed by another
+            # worker: only rows still carrying this lease are ours to finish
+            owned = set(
+                DepositOutbox.objects.select_for_update(of=("self",))
+                .filter(pk__in=[r.pk for r in rows], status="pending", available_at=lease_until)
+                .values_list("pk", flat=True)
+            )
+            now = timezone.now()
+            payments, finished = [], []
+            for row, (result, exc) in zip(due + abandoned, outcomes):
+                if row.pk not in owned:
+                    report.lease_lost += 1
+                    continue
+                error = f"{type(exc).__name__}: {exc}" if exc is not None else ""
+                if isinstance(exc, CircuitOpen):
+                    # Not sent: hand back the attempt claim() counted, wait out the breaker
+                    row.attempts -= 1
+                    row.available_at = now + timedelta(seconds=exc.retry_after_s)
+                    row.last_error = error
+                    report.deferred += 1
+                elif result is not None:
+                    payments.append(Payment(booking_id=row.booking_id, amount_cents=row.amount_cents,
+                                            status="succeeded" if result.ok else "failed"))
+                    row.status, row.processed_at = "done", now
+                    row.last_error = "" if result.ok else (result.error or "declined")
+                    if result.ok:
+                        report.succeeded += 1
+                    else:
+                        report.declined += 1
+                elif row.attempts >= self.max_attempts:
+                    payments.append(Payment(booking_id=row.booking_id, amount_cents=row.amount_cents, status="failed"))
+                    row.status, row.processed_at, row.last_error = "failed", now, error
+                    report.gave_up += 1
+                    report.errors.append(error)
+                else:
+                    row.available_at, row.last_error = now + self.backoff(row.attempts), error
+                    report.retried += 1
+                    report.errors.append(error)
+                finished.append(row)
+
+            if payments:
+                before = existing_states([p.booking_id for p in payments])
+                Payment.objects.bulk_create(
+                    payments, update_conflicts=True, unique_fields=["booking"], update_fields=["amount_cents", "status"]
+                )
+                # bulk_create skips the Payment signals; rollups commit with the payments
+                record_payment_upserts(before, payments)
+            DepositOutbox.objects.bulk_update(
+                finished, ["status", "attempts", "available_at", "last_error", "processed_at"]
+            )
+        return report
@@ -0,0 +1,182 @@
+# rental/services/idempotency.py
+"""
+Idempotency-Key support for POST endpoints (currently POST /bookings/).
+
+A client that retries a POST with the same Idempotency-Key gets the first
+attempt's envelope back instead of a second booking (and a second deposit):
+
+  1. claim: insert an "in_progress" IdempotencyRecord for (user, key) in its
+     own autocommit statement; the unique constraint makes exactly one request
+     the owner;
+  2. the owner runs the handler in a transaction and, in that same
+     transaction, stores the response on the record, so the outcome is durable
+     exactly when the booking is; the cache is warmed on commit;
+  3. a retry reads the outcome from the cache (or the DB) and replays it
+     without touching the booking path; a duplicate that arrives while the
+     owner is still running polls until the outcome appears (IDEMPOTENCY_WAIT_S)
+     and then gives up with 409.
+
+Only successful responses are stored: an exception rolls the handler back
+and releases the claim, so a retry runs again. A claim older than
+IDEMPOTENCY_LOCK_TTL_S belongs to a crashed request whose transaction never
+committed and can safely be taken over. Records past IDEMPOTENCY_TTL_S are
+never replayed again; `manage.py purge_idempotency_keys` deletes them.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from rental.models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress. Retry shortly."
+    default_code = "idempotency_in_progress"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = "idempotency_key_reused"
+
+
+def request_fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, *, ttl_s: int | None = None, wait_s: float | None = None, lock_ttl_s: int | None = None):
+        self.ttl_s = settings.IDEMPOTENCY_TTL_S if ttl_s is None else ttl_s
+        self.wait_s = settings.IDEMPOTENCY_WAIT_S if wait_s is None else wait_s
+        self.lock_ttl_s = settings.IDEMPOTENCY_LOCK_TTL_S if lock_ttl_s is None else lock_ttl_s
+
+    @staticmethod
+    def cache_key(user_id, key: str) -> str:
+        return f"idem:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+    @staticmethod
+    def _outcome(record: IdempotencyRecord) -> dict:
+        return {"fingerprint": record.fingerprint, "status": record.response_status, "body": record.response_body}
+
+    def lookup(self, user_id, key: str) -> dict | None:
+        """Stored outcome for (user, key), or None if there's none (yet)."""
+        outcome = cache.get(self.cache_key(user_id, key))
+        if outcome is not None:
+            return outcome
+        record = IdempotencyRecord.objects.filter(
+            user_id=user_id, key=key, status="done", created_at__gte=timezone.now() - timedelta(seconds=self.ttl_s)
+        ).first()
+        if record is None:
+            return None
+        outcome = self._outcome(record)
+        cache.set(self.cache_key(user_id, key), outcome, self.ttl_s)
+        return outcome
+
+    def claim(self, user_id, key: str, fingerprint: str) -> IdempotencyRecord | dict:
+        """The new in_progress record (caller owns the key) or a stored outcome to replay."""
+        deadline = time.monotonic() + self.wait_s
+        delay = 0.02
+        while True:
+            outcome = self.lookup(user_id, key)
+            if outcome is not None:
+                if outcome["fingerprint"] != fingerprint:
+                    raise IdempotencyKeyReused()
+                return outcome
+            record = self._try_claim(user_id, key, fingerprint)
+            if record is not None:
+                return record
+            if time.monotonic() + delay > deadline:
+                raise IdempotencyKeyInUse()
+            time.sleep(delay)  # the owner is still running
+            delay = min(delay * 2, 0.5)
+
+    def _try_claim(self, user_id, key, fingerprint) -> IdempotencyRecord | None:
+        try:
+            with transaction.atomic():
+                return IdempotencyRecord.objects.create(user_id=user_id, key=key, fingerprint=fingerprint)
+        except IntegrityError:
+            pass
+        existing = IdempotencyRecord.objects.filter(user_id=user_id, key=key).first()
+        if existing is None:
+            return None  # released in between; next round claims it
+        if existing.fingerprint != fingerprint:
+            raise IdempotencyKeyReused()
+        now = timezone.now()
+        expired = existing.created_at < now - timedelta(seconds=self.ttl_s)
+        stale = existing.status == "in_progress" and existing.locked_at < now - timedelta(seconds=self.lock_ttl_s)
+        if not (expired or stale):
+            return None
+        # Take over: only one contender's conditional update can match
+        taken = IdempotencyRecord.objects.filter(pk=existing.pk, locked_at=existing.locked_at).update(
+            status="in_progress", locked_at=now, response_status=None, response_body=None, created_at=now
+        )
+        if not taken:
+            return None
+        cache.delete(self.cache_key(user_id, key))
+        existing.refresh_from_db()
+        return existing
+
+    def complete(self, record: IdempotencyRecord, response: Response):
+        """Store the outcome; call inside the handler's transaction."""
+        record.status, record.response_status, record.response_body = "done", response.status_code, response.data
+        record.save(update_fields=["status", "response_status", "response_body"])
+        outcome = self._outcome(record)
+        transaction.on_commit(lambda: cache.set(self.cache_key(record.user_id, record.key), outcome, self.ttl_s))
+
+    def release(self, record: IdempotencyRecord):
+        IdempotencyRecord.objects.filter(pk=record.pk, status="in_progress").delete()
+
+    def purge_expired(self, *, batch_size: int = 1000) -> int:
+        """Delete records older than ttl_s, batch_size per statement; returns how many."""
+        cutoff = timezone.now() - timedelta(seconds=self.ttl_s)
+        expired = IdempotencyRecord.objects.filter(created_at__lt=cutoff).order_by("pk")
+        total = 0
+        while True:
+            ids = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return total
+            # Re-check the age: a takeover may have renewed a record since the select
+            total += IdempotencyRecord.objects.filter(pk__in=ids, created_at__lt=cutoff).delete()[0]
+
+
+def idempotent(request, handler, *, store: IdempotencyStore | None = None) -> Response:
+    """
+    Run `handler()` (which returns a Response) at most once per Idempotency-Key.
+    Without the header the handler just runs in a transaction.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        with transaction.atomic():
+            return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        raise serializers.ValidationError({HEADER: f"Must be at most {MAX_KEY_LENGTH} characters."})
+
+    store = store or IdempotencyStore()
+    claimed = store.claim(request.user.pk, key, request_fingerprint(request))
+    if isinstance(claimed, dict):
+        return Response(claimed["body"], status=claimed["status"], headers={"Idempotent-Replayed": "true"})
+    try:
+        with transaction.atomic():
+            response = handler()
+            if status.is_success(response.status_code):
+                store.complete(claimed, response)
+    except BaseException:
+        store.release(claimed)
+        raise
+    if not status.is_success(response.status_code):
+        store.release(claimed)
+    return response
@@ -0,0 +1,196 @@
+# rental/services/locks.py
+"""
+Per-car serialization strategies for the booking write path.
+
+  constraint  no lock; PostgreSQL's booking_no_overlap exclusion constraint arbitrates
+  row         SELECT ... FOR UPDATE on the car row (the historical behaviour)
+  advisory    pg_advisory_xact_lock keyed on the car id, with a bounded wait
+  optimistic  no lock; Car.version is compare-and-swapped on commit, retried on conflict
+
+Strategies that need PostgreSQL fall back to `row` on other backends. Every
+strategy records lock wait time, retries, lock timeouts and exhausted retry
+budgets in LOCK_METRICS.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from rental.models import Car
+from rental.services.overlap import db_enforces_overlap
+
+ADVISORY_LOCK_NAMESPACE = 0x4C4352  # "LCR": keeps our keys apart from other advisory-lock users
+
+
+class CarBusy(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Car is busy with another booking, please retry."
+    default_code = "car_busy"
+
+
+class StaleCarVersion(Exception):
+    """Optimistic check lost the race; the attempt must be retried."""
+
+
+class LockMetrics:
+    """Thread-safe counters for one strategy (per process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.acquisitions = 0
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+            self.retries = 0
+            self.timeouts = 0
+            self.exhausted = 0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.acquisitions += 1
+            self.wait_total_s += seconds
+            self.wait_max_s = max(self.wait_max_s, seconds)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "wait_total_s": self.wait_total_s,
+                "wait_max_s": self.wait_max_s,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "exhausted": self.exhausted,
+            }
+
+
+LOCK_METRICS: dict[str, LockMetrics] = {}
+_metrics_guard = threading.Lock()
+
+
+def lock_metrics(name: str) -> LockMetrics:
+    with _metrics_guard:
+        return LOCK_METRICS.setdefault(name, LockMetrics())
+
+
+class LockStrategy:
+    name = "none"
+    check_overlap = True   # run rental.services.overlap.has_overlap() inside the guard
+    max_attempts = 1       # >1 only for strategies that can lose a race and retry
+
+    def __init__(self):
+        self.metrics = lock_metrics(self.name)
+
+    def acquire(self, car: Car):
+        """Take whatever lock the strategy needs; return a token for validate()."""
+        return None
+
+    def validate(self, car: Car, token):
+        """Called after the INSERT, still inside the attempt's savepoint."""
+
+    def backoff(self, attempt: int):
+        pass
+
+    @contextmanager
+    def guard(self, car: Car):
+        t0 = time.perf_counter()
+        token = self.acquire(car)
+        self.metrics.record_wait(time.perf_counter() - t0)
+        yield
+        self.validate(car, token)
+
+
+class ConstraintStrategy(LockStrategy):
+    name = "constraint"
+    check_overlap = False
+
+
+class RowLockStrategy(LockStrategy):
+    name = "row"
+
+    def acquire(self, car):
+        # Serialize same-car operations by locking the row (works across DBs)
+        Car.objects.select_for_update().filter(pk=car.pk).first()
+
+
+class AdvisoryLockStrategy(LockStrategy):
+    name = "advisory"
+
+    def __init__(self, timeout_ms: int | None = None):
+        super().__init__()
+        self.timeout_ms = timeout_ms if timeout_ms is not None else settings.BOOKING_LOCK_TIMEOUT_MS
+
+    def acquire(self, car):
+        from django.db import OperationalError
+        key = car.pk & 0x7FFFFFFF
+        with connection.cursor() as cur:
+            # Transaction-scoped timeout so a convoy fails fast instead of piling up
+            cur.execute("SELECT current_setting('lock_timeout')")
+            previous = cur.fetchone()[0]
+            cur.execute("SELECT set_config('lock_timeout', %s, true)", [f"{self.timeout_ms}ms"])
+            try:
+                cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, key])
+            except OperationalError:
+                self.metrics.record_timeout()
+                raise CarBusy()
+            cur.execute("SELECT set_config('lock_timeout', %s, true)", [previous])
+
+
+class OptimisticStrategy(LockStrategy):
+    name = "optimistic"
+
+    def __init__(self, max_attempts: int | None = None):
+        super().__init__()
+        self.max_attempts = max_attempts or settings.BOOKING_OPTIMISTIC_ATTEMPTS
+
+    def acquire(self, car):
+        return Car.objects.filter(pk=car.pk).values_list("version", flat=True).get()
+
+    def validate(self, car, token):
+        # Compare-and-swap: a concurrent booking for this car bumped it first
+        if not Car.objects.filter(pk=car.pk, version=token).update(version=F("version") + 1):
+            raise StaleCarVersion()
+
+    def backoff(self, attempt: int):
+        time.sleep(random.uniform(0, min(0.05, 0.002 * 2 ** attempt)))
+
+
+STRATEGIES = {
+    "constraint": ConstraintStrategy,
+    "row": RowLockStrategy,
+    "advisory": AdvisoryLockStrategy,
+    "optimistic": OptimisticStrategy,
+}
+_POSTGRES_ONLY = {"constraint", "advisory"}
+
+
+def get_lock_strategy(name: str | None = None) -> LockStrategy:
+    """Resolve a strategy by name ("auto" or None -> settings.BOOKING_LOCK_STRATEGY)."""
+    name = (name or settings.BOOKING_LOCK_STRATEGY or "auto").lower()
+    if name == "auto":
+        name = "constraint" if db_enforces_overlap() else "row"
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown booking lock strategy: {name!r}")
+    if name in _POSTGRES_ONLY and connection.vendor != "postgresql":
+        name = "row"
+    return STRATEGIES[name]()
@@ -0,0 +1,44 @@
+# rental/services/overlap.py
+"""
+Single source of truth for the booking overlap rule.
+
+Two ranges [a,b) & [c,d) overlap when a < d AND c < b; only bookings in
+ACTIVE_BOOKING_STATUSES block a car. On PostgreSQL the rule is enforced by the
+`booking_no_overlap` GiST exclusion constraint (see migration 0003); other
+backends fall back to `has_overlap()` under a per-car lock.
+"""
+from django.db import connections
+from rental.models import Booking
+
+ACTIVE_BOOKING_STATUSES = {"pending", "confirmed"}  # considered blocking for overlap
+OVERLAP_CONSTRAINT = "booking_no_overlap"
+
+
+def db_enforces_overlap(using: str = "default") -> bool:
+    # The exclusion constraint is only installed on PostgreSQL
+    return connections[using].vendor == "postgresql"
+
+
+def has_overlap(*, car_id, start, end, exclude_pk=None) -> bool:
+    qs = Booking.objects.filter(
+        car_id=car_id,
+        start__lt=end,
+        end__gt=start,
+        status__in=ACTIVE_BOOKING_STATUSES,
+    )
+    if exclude_pk:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs.exists()
+
+
+def is_overlap_violation(exc) -> bool:
+    """True if an IntegrityError was raised by the exclusion constraint."""
+    diag = getattr(exc.__cause__, "diag", None)
+    name = getattr(diag, "constraint_name", None)
+    if name:
+        return name == OVERLAP_CONSTRAINT
+    return OVERLAP_CONSTRAINT in str(exc)
+
+
+def overlap_message(car) -> str:
+    return f"Car {car.plate_no} is already booked in that window."
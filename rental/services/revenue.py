@@ -0,0 +1,184 @@
+# rental/services/revenue.py
+"""
+Daily revenue rollups (PaymentDailyRollup): payment counts and amounts per
+local day and car make, by status. GET /finance/summary reads only these.
+
+Every write path turns payment changes into deltas, and the deltas go into
+the rollup rows with UPDATE ... SET col = col + delta, in the same
+transaction as the payment write:
+  * Payment.save()/delete(): signals in rental.signals (the previous state
+    is read in pre_save);
+  * the deposit worker's bulk upsert (rental.services.deposits) calls
+    record_payment_upserts() itself;
+  * bulk loads (generate_fleet_data) rebuild the days they touched.
+A payment counts on the local day of its created_at (booking start for rows
+older than that column). manage.py backfill_revenue_rollups rebuilds days
+from the payments themselves.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from rental.models import Booking, Payment, PaymentDailyRollup
+
+# payment status -> (amount column, count column)
+STATUS_COLUMNS = {
+    "succeeded": ("succeeded_cents", "succeeded_count"),
+    "failed": ("failed_cents", "failed_count"),
+    "refunded": ("refunded_cents", "refunded_count"),
+}
+ROLLUP_COLUMNS = [col for pair in STATUS_COLUMNS.values() for col in pair]
+PAYMENT_FIELDS = ("booking_id", "status", "amount_cents", "created_at")
+
+
+def payment_state(payment: Payment) -> dict:
+    return {f: getattr(payment, f) for f in PAYMENT_FIELDS}
+
+
+def _add(deltas, day, make, status, amount_cents, count):
+    columns = STATUS_COLUMNS.get(status)
+    if columns:
+        row = deltas[(day, make)]
+        row[columns[0]] += amount_cents * count
+        row[columns[1]] += count
+
+
+def record_payment_writes(changes):
+    """
+    Apply (before, after) payment states to the rollups; either side may be
+    None (created / deleted). States are dicts of PAYMENT_FIELDS.
+    """
+    changes = [(b, a) for b, a in changes if b != a]
+    if not changes:
+        return
+    booking_ids = {s["booking_id"] for pair in changes for s in pair if s}
+    bookings = {pk: (make, start) for pk, make, start in
+                Booking.objects.filter(pk__in=booking_ids).values_list("pk", "car__make", "start")}
+    deltas = defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS, 0))
+    for before, after in changes:
+        for sign, state in ((-1, before), (1, after)):
+            if state is None or state["booking_id"] not in bookings:
+                continue
+            make, start = bookings[state["booking_id"]]
+            day = timezone.localdate(state["created_at"] or start)
+            _add(deltas, day, make, state["status"], state["amount_cents"], sign)
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas: dict):
+    """Add {(day, make): {column: delta}} to the rollup rows, creating missing ones."""
+    for (day, make), values in sorted(deltas.items()):  # one lock order for every writer
+        values = {col: v for col, v in values.items() if v}
+        if not values:
+            continue
+        increments = {col: F(col) + v for col, v in values.items()}
+        if PaymentDailyRollup.objects.filter(day=day, make=make).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                PaymentDailyRollup.objects.create(day=day, make=make, **values)
+        except IntegrityError:  # created concurrently: add to that row instead
+            PaymentDailyRollup.objects.filter(day=day, make=make).update(**increments)
+
+
+def _local_midnight(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def payments_between(start: date, end: date):
+    """Payments counted on local days [start, end)."""
+    lo, hi = _local_midnight(start), _local_midnight(end)
+    return Payment.objects.filter(
+        Q(created_at__gte=lo, created_at__lt=hi)
+        | Q(created_at__isnull=True, booking__start__gte=lo, booking__start__lt=hi)
+    )
+
+
+def rollup_deltas(payments) -> dict:
+    """Rollup deltas for a Payment queryset, aggregated in the database."""
+    day = TruncDate(Coalesce("created_at", "booking__start"), tzinfo=timezone.get_current_timezone())
+    rows = (payments.annotate(rollup_day=day)
+            .values("rollup_day", "booking__car__make", "status")
+            .annotate(cents=Sum("amount_cents"), n=Count("pk"))
+            .order_by())
+    deltas = defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS, 0))
+    for row in rows:
+        columns = STATUS_COLUMNS.get(row["status"])
+        if columns:
+            values = deltas[(row["rollup_day"], row["booking__car__make"])]
+            values[columns[0]] += row["cents"]
+            values[columns[1]] += row["n"]
+    return deltas
+
+
+def payment_day_range(payments=None) -> tuple[date, date] | None:
+    """First and last local day the payments count on (None without payments)."""
+    when = Coalesce("created_at", "booking__start")
+    bounds = (Payment.objects.all() if payments is None else payments).aggregate(first=Min(when), last=Max(when))
+    if bounds["first"] is None:
+        return None
+    return timezone.localdate(bounds["first"]), timezone.localdate(bounds["last"])
+
+
+@transaction.atomic
+def rebuild_days(start: date, end: date) -> int:
+    """Recompute the rollup rows for local days [start, end); returns rows written."""
+    PaymentDailyRollup.objects.filter(day__gte=start, day__lt=end).delete()
+    rows = [PaymentDailyRollup(day=day, make=make, **values)
+            for (day, make), values in sorted(rollup_deltas(payments_between(start, end)).items())]
+    PaymentDailyRollup.objects.bulk_create(rows)
+    return len(rows)
+
+
+def iter_chunks(start: date, end: date, days: int):
+    while start < end:
+        yield start, min(end, start + timedelta(days=days))
+        start += timedelta(days=days)
+
+
+def rebuild_range(first: date, last: date, chunk_days: int = 31) -> int:
+    """rebuild_days over [first, last] in chunks, one transaction each."""
+    return sum(rebuild_days(lo, hi) for lo, hi in iter_chunks(first, last + timedelta(days=1), chunk_days))
+
+
+def existing_states(booking_ids) -> dict:
+    """booking id -> current payment state, for the bookings that have one."""
+    return {s["booking_id"]: s for s in Payment.objects.filter(booking_id__in=booking_ids).values(*PAYMENT_FIELDS)}
+
+
+def record_payment_upserts(before: dict, payments):
+    """Rollups for a bulk upsert on booking; an updated row keeps its created_at."""
+    changes = []
+    for payment in payments:
+        old, new = before.get(payment.booking_id), payment_state(payment)
+        if old:
+            new["created_at"] = old["created_at"]
+        changes.append((old, new))
+    record_payment_writes(changes)
+
+
+def _totals(row: dict) -> dict:
+    out = {col: row.get(col) or 0 for col in ROLLUP_COLUMNS}
+    # A refund moves its amount out of succeeded_cents: gross is everything
+    # collected, net what was kept
+    out["gross_cents"] = out["succeeded_cents"] + out["refunded_cents"]
+    out["net_cents"] = out["succeeded_cents"]
+    return out
+
+
+def finance_summary(*, start: date, end: date, make=None) -> dict:
+    """Totals, per make and per day for local days [start, end), from the rollups alone."""
+    qs = PaymentDailyRollup.objects.filter(day__gte=start, day__lt=end)
+    if make:
+        qs = qs.filter(make__lower=make.strip().lower())
+    sums = {col: Sum(col) for col in ROLLUP_COLUMNS}
+    return {
+        "range": {"start": start.isoformat(), "end": end.isoformat()},
+        "totals": _totals(qs.aggregate(**sums)),
+        "by_make": [{"make": r["make"], **_totals(r)} for r in qs.values("make").annotate(**sums).order_by("make")],
+        "by_day": [{"day": r["day"].isoformat(), **_totals(r)} for r in qs.values("day").annotate(**sums).order_by("day")],
+    }
@@ -0,0 +1,268 @@
+# rental/services/utilization.py
+"""
+Fleet utilization (hours booked / hours available) from an occupancy matrix.
+
+For a date range, OccupancyMatrix holds a float32 car × hour array: each cell
+is the fraction of that hour the car was booked (pending, confirmed or
+completed). It's filled from one query with numpy scatter-adds, and every
+report is a reduction over it: per-car and per-make sums by day or ISO week,
+idle cars, and the hour-of-day profile of the fleet.
+
+Matrices are cached per process (ANALYTICS_CACHED_RANGES, LRU) and kept
+current through a change journal in the shared cache: each committed Booking
+write appends its car id under a sequence number. A reader replays the
+entries it hasn't seen and repaints just those cars' rows. A Car write or a
+bulk write (note_fleet_change) appends "*" instead. "*" or a gap in the
+journal (evicted or expired entries, more than ANALYTICS_JOURNAL_MAX behind,
+a restarted sequence) forces a full rebuild. So does age: a matrix older than
+ANALYTICS_MATRIX_MAX_AGE_S is rebuilt whatever the journal says, which bounds
+staleness when the journal can't see every write (a per-process cache without
+CACHE_URL, bulk writes that skip note_fleet_change).
+
+Days are 24-hour blocks from local midnight of the range start.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from rental.models import Booking, Car
+from rental.services.overlap import ACTIVE_BOOKING_STATUSES
+
+UTILIZED_STATUSES = ACTIVE_BOOKING_STATUSES | {"completed"}  # cancelled bookings free the car
+JOURNAL_SEQ_KEY = "rental:utilization:seq"
+JOURNAL_ENTRY_KEY = "rental:utilization:change:{}"
+ALL_CARS = "*"
+HOUR_S = 3600
+
+
+def _start_journal():
+    # Restarts (after an eviction) from the clock, far past any sequence a reader
+    # still holds, so that reader sees a gap and rebuilds instead of missing changes
+    cache.add(JOURNAL_SEQ_KEY, int(time.time() * 1000), timeout=None)
+
+
+def _append(entry):
+    try:
+        seq = cache.incr(JOURNAL_SEQ_KEY)
+    except ValueError:  # evicted / never set
+        _start_journal()
+        seq = cache.incr(JOURNAL_SEQ_KEY)
+    cache.set(JOURNAL_ENTRY_KEY.format(seq), entry, settings.ANALYTICS_JOURNAL_TTL_S)
+
+
+def note_car_change(car_id: int):
+    """A booking on `car_id` was written; journaled once the transaction commits."""
+    transaction.on_commit(lambda: _append(car_id))
+
+
+def note_fleet_change():
+    """Cars were added/removed/renamed, or bookings were bulk-written: rebuild everything."""
+    transaction.on_commit(lambda: _append(ALL_CARS))
+
+
+def _journal_seq() -> int | None:
+    seq = cache.get(JOURNAL_SEQ_KEY)
+    if seq is None:
+        _start_journal()
+        seq = cache.get(JOURNAL_SEQ_KEY)
+    return seq
+
+
+def local_range(start_date, end_date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+    return start, start + timedelta(days=(end_date - start_date).days)
+
+
+class OccupancyMatrix:
+    def __init__(self, start: datetime, end: datetime):
+        self.start, self.end = start, end
+        self.days = int((end - start).total_seconds()) // (24 * HOUR_S)
+        self.hours = self.days * 24
+        self.lock = threading.Lock()
+        self.rebuild()
+
+    # ── building ──────────────────────────────────────────────────────────────
+    def rebuild(self):
+        self.seq = _journal_seq()
+        self.built_at = time.monotonic()
+        cars = list(Car.objects.exclude(status="retired").order_by("id").values_list("id", "plate_no", "make"))
+        self.car_ids = np.array([c[0] for c in cars], dtype=np.int64)
+        self.plates = [c[1] for c in cars]
+        self.make_names, make_codes = np.unique(np.array([c[2] for c in cars], dtype=object), return_inverse=True)
+        self.make_codes = make_codes.astype(np.int64)
+        self.row_of = {car_id: row for row, car_id in enumerate(self.car_ids.tolist())}
+        self.occupancy = self._paint(np.arange(len(cars)), self._bookings())
+
+    def _bookings(self, car_ids=None):
+        qs = Booking.objects.filter(start__lt=self.end, end__gt=self.start, status__in=UTILIZED_STATUSES)
+        if car_ids is not None:
+            qs = qs.filter(car_id__in=car_ids)
+        return qs.values_list("car_id", "start", "end")
+
+    def _paint(self, rows: np.ndarray, bookings) -> np.ndarray:
+        """Occupancy block for matrix rows `rows` (in that order) from (car_id, start, end) tuples."""
+        local = {row: i for i, row in enumerate(rows.tolist())}
+        hits = [(local[self.row_of[c]], s.timestamp(), e.timestamp())
+                for c, s, e in bookings if self.row_of.get(c) in local]
+        block = np.zeros((len(rows), self.hours), dtype=np.float32)
+        if not hits:
+            return block
+        r, s, e = (np.array(col) for col in zip(*hits))
+        origin = self.start.timestamp()
+        s = np.clip((s - origin) / HOUR_S, 0, self.hours)
+        e = np.clip((e - origin) / HOUR_S, 0, self.hours)
+        keep = e > s
+        r, s, e = r[keep].astype(np.int64), s[keep], e[keep]
+        first, last = np.floor(s).astype(np.int64), np.floor(e).astype(np.int64)
+
+        # Within one hour: the whole booking lands in that bucket
+        same = first == last
+        np.add.at(block, (r[same], first[same]), (e - s)[same])
+        # Otherwise: the head and tail fractions, then whole hours in between via a difference array
+        r, s, e, first, last = r[~same], s[~same], e[~same], first[~same], last[~same]
+        np.add.at(block, (r, first), first + 1 - s)
+        tail = last < self.hours
+        np.add.at(block, (r[tail], last[tail]), (e - last)[tail])
+        diff = np.zeros((len(rows), self.hours + 1), dtype=np.float32)
+        np.add.at(diff, (r, first + 1), 1)
+        np.add.at(diff, (r, last), -1)
+        block += np.cumsum(diff, axis=1)[:, : self.hours]
+        return block
+
+    # ── incremental refresh ───────────────────────────────────────────────────
+    def refresh(self):
+        """Apply journaled changes since the last refresh; returns the number of cars repainted."""
+        current = _journal_seq()
+        if time.monotonic() - self.built_at > settings.ANALYTICS_MATRIX_MAX_AGE_S:
+            self.rebuild()
+            return len(self.car_ids)
+        if current == self.seq:
+            return 0
+        if current is None or self.seq is None or current < self.seq \
+                or current - self.seq > settings.ANALYTICS_JOURNAL_MAX:
+            self.rebuild()
+            return len(self.car_ids)
+        keys = [JOURNAL_ENTRY_KEY.format(n) for n in range(self.seq + 1, current + 1)]
+        entries = cache.get_many(keys)
+        changed = set(entries.values())
+        if len(entries) < len(keys) or ALL_CARS in changed:
+            self.rebuild()
+            return len(self.car_ids)
+        changed &= self.row_of.keys()  # retired cars aren't in the matrix
+        rows = np.array(sorted(self.row_of[c] for c in changed), dtype=np.int64)
+        self.occupancy[rows] = self._paint(rows, self._bookings(changed))
+        self.seq = current
+        return len(rows)
+
+    # ── reports ───────────────────────────────────────────────────────────────
+    def period_starts(self, granularity: str) -> np.ndarray:
+        """Day index where each period begins: every day, or each ISO week (Mondays)."""
+        if granularity == "day":
+            return np.arange(self.days)
+        weekday = self.start.weekday()
+        mondays = np.arange((7 - weekday) % 7, self.days, 7)
+        return np.unique(np.concatenate(([0], mondays)))
+
+    def report(self, *, granularity="day", make=None, idle_below=0.0, top_hours=3) -> dict:
+        rows = np.arange(len(self.car_ids))
+        if make:
+            wanted = np.flatnonzero(np.char.lower(self.make_names.astype(str)) == make.strip().lower())
+            rows = np.flatnonzero(np.isin(self.make_codes, wanted))
+        occ = self.occupancy[rows]
+
+        starts = self.period_starts(granularity)
+        daily = occ.reshape(len(rows), self.days, 24).sum(axis=2, dtype=np.float64)
+        booked = np.add.reduceat(daily, starts, axis=1) if len(rows) else np.zeros((0, len(starts)))
+        period_hours = np.diff(np.append(starts, self.days)) * 24.0  # available per car, per period
+        car_total = booked.sum(axis=1)
+        car_util = car_total / self.hours
+
+        codes, make_index = np.unique(self.make_codes[rows], return_inverse=True)
+        make_booked = np.zeros((len(codes), len(starts)))
+        np.add.at(make_booked, make_index, booked)
+        make_cars = np.bincount(make_index, minlength=len(codes))
+
+        concurrent = occ.sum(axis=0, dtype=np.float64)  # cars booked, per hour
+        by_hour = concurrent.reshape(self.days, 24).mean(axis=0)
+        peak = int(concurrent.argmax()) if self.hours else 0
+
+        fleet_hours = len(rows) * period_hours
+        idle = np.flatnonzero(car_total == 0 if idle_below <= 0 else car_util < idle_below)
+        return {
+            "range": {"start": self.start.isoformat(), "end": self.end.isoformat(), "hours": self.hours},
+            "granularity": granularity,
+            "fleet": {
+                "cars": len(rows),
+                "booked_hours": round(float(car_total.sum()), 2),
+                "utilization": _ratio(car_total.sum(), len(rows) * self.hours),
+                "periods": [
+                    {"start": self._at_day(d), "booked_hours": round(float(b), 2), "utilization": _ratio(b, a)}
+                    for d, b, a in zip(starts.tolist(), booked.sum(axis=0), fleet_hours)
+                ],
+            },
+            "by_make": [
+                {"make": self.make_names[code], "cars": int(n),
+                 "utilization": _ratio(b.sum(), n * self.hours),
+                 "periods": [_ratio(x, n * a) for x, a in zip(b, period_hours)]}
+                for code, n, b in zip(codes.tolist(), make_cars, make_booked)
+            ],
+            "by_car": [
+                {"car_id": int(self.car_ids[row]), "plate_no": self.plates[row],
+                 "make": self.make_names[self.make_codes[row]], "utilization": round(float(u), 4),
+                 "periods": [_ratio(x, a) for x, a in zip(b, period_hours)]}
+                for row, u, b in zip(rows.tolist(), car_util, booked)
+            ],
+            "idle_cars": [
+                {"car_id": int(self.car_ids[rows[i]]), "plate_no": self.plates[rows[i]],
+                 "utilization": round(float(car_util[i]), 4)}
+                for i in idle.tolist()
+            ],
+            "peak_hours": {
+                "by_hour_of_day": [round(float(x), 3) for x in by_hour],
+                "top": [{"hour": int(h), "avg_cars_booked": round(float(by_hour[h]), 3)}
+                        for h in np.argsort(-by_hour, kind="stable")[:top_hours]],
+                "peak": {"at": (self.start + timedelta(hours=peak)).isoformat(),
+                         "cars_booked": round(float(concurrent[peak]), 3) if self.hours else 0.0},
+            },
+        }
+
+    def _at_day(self, day: int) -> str:
+        return (self.start + timedelta(days=day)).date().isoformat()
+
+
+def _ratio(part, whole) -> float:
+    return round(float(part) / float(whole), 4) if whole else 0.0
+
+
+_matrices: "OrderedDict[tuple, OccupancyMatrix]" = OrderedDict()
+_matrices_lock = threading.Lock()
+
+
+def utilization_report(*, start_date, end_date, **options) -> dict:
+    start, end = local_range(start_date, end_date)
+    key = (start, end)
+    with _matrices_lock:
+        matrix = _matrices.get(key)
+        if matrix is not None:
+            _matrices.move_to_end(key)
+    if matrix is None:
+        matrix = OccupancyMatrix(start, end)
+        with _matrices_lock:
+            _matrices[key] = matrix
+            while len(_matrices) > settings.ANALYTICS_CACHED_RANGES:
+                _matrices.popitem(last=False)
+    with matrix.lock:
+        matrix.refresh()
+        return matrix.report(**options)
+
+
+def reset_utilization_cache():
+    with _matrices_lock:
+        _matrices.clear()
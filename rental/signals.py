@@ -1,23 +1,57 @@
 # rental/signals.py
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from rental.models import Booking
-from rental.services.booking_service import ACTIVE_BOOKING_STATUSES
-from django.db.models import Q
+from rental.models import Booking, Car, Payment
+from rental.services.catalogue_cache import bump_catalogue_version
+from rental.services.overlap import db_enforces_overlap, has_overlap, overlap_message
+from rental.services.revenue import PAYMENT_FIELDS, payment_state, record_payment_writes
+from rental.services.utilization import note_car_change, note_fleet_change
 
 @receiver(pre_save, sender=Booking)
 def prevent_overlap_pre_save(sender, instance: Booking, **kwargs):
     # Skip if times missing
     if not instance.start or not instance.end or not instance.car_id:
         return
-    qs = Booking.objects.filter(
-        car=instance.car,
-        start__lt=instance.end,
-        end__gt=instance.start,
-        status__in=ACTIVE_BOOKING_STATUSES,
-    )
-    if instance.pk:
-        qs = qs.exclude(pk=instance.pk)
-    if qs.exists():
+    # Already checked under the car lock by BookingService, or enforced by the DB constraint
+    if getattr(instance, "_overlap_checked", False) or db_enforces_overlap(kwargs.get("using") or "default"):
+        return
+    if has_overlap(car_id=instance.car_id, start=instance.start, end=instance.end, exclude_pk=instance.pk):
         from django.core.exceptions import ValidationError
-        raise ValidationError({"car": f"Car {instance.car.plate_no} already booked in that window."})
+        raise ValidationError({"car": overlap_message(instance.car)})
+
+
+@receiver([post_save, post_delete], sender=Car)
+@receiver([post_save, post_delete], sender=Booking)
+def bump_catalogue_on_write(sender, **kwargs):
+    # Retires every cached GET /vehicles/ response and ETag (rental.services.catalogue_cache)
+    bump_catalogue_version()
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def journal_booking_for_utilization(sender, instance: Booking, **kwargs):
+    # Utilization matrices repaint just this car's row (rental.services.utilization)
+    note_car_change(instance.car_id)
+
+
+@receiver([post_save, post_delete], sender=Car)
+def journal_car_for_utilization(sender, **kwargs):
+    note_fleet_change()
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_for_rollups(sender, instance: Payment, raw=False, **kwargs):
+    # The rollups move the old amount/status out and the new one in
+    instance._rollup_before = None
+    if instance.pk and not raw:
+        instance._rollup_before = Payment.objects.filter(pk=instance.pk).values(*PAYMENT_FIELDS).first()
+
+
+@receiver(post_save, sender=Payment)
+def roll_up_saved_payment(sender, instance: Payment, raw=False, **kwargs):
+    if not raw:  # loaddata: rebuild with manage.py backfill_revenue_rollups
+        record_payment_writes([(getattr(instance, "_rollup_before", None), payment_state(instance))])
+
+
+@receiver(post_delete, sender=Payment)
+def roll_up_deleted_payment(sender, instance: Payment, **kwargs):
+    record_payment_writes([(payment_state(instance), None)])
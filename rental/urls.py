@@ -1,11 +1,19 @@
 # rental/api/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VehicleViewSet, BookingViewSet
+from .views import VehicleViewSet, BookingViewSet, FinanceSummaryView, UtilizationView
+from .async_views import AsyncVehicleListView, AsyncBookingListView
 
 router = DefaultRouter()
 router.register("vehicles", VehicleViewSet, basename="vehicle")
 router.register("bookings", BookingViewSet, basename="booking")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    # native async list/create (ASGI workers); same contract as the routes above
+    path("async/vehicles/", AsyncVehicleListView.as_view(), name="async-vehicle-list"),
+    path("async/bookings/", AsyncBookingListView.as_view(), name="async-booking-list"),
+    path("analytics/utilization", UtilizationView.as_view(), name="analytics-utilization"),
+    path("finance/summary", FinanceSummaryView.as_view(), name="finance-summary"),
+]
 
@@ -4,13 +4,18 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-from django.db import transaction
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import CreateModelMixin, ListModelMixin
+from rest_framework.decorators import action
 
 from rental.models import Car, Booking
-from .serializers import CarSerializer, BookingSerializer
-from .permissions import CarPermission, BookingPermission
+from .serializers import (
+    CarSerializer, BookingSerializer, BookingListSerializer, AvailabilityQuerySerializer, UtilizationQuerySerializer,
+    FinanceSummaryQuerySerializer,
+)
+from .permissions import AnalyticsPermission, FinancePermission, CarPermission, BookingPermission, CAR_WRITE_PERMS
+from lcr.permissions import scope_or_perm
+from lcr.metrics import TimedPermissionsMixin
 from rest_framework import serializers
 
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
@@ -20,11 +25,23 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 
 from rental.services.booking_service import BookingService
+from rental.services.availability import available_cars
+from rental.services.utilization import utilization_report
+from rental.services.revenue import finance_summary
+from rest_framework.views import APIView
+from rental.services.idempotency import idempotent
+from rental.services.catalogue_cache import CATALOGUE_CACHE_STATS, CatalogueEntry
+from rest_framework.exceptions import PermissionDenied
+from rental.pagination import EnvelopeCursorPagination, BookingCursorPagination
+from rental.renderers import NDJSONRenderer, CSVRenderer
+from rental.exports import stream_export
+from django.core.handlers.asgi import ASGIRequest
+from drf_spectacular.utils import OpenApiParameter
 
 
 
 
-ACTIVE_BOOKING_STATUSES = {"pending", "confirmed"}  # considered blocking for overlap
+from rental.services.overlap import ACTIVE_BOOKING_STATUSES  # noqa: F401  (re-exported)
 
 
 def envelope(request, *, data=None, error=None, code=status.HTTP_200_OK):
@@ -34,16 +51,68 @@ def envelope(request, *, data=None, error=None, code=status.HTTP_200_OK):
         status=code,
     )
 
-class VehicleViewSet(ModelViewSet):
+# Querysets shared by the DRF viewsets and their async twins (rental.async_views)
+STAFF_BOOKING_ROLES = {"admin", "fleet_manager", "support", "finance"}
+
+def wants_active(params) -> bool:
+    active = params.get("active")
+    return bool(active) and active.lower() in ("1", "true", "yes")
+
+def catalogue_entry(request, *, is_writer) -> CatalogueEntry:
+    # Host and path are part of the scope: next/prev links in the body are absolute URLs
+    scope = "writers" if is_writer else f"user:{request.user.pk}"
+    return CatalogueEntry(scope=f"{request.get_host()}{request.path}|{scope}", params=request.query_params)
+
+def conditional(response, entry, outcome):
+    response["ETag"] = entry.etag
+    response["Cache-Control"] = "private, no-cache"  # always revalidate; cheap with the ETag
+    response["Vary"] = "Authorization"
+    response["X-Cache"] = outcome
+    return response
+
+def vehicles_for(user, params, *, is_writer):
+    if is_writer:
+        qs = Car.objects.all()
+    else:
+        # "user's vehicles" = cars this user has booked (any time)
+        # reverse query name is 'booking' by default
+        qs = Car.objects.filter(booking__customer_id=user.pk).distinct()
+
+        # Optional: limit to current/future bookings only
+        if wants_active(params):
+            now = timezone.now()
+            qs = qs.filter(booking__start__lte=now, booking__end__gte=now).distinct()
+
+    # Optional filters
+    make = params.get("make")
+    model = params.get("model")
+    if make:
+        qs = qs.filter(make__icontains=make)
+    if model:
+        qs = qs.filter(model__icontains=model)
+    return qs
+
+def bookings_for(user):
+    role = (getattr(user, "role", "") or "").lower()
+    qs = Booking.objects.select_related("car", "customer")
+    if role in STAFF_BOOKING_ROLES:
+        return qs.order_by("-start", "id")
+    return qs.filter(customer_id=user.pk).order_by("-start", "id")
+
+
+class VehicleViewSet(TimedPermissionsMixin, ModelViewSet):
     """
     Routes:
       POST   /vehicles/         -> Add a car
       PUT    /vehicles/{id}/    -> Update a car
       DELETE /vehicles/{id}/    -> Delete a car
       GET    /vehicles/         -> List user's vehicles (or all for fleet/admin)
+      GET    /vehicles/available/?start=&end=&make= -> Cars free in [start, end)
+      GET    /vehicles/cache-stats/ -> Catalogue response cache counters (writers)
     """
     serializer_class = CarSerializer
     permission_classes = [IsAuthenticated, CarPermission]
+    pagination_class = EnvelopeCursorPagination
     http_method_names = ["get", "post", "put", "delete", "head", "options"]
 
     def get_queryset(self):
@@ -51,47 +120,42 @@ class VehicleViewSet(ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Car.objects.none()
             
-        u = self.request.user
+        return vehicles_for(self.request.user, self.request.query_params, is_writer=self.is_writer)
 
+    @property
+    def is_writer(self):
         # writers (fleet/admin) see all cars
-        is_writer = (
-            u.has_perm("rental.add_car") or
-            u.has_perm("rental.change_car") or
-            u.has_perm("rental.delete_car")
-        )
+        if not hasattr(self, "_is_writer"):
+            self._is_writer = scope_or_perm(self.request, "car:write", *CAR_WRITE_PERMS)
+        return self._is_writer
 
-        if is_writer:
-            qs = Car.objects.all()
-        else:
-            # "user's vehicles" = cars this user has booked (any time)
-            # reverse query name is 'booking' by default
-            qs = Car.objects.filter(booking__customer=u).distinct()
-
-            # Optional: limit to current/future bookings only
-            active = self.request.query_params.get("active")
-            if active and active.lower() in ("1", "true", "yes"):
-                now = timezone.now()
-                qs = qs.filter(booking__start__lte=now, booking__end__gte=now).distinct()
-
-        # Optional filters
-        make = self.request.query_params.get("make")
-        model = self.request.query_params.get("model")
-        if make:
-            qs = qs.filter(make__icontains=make)
-        if model:
-            qs = qs.filter(model__icontains=model)
-
-        return qs
-
-    # enveloped responses
+    # enveloped responses (keyset-paginated: data = {"items", "next", "prev"})
     def list(self, request, *a, **kw):
+        # Versioned cache (rental.services.catalogue_cache): the ETag is known
+        # before anything runs, so a matching If-None-Match costs no queries.
+        if not self.is_writer and wants_active(request.query_params):
+            # ?active= follows the clock, not just writes: never cached or ETagged
+            response = envelope(request, data=self._list_data())
+            response["Cache-Control"] = "private, no-store"
+            response["X-Cache"] = "BYPASS"
+            return response
+        entry = catalogue_entry(request, is_writer=self.is_writer)
+        if entry.matches(request.headers.get("If-None-Match")):
+            CATALOGUE_CACHE_STATS.record("not_modified")
+            return conditional(Response(status=status.HTTP_304_NOT_MODIFIED), entry, "REVALIDATED")
+
+        data, outcome = entry.get(), "HIT"
+        if data is None:
+            data, outcome = self._list_data(), "MISS"
+            entry.set(data)
+        return conditional(envelope(request, data=data), entry, outcome)
+
+    def _list_data(self):
         qs = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(qs)
-        ser = self.get_serializer(page or qs, many=True)
-        if page is not None:
-            # If you want the same envelope for paginated lists, swap DRF paginator to a custom one later
-            return self.get_paginated_response(ser.data)
-        return envelope(request, data={"items": ser.data})
+        if page is None:
+            return {"items": self.get_serializer(qs, many=True).data}
+        return self.paginator.get_envelope_data(self.get_serializer(page, many=True).data)
 
     def create(self, request, *a, **kw):
         s = self.get_serializer(data=request.data)
@@ -111,6 +175,27 @@ class VehicleViewSet(ModelViewSet):
         car.delete()
         return envelope(request, data={"deleted": True}, code=status.HTTP_200_OK)
 
+    @extend_schema(tags=["Vehicles"], responses={200: OpenApiResponse(description="Catalogue cache counters, this process")})
+    @action(detail=False, methods=["get"], url_path="cache-stats", filter_backends=[], pagination_class=None)
+    def cache_stats(self, request, *a, **kw):
+        if not self.is_writer:
+            raise PermissionDenied()
+        return envelope(request, data=CATALOGUE_CACHE_STATS.snapshot())
+
+    @extend_schema(
+        tags=["Vehicles"],
+        parameters=[AvailabilityQuerySerializer],
+        responses={200: OpenApiResponse(description="Cars with no blocking booking in the window (cursor-paginated)")},
+    )
+    @action(detail=False, methods=["get"], url_path="available", filter_backends=[])
+    def available(self, request, *a, **kw):
+        q = AvailabilityQuerySerializer(data=request.query_params)
+        q.is_valid(raise_exception=True)
+        qs = available_cars(**q.validated_data)
+        page = self.paginate_queryset(qs)
+        ser = self.get_serializer(page, many=True)
+        return self.get_paginated_response(ser.data)
+
 
 
 
@@ -128,43 +213,62 @@ def envelope(request, *, data=None, error=None, code=status.HTTP_200_OK):
 
 @extend_schema_view(
     list=extend_schema(tags=["Bookings"], responses={200: OpenApiResponse(description="User bookings (staff: all)")}),
-    create=extend_schema(tags=["Bookings"], responses={201: OpenApiResponse(description="Booking created")}),
+    create=extend_schema(
+        tags=["Bookings"],
+        parameters=[OpenApiParameter(
+            "Idempotency-Key", str, location=OpenApiParameter.HEADER, required=False,
+            description="Retries with the same key replay the first response (Idempotent-Replayed: true) "
+                        "instead of booking again.",
+        )],
+        responses={
+            201: OpenApiResponse(description="Booking created"),
+            409: OpenApiResponse(description="Same Idempotency-Key still in progress"),
+            422: OpenApiResponse(description="Idempotency-Key reused with a different body"),
+        },
+    ),
 )
-class BookingViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
+class BookingViewSet(TimedPermissionsMixin, CreateModelMixin, ListModelMixin, GenericViewSet):
     """
     POST /bookings/ -> Book a vehicle
     GET  /bookings/ -> List bookings for current user (staff sees all)
+    GET  /bookings/export/?format=ndjson|csv&from=&to= -> Streamed export incl. payments
     """
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated, BookingPermission]
     http_method_names = ["get", "post", "head", "options"]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = BookingFilter
-    ordering = ["-start"]
+    pagination_class = BookingCursorPagination
+    ordering = ["-start", "id"]
+    ordering_fields = ["start", "end", "id"]  # plain columns only: they form the keyset cursor
 
     def get_queryset(self):
         # Handle schema generation
         if getattr(self, 'swagger_fake_view', False):
             return Booking.objects.none()
             
-        u = self.request.user
-        role = (getattr(u, "role", "") or "").lower()
-        qs = Booking.objects.select_related("car", "customer")
-        if role in {"admin", "fleet_manager", "support", "finance"}:
-            return qs.order_by("-start")
-        return qs.filter(customer=u).order_by("-start")
-
-    # enveloped responses
+        return bookings_for(self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return BookingListSerializer
+        return super().get_serializer_class()
+
+    # enveloped responses (keyset-paginated: data = {"items", "next", "prev"})
     def list(self, request, *a, **kw):
-        qs = self.filter_queryset(self.get_queryset())
+        # Read path: only the listed columns, car fields joined; no model instances
+        qs = self.filter_queryset(self.get_queryset()).values(*BookingListSerializer.columns)
         page = self.paginate_queryset(qs)
-        ser = self.get_serializer(page or qs, many=True)
-        if page is not None:
-            return self.get_paginated_response(ser.data)
-        return envelope(request, data={"items": ser.data})
+        if page is None:
+            return envelope(request, data={"items": self.get_serializer(qs, many=True).data})
+        ser = self.get_serializer(page, many=True)
+        return self.get_paginated_response(ser.data)
 
-    @transaction.atomic
     def create(self, request, *a, **kw):
+        # Idempotency-Key: replay a stored outcome, or run and store it atomically
+        return idempotent(request, lambda: self._create(request))
+
+    def _create(self, request):
         s = self.get_serializer(data=request.data)
         s.is_valid(raise_exception=True)
 
@@ -178,3 +282,53 @@ class BookingViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
         )
         out = BookingSerializer(booking).data
         return envelope(request, data=out, code=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        tags=["Bookings"],
+        parameters=[
+            OpenApiParameter("format", str, enum=["ndjson", "csv"], description="Export format (default ndjson)"),
+            OpenApiParameter("from", str, description="ISO datetime; bookings starting at/after"),
+            OpenApiParameter("to", str, description="ISO datetime; bookings ending at/before"),
+        ],
+        responses={200: OpenApiResponse(description="Streamed bookings with payment amount/status, one row per booking")},
+    )
+    @action(detail=False, methods=["get"], url_path="export",
+            renderer_classes=[NDJSONRenderer, CSVRenderer], pagination_class=None)
+    def export(self, request, *a, **kw):
+        # Same role scoping (get_queryset) and BookingFilter params as the list
+        qs = self.filter_queryset(self.get_queryset())
+        return stream_export(
+            qs, request.accepted_renderer.format, asynchronous=isinstance(request._request, ASGIRequest)
+        )
+
+
+class UtilizationView(TimedPermissionsMixin, APIView):
+    """Hours booked / hours available per car, make and period, plus idle cars and peak hours."""
+    permission_classes = [AnalyticsPermission]
+
+    @extend_schema(
+        tags=["Analytics"],
+        parameters=[UtilizationQuerySerializer],
+        responses={200: OpenApiResponse(description="Fleet, per-make and per-car utilization by day or ISO week")},
+    )
+    def get(self, request, *a, **kw):
+        q = UtilizationQuerySerializer(data=request.query_params)
+        q.is_valid(raise_exception=True)
+        params = dict(q.validated_data)
+        data = utilization_report(start_date=params.pop("start"), end_date=params.pop("end"), **params)
+        return envelope(request, data=data)
+
+
+class FinanceSummaryView(TimedPermissionsMixin, APIView):
+    """Deposits, failures and refunds for a day range; reads the daily rollups only."""
+    permission_classes = [FinancePermission]
+
+    @extend_schema(
+        tags=["Finance"],
+        parameters=[FinanceSummaryQuerySerializer],
+        responses={200: OpenApiResponse(description="Totals, per make and per day (amounts in cents)")},
+    )
+    def get(self, request, *a, **kw):
+        q = FinanceSummaryQuerySerializer(data=request.query_params)
+        q.is_valid(raise_exception=True)
+        return envelope(request, data=finance_summary(**q.validated_data))
@@ -8,6 +8,36 @@ from django.utils import timezone
 
 User = get_user_model()
 
+@pytest.fixture(autouse=True)
+def throttle_state(settings, tmp_path):
+    # Throttle counters live in a shared file; give every test its own
+    from lcr.throttling import reset_throttle_backend
+    settings.THROTTLE_BACKEND = "file"
+    settings.THROTTLE_STATE_FILE = str(tmp_path / "throttle.bin")
+    settings.THROTTLE_FILE_SLOTS = 1024
+    reset_throttle_backend()
+    yield
+    reset_throttle_backend()
+
+@pytest.fixture(autouse=True)
+def metrics_state(settings, tmp_path):
+    # Request histograms live in a shared file too
+    from lcr.metrics import reset_metrics_store
+    settings.METRICS_STATE_FILE = str(tmp_path / "metrics.bin")
+    settings.METRICS_FILE_SLOTS = 64
+    reset_metrics_store()
+    yield
+    reset_metrics_store()
+
+@pytest.fixture
+def hs256_tokens(monkeypatch):
+    # RS256 keys aren't available in tests; sign/verify with a shared secret instead
+    from rest_framework_simplejwt.backends import TokenBackend
+    from rest_framework_simplejwt.tokens import Token
+    backend = TokenBackend("HS256", "test-secret-" + "x" * 32, audience="lcr-api", issuer="lcr-auth")
+    monkeypatch.setattr(Token, "get_token_backend", lambda self: backend)
+    return backend
+
 @pytest.fixture
 def api_client():
     return APIClient()
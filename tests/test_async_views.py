@@ -0,0 +1,90 @@
+# tests/test_async_views.py
+import asyncio
+
+import pytest
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.auth import tokens_for_user
+from rental.models import Booking, DepositOutbox
+
+# Handlers run ORM work off the test's thread, so data must really be committed
+pytestmark = [pytest.mark.django_db(transaction=True), pytest.mark.usefixtures("hs256_tokens")]
+
+def call(user, method, name, data=None, headers=None, **params):
+    headers = dict(headers or {})
+    if user:
+        headers["Authorization"] = f"Bearer {tokens_for_user(user)['access']}"
+    client = AsyncClient()
+
+    async def go():
+        if method == "post":
+            return await client.post(reverse(name), data, content_type="application/json", headers=headers)
+        return await client.get(reverse(name), params, headers=headers)
+    return asyncio.run(go())
+
+def window(days):
+    start = timezone.now() + timezone.timedelta(days=days)
+    return start.isoformat(), (start + timezone.timedelta(days=1)).isoformat()
+
+def test_requires_bearer_token():
+    r = call(None, "get", "async-booking-list")
+    assert r.status_code == 401 and r.json()["error"]["code"] == "unauthorized"
+
+def test_async_booking_create_and_list(make_user, car_factory):
+    u = make_user("async-cust", role="customer")
+    car = car_factory(plate_no="ASY-1")
+    start, end = window(1)
+    r = call(u, "post", "async-booking-list", {"car": car.id, "start": start, "end": end})
+    assert r.status_code == 201, r.content
+    assert r.json()["data"]["car_summary"]["plate_no"] == "ASY-1"
+
+    clash = call(u, "post", "async-booking-list", {"car": car.id, "start": start, "end": end})
+    assert clash.status_code == 400 and "car" in clash.json()["error"]["details"]
+    assert Booking.objects.filter(car=car).count() == 1
+
+    body = call(u, "get", "async-booking-list").json()["data"]
+    assert [i["car_summary"]["plate_no"] for i in body["items"]] == ["ASY-1"]
+    assert body["next"] is None
+
+def test_async_booking_create_honours_idempotency_key(make_user, car_factory):
+    u = make_user("async-idem", role="customer")
+    car = car_factory(plate_no="ASY-IDEM")
+    start, end = window(2)
+    data, key = {"car": car.id, "start": start, "end": end}, {"Idempotency-Key": "async-k-1"}
+    first = call(u, "post", "async-booking-list", data, headers=key)
+    assert first.status_code == 201, first.content
+    retry = call(u, "post", "async-booking-list", data, headers=key)
+    assert retry.status_code == 201 and retry["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert Booking.objects.filter(car=car).count() == 1 and DepositOutbox.objects.filter(booking__car=car).count() == 1
+
+def test_async_list_matches_sync_list(api_client, make_user, car_factory, booking_factory):
+    u = make_user("parity", role="customer")
+    for i in range(5):
+        booking_factory(customer=u, car=car_factory(plate_no=f"PAR-{i}"),
+                        start=timezone.now() + timezone.timedelta(days=i + 1))
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(u)['access']}")
+    sync_page = api_client.get(reverse("booking-list"), {"page_size": 2}).json()["data"]
+    async_page = call(u, "get", "async-booking-list", page_size=2).json()["data"]
+    assert async_page["items"] == sync_page["items"]
+    assert async_page["next"] and sync_page["next"]
+
+def test_async_vehicle_writes_need_car_write_scope(make_user):
+    payload = {"make": "Honda", "model": "City", "year": 2022, "plate_no": "ASY-9"}
+    assert call(make_user("no-write", role="customer"), "post", "async-vehicle-list", payload).status_code == 403
+    r = call(make_user("fleet", role="fleet_manager"), "post", "async-vehicle-list", payload)
+    assert r.status_code == 201 and r.json()["data"]["plate_no"] == "ASY-9"
+    items = call(make_user("fleet2", role="fleet_manager"), "get", "async-vehicle-list").json()["data"]["items"]
+    assert [c["plate_no"] for c in items] == ["ASY-9"]
+
+def test_async_vehicle_list_uses_catalogue_cache_and_etag(make_user, car_factory):
+    fleet = make_user("fleet-cache", role="fleet_manager")
+    car_factory(plate_no="ASY-C1")
+    first = call(fleet, "get", "async-vehicle-list")
+    assert first["X-Cache"] == "MISS" and first["ETag"]
+    second = call(fleet, "get", "async-vehicle-list")
+    assert second["X-Cache"] == "HIT" and second.json()["data"] == first.json()["data"]
+    r = call(fleet, "get", "async-vehicle-list", headers={"If-None-Match": first["ETag"]})
+    assert r.status_code == 304 and r["ETag"] == first["ETag"]
@@ -0,0 +1,73 @@
+# tests/test_availability_api.py
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+pytestmark = pytest.mark.django_db
+
+def auth(client, user):
+    client.force_authenticate(user)
+    return client
+
+def window(days_from_now, length_days):
+    start = timezone.now() + timezone.timedelta(days=days_from_now)
+    return start, start + timezone.timedelta(days=length_days)
+
+def test_available_excludes_cars_with_blocking_booking(api_client, customer, car_factory, booking_factory):
+    free = car_factory(plate_no="FREE-1")
+    taken = car_factory(plate_no="TAKEN-1")
+    start, end = window(1, 2)
+    booking_factory(customer=customer, car=taken, start=start, end=end)
+
+    url = reverse("vehicle-available")
+    res = auth(api_client, customer).get(url, {"start": start.isoformat(), "end": end.isoformat()})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["success"] is True
+    plates = {i["plate_no"] for i in body["data"]["items"]}
+    assert plates == {free.plate_no}
+
+def test_available_uses_half_open_windows_and_active_statuses(api_client, customer, car_factory, booking_factory):
+    back_to_back = car_factory(plate_no="B2B-1")
+    cancelled = car_factory(plate_no="CXL-1")
+    start, end = window(5, 1)
+    # ends exactly when the requested window starts -> not blocking
+    booking_factory(customer=customer, car=back_to_back, start=start - timezone.timedelta(days=1), end=start)
+    # overlapping but cancelled -> not blocking
+    booking_factory(customer=customer, car=cancelled, start=start, end=end, status="cancelled")
+
+    res = auth(api_client, customer).get(reverse("vehicle-available"), {"start": start.isoformat(), "end": end.isoformat()})
+    plates = {i["plate_no"] for i in res.json()["data"]["items"]}
+    assert plates == {"B2B-1", "CXL-1"}
+
+def test_available_filters_by_make_and_skips_unrentable(api_client, customer, car_factory):
+    car_factory(plate_no="TOY-1", make="Toyota")
+    car_factory(plate_no="HON-1", make="Honda")
+    car_factory(plate_no="TOY-2", make="Toyota", status="maintenance")
+    start, end = window(1, 1)
+
+    res = auth(api_client, customer).get(
+        reverse("vehicle-available"), {"start": start.isoformat(), "end": end.isoformat(), "make": "toyota"}
+    )
+    plates = {i["plate_no"] for i in res.json()["data"]["items"]}
+    assert plates == {"TOY-1"}
+
+def test_available_is_cursor_paginated(api_client, customer, car_factory):
+    for i in range(5):
+        car_factory(plate_no=f"PG-{i}")
+    start, end = window(1, 1)
+    params = {"start": start.isoformat(), "end": end.isoformat(), "page_size": 2}
+
+    client = auth(api_client, customer)
+    first = client.get(reverse("vehicle-available"), params).json()["data"]
+    assert len(first["items"]) == 2
+    assert first["next"] and first["prev"] is None
+
+    second = client.get(first["next"]).json()["data"]
+    assert len(second["items"]) == 2
+    assert {i["id"] for i in first["items"]}.isdisjoint({i["id"] for i in second["items"]})
+
+def test_available_rejects_inverted_window(api_client, customer):
+    start, end = window(2, 1)
+    res = auth(api_client, customer).get(reverse("vehicle-available"), {"start": end.isoformat(), "end": start.isoformat()})
+    assert res.status_code == 400
@@ -0,0 +1,42 @@
+# tests/test_booking_list_benchmark.py
+"""
+Microbenchmark: booking list serialization, BookingSerializer vs the
+values()-based BookingListSerializer. Rows/sec lands in the benchmark's
+extra_info (pytest --benchmark-json=... to keep it).
+"""
+import pytest
+from django.utils import timezone
+
+pytest.importorskip("pytest_benchmark")
+
+from rental.models import Booking, Car
+from rental.serializers import BookingListSerializer, BookingSerializer
+
+pytestmark = pytest.mark.django_db
+
+N_ROWS = 1000
+
+@pytest.fixture
+def bookings(customer):
+    cars = Car.objects.bulk_create([
+        Car(plate_no=f"BMK-{i}", make="Bench", model=f"M{i % 10}", year=2022) for i in range(N_ROWS)
+    ])
+    start = timezone.now() + timezone.timedelta(days=1)
+    Booking.objects.bulk_create([
+        Booking(customer=customer, car=c, start=start, end=start + timezone.timedelta(days=1)) for c in cars
+    ])
+    return Booking.objects.order_by("-start", "id")
+
+def run(benchmark, fn):
+    data = benchmark(fn)
+    assert len(data) == N_ROWS
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info["rows_per_sec"] = round(N_ROWS / benchmark.stats.stats.mean, 1)
+
+@pytest.mark.benchmark(group="booking-list")
+def test_model_serializer_rows_per_sec(benchmark, bookings):
+    run(benchmark, lambda: BookingSerializer(bookings.select_related("car"), many=True).data)
+
+@pytest.mark.benchmark(group="booking-list")
+def test_list_serializer_rows_per_sec(benchmark, bookings):
+    run(benchmark, lambda: BookingListSerializer(bookings.values(*BookingListSerializer.columns), many=True).data)
@@ -0,0 +1,35 @@
+# tests/test_booking_list_serializer.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rental.models import Booking
+from rental.serializers import BookingListSerializer, BookingSerializer
+
+pytestmark = pytest.mark.django_db
+
+def seed(customer, car_factory, booking_factory, n=5):
+    start = timezone.now().replace(microsecond=123456) + timezone.timedelta(days=1)
+    for i in range(n):
+        booking_factory(customer=customer, car=car_factory(plate_no=f"FAST-{i}"),
+                        start=start + timezone.timedelta(days=i), status="confirmed" if i % 2 else "pending")
+
+def test_fast_list_matches_model_serializer(customer, car_factory, booking_factory):
+    seed(customer, car_factory, booking_factory)
+    qs = Booking.objects.order_by("-start", "id")
+    slow = BookingSerializer(qs.select_related("car"), many=True).data
+    fast = BookingListSerializer(qs.values(*BookingListSerializer.columns), many=True).data
+    assert fast == slow
+    assert [list(r) for r in fast] == [list(r) for r in slow]  # same key order too
+
+def test_list_endpoint_reads_bookings_in_one_query(api_client, customer, car_factory, booking_factory):
+    seed(customer, car_factory, booking_factory)
+    api_client.force_authenticate(customer)
+    with CaptureQueriesContext(connection) as ctx:
+        body = api_client.get(reverse("booking-list")).json()
+    data_sql = [q["sql"] for q in ctx.captured_queries if "rental_" in q["sql"]]
+    # cars joined into the page query, no per-row lookups
+    assert len(data_sql) == 1 and "JOIN" in data_sql[0]
+    assert {i["car_summary"]["plate_no"] for i in body["data"]["items"]} == {f"FAST-{i}" for i in range(5)}
@@ -0,0 +1,106 @@
+# tests/test_booking_service.py
+import pytest
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from rental.models import Booking, Car
+from rental.services.booking_service import BookingService
+from rental.services.locks import CarBusy, OptimisticStrategy, get_lock_strategy
+from rental.services.overlap import OVERLAP_CONSTRAINT, has_overlap, is_overlap_violation
+
+pytestmark = pytest.mark.django_db
+
+def window(days_from_now, length_days):
+    start = timezone.now() + timezone.timedelta(days=days_from_now)
+    return start, start + timezone.timedelta(days=length_days)
+
+def test_service_creates_booking(customer, car_factory):
+    car = car_factory()
+    start, end = window(1, 2)
+    booking = BookingService().create_booking(user=customer, car=car, start=start, end=end)
+    assert booking.pk and booking.status == "pending"
+
+def test_service_rejects_overlap_with_car_error(customer, car_factory, booking_factory):
+    car = car_factory()
+    start, end = window(1, 2)
+    booking_factory(customer=customer, car=car, start=start, end=end)
+    with pytest.raises(serializers.ValidationError) as exc:
+        BookingService().create_booking(
+            user=customer, car=car, start=start + timezone.timedelta(hours=1), end=end + timezone.timedelta(days=1)
+        )
+    assert "already booked" in str(exc.value.detail["car"]).lower()
+    assert Booking.objects.filter(car=car).count() == 1
+
+def test_back_to_back_and_inactive_bookings_do_not_block(customer, car_factory, booking_factory):
+    car = car_factory()
+    start, end = window(1, 2)
+    booking_factory(customer=customer, car=car, start=start - timezone.timedelta(days=1), end=start)
+    booking_factory(customer=customer, car=car, start=start, end=end, status="cancelled")
+    assert not has_overlap(car_id=car.id, start=start, end=end)
+    BookingService().create_booking(user=customer, car=car, start=start, end=end)
+
+def test_direct_orm_writes_still_guarded(customer, car_factory, booking_factory):
+    car = car_factory()
+    start, end = window(1, 2)
+    booking_factory(customer=customer, car=car, start=start, end=end)
+    with pytest.raises(DjangoValidationError):
+        Booking.objects.create(customer=customer, car=car, start=start, end=end)
+
+def test_is_overlap_violation_matches_constraint_name():
+    class Diag:
+        constraint_name = OVERLAP_CONSTRAINT
+
+    class Cause(Exception):
+        diag = Diag()
+
+    exc = IntegrityError("conflicting key value violates exclusion constraint")
+    exc.__cause__ = Cause()
+    assert is_overlap_violation(exc)
+    assert not is_overlap_violation(IntegrityError("duplicate key value violates unique constraint"))
+
+@pytest.mark.parametrize("name,expected", [
+    ("auto", "row"), ("row", "row"), ("optimistic", "optimistic"),
+    # PostgreSQL-only strategies degrade to the row lock on SQLite
+    ("constraint", "row"), ("advisory", "row"),
+])
+def test_lock_strategy_resolution(name, expected):
+    assert get_lock_strategy(name).name == expected
+
+def test_optimistic_strategy_bumps_car_version(customer, car_factory):
+    car = car_factory()
+    start, end = window(1, 1)
+    BookingService(lock_strategy="optimistic").create_booking(user=customer, car=car, start=start, end=end)
+    car.refresh_from_db()
+    assert car.version == 1
+
+def test_optimistic_strategy_retries_lost_race_then_gives_up(customer, car_factory, monkeypatch):
+    car = car_factory()
+    start, end = window(1, 1)
+    strategy = OptimisticStrategy(max_attempts=3)
+    strategy.metrics.reset()
+    monkeypatch.setattr(strategy, "backoff", lambda attempt: None)
+    # Simulate a concurrent writer bumping the version on every attempt
+    real_acquire = strategy.acquire
+    def racing_acquire(c):
+        token = real_acquire(c)
+        Car.objects.filter(pk=c.pk).update(version=F("version") + 1)
+        return token
+    monkeypatch.setattr(strategy, "acquire", racing_acquire)
+
+    with pytest.raises(CarBusy):
+        BookingService(lock_strategy=strategy).create_booking(user=customer, car=car, start=start, end=end)
+    snap = strategy.metrics.snapshot()
+    assert snap["retries"] == 3 and snap["acquisitions"] == 3
+    assert snap["exhausted"] == 1 and snap["timeouts"] == 0
+    # every attempt rolled back to its savepoint
+    assert not Booking.objects.filter(car=car).exists()
+
+def test_row_strategy_records_wait(customer, car_factory):
+    strategy = get_lock_strategy("row")
+    strategy.metrics.reset()
+    start, end = window(1, 1)
+    BookingService(lock_strategy=strategy).create_booking(user=customer, car=car_factory(), start=start, end=end)
+    assert strategy.metrics.snapshot()["acquisitions"] == 1
@@ -0,0 +1,61 @@
+# tests/test_bookings_export.py
+import csv
+import io
+import json
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from rental.models import Payment
+
+pytestmark = pytest.mark.django_db
+
+def auth(client, user):
+    client.force_authenticate(user)
+    return client
+
+@pytest.fixture
+def finance_user(make_user, add_perms):
+    u = make_user("finance", role="finance")
+    add_perms(u, ["view_booking"])
+    return u
+
+def body(res):
+    assert res.streaming
+    return b"".join(res.streaming_content).decode()
+
+def test_ndjson_export_joins_payments(api_client, finance_user, customer, car_factory, booking_factory):
+    paid = booking_factory(customer=customer, car=car_factory(plate_no="EXP-1"))
+    booking_factory(customer=customer, car=car_factory(plate_no="EXP-2"))
+    Payment.objects.create(booking=paid, amount_cents=10000, status="succeeded")
+
+    res = auth(api_client, finance_user).get(reverse("booking-export"), {"format": "ndjson"})
+    assert res.status_code == 200
+    assert res["Content-Type"].startswith("application/x-ndjson")
+    rows = {r["plate_no"]: r for r in map(json.loads, body(res).splitlines())}
+    assert rows["EXP-1"]["payment_amount_cents"] == 10000
+    assert rows["EXP-1"]["payment_status"] == "succeeded"
+    assert rows["EXP-2"]["payment_amount_cents"] is None
+
+def test_csv_export_applies_from_to_filters(api_client, finance_user, customer, car_factory, booking_factory):
+    now = timezone.now()
+    booking_factory(customer=customer, car=car_factory(plate_no="OLD-1"),
+                    start=now - timezone.timedelta(days=30), end=now - timezone.timedelta(days=29))
+    booking_factory(customer=customer, car=car_factory(plate_no="NEW-1"),
+                    start=now + timezone.timedelta(days=1), end=now + timezone.timedelta(days=2))
+
+    res = auth(api_client, finance_user).get(
+        reverse("booking-export"), {"format": "csv", "from": (now - timezone.timedelta(days=1)).isoformat()}
+    )
+    assert res.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(body(res))))
+    assert [r["plate_no"] for r in rows] == ["NEW-1"]
+
+def test_export_keeps_role_scoping(api_client, customer, staff_writer, car_factory, booking_factory):
+    booking_factory(customer=customer, car=car_factory(plate_no="MINE-1"))
+    booking_factory(customer=staff_writer, car=car_factory(plate_no="THEIRS-1"))
+
+    res = auth(api_client, customer).get(reverse("booking-export"), {"format": "ndjson"})
+    plates = {json.loads(line)["plate_no"] for line in body(res).splitlines()}
+    assert plates == {"MINE-1"}
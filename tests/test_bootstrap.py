@@ -0,0 +1,71 @@
+# tests/test_bootstrap.py
+import json
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.management.commands.bootstrap import STATIC_FINGERPRINT_FILE, pending_migrations
+from accounts.roles import ROLE_GROUPS, sync_role_permissions
+
+pytestmark = pytest.mark.django_db
+
+
+def _codenames(group):
+    return set(Group.objects.get(name=group).permissions.values_list("codename", flat=True))
+
+
+def test_roles_created_then_unchanged():
+    first = sync_role_permissions()
+    assert first["groups_created"] == len(ROLE_GROUPS) and first["added"] > 0
+    assert _codenames("finance") == {"view_payment", "change_payment", "view_booking", "view_car"}
+    assert Group.objects.get(name="admin").permissions.count() == Permission.objects.count()
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert sync_role_permissions() == {"groups_created": 0, "added": 0, "removed": 0}
+    writes = [q["sql"] for q in ctx.captured_queries if q["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE")]
+    assert writes == [] and len(ctx.captured_queries) <= 6
+
+
+def test_roles_converge_after_manual_edit():
+    sync_role_permissions()
+    support = Group.objects.get(name="support")
+    support.permissions.add(Permission.objects.get(codename="delete_car"))
+    support.permissions.remove(Permission.objects.get(codename="view_payment"))
+
+    assert sync_role_permissions() == {"groups_created": 0, "added": 1, "removed": 1}
+    assert _codenames("support") == {"view_car", "view_booking", "change_booking", "view_payment", "view_document"}
+
+
+def test_migrate_skipped_when_nothing_pending(settings, tmp_path, capsys):
+    settings.STATIC_ROOT = tmp_path / "static"
+    assert pending_migrations() == set()
+    call_command("bootstrap", "--skip-static", "--json")
+    report = json.loads(capsys.readouterr().out)
+    steps = {s["step"]: s for s in report["steps"]}
+    assert steps["migrate"]["status"] == "skipped"
+    assert steps["collectstatic"]["status"] == "disabled"
+    assert steps["roles"]["status"] == "ran"
+    assert all(s["ms"] >= 0 for s in report["steps"]) and report["total_ms"] >= 0
+
+
+def test_collectstatic_skipped_when_fingerprint_matches(settings, tmp_path, capsys):
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "app.css").write_text("body{}")
+    settings.STATICFILES_DIRS = [source]
+    settings.STATIC_ROOT = tmp_path / "static"
+
+    def run():
+        call_command("bootstrap", "--skip-migrate", "--skip-roles", "--json")
+        return json.loads(capsys.readouterr().out)["steps"][1]["status"]
+
+    assert run() == "ran"
+    assert (settings.STATIC_ROOT / "app.css").exists() and (settings.STATIC_ROOT / STATIC_FINGERPRINT_FILE).exists()
+    assert run() == "skipped"
+
+    (source / "app.js").write_text("1")
+    assert run() == "ran"
+    assert (settings.STATIC_ROOT / "app.js").exists()
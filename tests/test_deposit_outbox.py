@@ -0,0 +1,137 @@
+# tests/test_deposit_outbox.py
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from rental.models import DepositOutbox, Payment
+from rental.payments.gateways import DepositResult, MockStripeGateway, PaymentGateway
+from rental.payments.http import CircuitOpen
+from rental.services.booking_service import BookingService
+from rental.services.deposits import DepositWorker
+
+pytestmark = pytest.mark.django_db
+
+
+class DecliningGateway(PaymentGateway):
+    def create_deposit(self, *, booking, amount_cents, meta=None):
+        return DepositResult(ok=False, provider="test", transaction_id=None, error="card_declined")
+
+
+class FlakyGateway(PaymentGateway):
+    def create_deposit(self, *, booking, amount_cents, meta=None):
+        raise TimeoutError("gateway timed out")
+
+
+class OpenCircuitGateway(PaymentGateway):
+    def create_deposit(self, *, booking, amount_cents, meta=None):
+        raise CircuitOpen("payment provider circuit is open", retry_after_s=30)
+
+
+@pytest.fixture
+def booked(customer, car_factory):
+    start = timezone.now() + timezone.timedelta(days=1)
+    return BookingService().create_booking(
+        user=customer, car=car_factory(), start=start, end=start + timezone.timedelta(days=1), deposit_cents=10000
+    )
+
+
+def test_outbox_row_written_with_booking(booked):
+    row = DepositOutbox.objects.get(booking=booked)
+    assert row.status == "pending" and row.amount_cents == 10000
+    # the gateway isn't called inside the booking transaction
+    assert not Payment.objects.filter(booking=booked).exists()
+
+
+def test_no_outbox_row_without_deposit(customer, car_factory):
+    start = timezone.now() + timezone.timedelta(days=1)
+    booking = BookingService().create_booking(user=customer, car=car_factory(), start=start,
+                                              end=start + timezone.timedelta(days=1))
+    assert not DepositOutbox.objects.filter(booking=booking).exists()
+
+
+def test_worker_delivers_and_upserts_payment(booked):
+    report = DepositWorker(MockStripeGateway()).run_once()
+    assert (report.claimed, report.succeeded) == (1, 1)
+    assert Payment.objects.get(booking=booked).status == "succeeded"
+    row = DepositOutbox.objects.get(booking=booked)
+    assert row.status == "done" and row.attempts == 1 and row.processed_at
+    assert DepositWorker(MockStripeGateway()).run_once().claimed == 0
+
+
+def test_declined_deposit_is_final(booked):
+    report = DepositWorker(DecliningGateway()).run_once()
+    assert report.declined == 1
+    assert Payment.objects.get(booking=booked).status == "failed"
+    row = DepositOutbox.objects.get(booking=booked)
+    assert row.status == "done" and row.last_error == "card_declined"
+
+
+def test_gateway_error_is_retried_with_backoff(booked):
+    before = timezone.now()
+    report = DepositWorker(FlakyGateway(), backoff_base_s=10).run_once()
+    assert report.retried == 1 and "TimeoutError" in report.errors[0]
+    row = DepositOutbox.objects.get(booking=booked)
+    assert row.status == "pending" and row.attempts == 1
+    assert row.available_at >= before + timezone.timedelta(seconds=5)
+    assert not Payment.objects.filter(booking=booked).exists()
+
+
+def test_gives_up_after_max_attempts(booked):
+    worker = DepositWorker(FlakyGateway(), max_attempts=2, backoff_base_s=0)
+    assert worker.run_once().retried == 1
+    report = worker.run_once()
+    assert report.gave_up == 1
+    assert DepositOutbox.objects.get(booking=booked).status == "failed"
+    assert Payment.objects.get(booking=booked).status == "failed"
+
+
+def test_circuit_open_is_not_an_attempt(booked):
+    before = timezone.now()
+    worker = DepositWorker(OpenCircuitGateway(), max_attempts=1)
+    report = worker.run_once()
+    assert (report.deferred, report.gave_up) == (1, 0)
+    row = DepositOutbox.objects.get(booking=booked)
+    assert (row.status, row.attempts) == ("pending", 0)
+    assert row.available_at >= before + timezone.timedelta(seconds=30)  # when the breaker lets calls through
+    assert not Payment.objects.filter(booking=booked).exists()
+
+
+def test_claim_leases_rows(booked):
+    worker = DepositWorker(MockStripeGateway(), lease_s=60)
+    assert [r.booking_id for r in worker.claim()] == [booked.pk]
+    # still within the lease: neither this nor another worker sees it again
+    assert worker.claim() == []
+
+
+def test_claims_count_as_attempts(booked):
+    # Every claimed delivery crashes the worker: the row is re-claimed once its lease expires
+    worker = DepositWorker(MockStripeGateway(), max_attempts=2, lease_s=0)
+    worker.claim()
+    worker.claim()
+    assert DepositOutbox.objects.get(booking=booked).attempts == 2
+    report = worker.run_once()
+    assert report.gave_up == 1 and report.succeeded == 0
+    row = DepositOutbox.objects.get(booking=booked)
+    assert (row.status, row.attempts) == ("failed", 3)
+    assert Payment.objects.get(booking=booked).status == "failed"
+
+
+def test_outcome_after_lease_expiry_is_dropped(booked):
+    class SlowWorker(DepositWorker):
+        def deliver(self, rows):
+            outcomes = super().deliver(rows)
+            # meanwhile the lease ran out and another worker delivered the row
+            assert DepositWorker(MockStripeGateway()).run_once().succeeded == 1
+            return outcomes
+
+    report = SlowWorker(DecliningGateway(), lease_s=0).run_once()
+    assert (report.lease_lost, report.declined) == (1, 0)
+    assert Payment.objects.get(booking=booked).status == "succeeded"
+    row = DepositOutbox.objects.get(booking=booked)
+    assert (row.status, row.last_error, row.attempts) == ("done", "", 2)
+
+
+def test_process_deposits_command(booked, capsys):
+    call_command("process_deposits", "--once")
+    assert "succeeded=1" in capsys.readouterr().out
+    assert Payment.objects.get(booking=booked).status == "succeeded"
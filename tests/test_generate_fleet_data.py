@@ -0,0 +1,64 @@
+# tests/test_generate_fleet_data.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+
+from rental.management.commands.generate_fleet_data import car_bookings
+from rental.models import Booking, Payment, PaymentDailyRollup
+
+pytestmark = pytest.mark.django_db
+
+ANCHOR = "2026-03-01"
+ARGS = ["--cars", "4", "--users", "6", "--staff", "1", "--bookings-per-car", "60", "--seed", "7",
+        "--anchor", ANCHOR, "--history-days", "60"]
+
+
+def _generate(*extra):
+    call_command("generate_fleet_data", *ARGS, *extra, stdout=StringIO())
+
+
+def _snapshot():
+    return list(
+        Booking.objects.order_by("car__plate_no", "start")
+        .values_list("car__plate_no", "customer__username", "start", "end", "status", "payment__amount_cents")
+    )
+
+
+def test_windows_are_valid_and_never_overlap():
+    anchor = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+    rows = list(car_bookings(1, 0, anchor - timedelta(days=30), 500, anchor))
+    assert len(rows) == 500
+    assert all(start < end for start, end, _, _ in rows)
+    assert all(prev[1] <= nxt[0] for prev, nxt in zip(rows, rows[1:]))
+    assert {status for _, end, status, _ in rows if end <= anchor} <= {"completed", "cancelled"}
+    assert {status for start, _, status, _ in rows if start >= anchor} <= {"pending", "confirmed", "cancelled"}
+
+
+def test_generates_users_cars_bookings_and_payments():
+    _generate()
+    User = get_user_model()
+    users = User.objects.filter(username__startswith="gen-")
+    assert users.filter(role="customer").count() == 6 and users.exclude(role="customer").count() == 3
+    assert all(u.groups.filter(name=u.role).exists() for u in users)
+    assert users.first().check_password("fleet-data")
+
+    assert Booking.objects.count() == 240
+    paid = Payment.objects.select_related("booking")
+    assert paid.exists() and all(p.booking.status != "pending" for p in paid)
+    assert not Booking.objects.filter(status__in=["completed", "confirmed"], payment__isnull=True).exists()
+    succeeded = Payment.objects.filter(status="succeeded").aggregate(s=Sum("amount_cents"))["s"]
+    assert PaymentDailyRollup.objects.aggregate(s=Sum("succeeded_cents"))["s"] == succeeded
+
+
+def test_same_seed_same_data_regardless_of_batch_size():
+    _generate("--batch-size", "1000")
+    first = _snapshot()
+    with pytest.raises(CommandError):
+        _generate()
+    _generate("--clear", "--batch-size", "7")
+    assert _snapshot() == first
@@ -0,0 +1,129 @@
+# tests/test_idempotency.py
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.auth import ROLE_TO_SCOPES
+from rental.models import Booking, DepositOutbox, IdempotencyRecord
+from rental.services import idempotency
+from rental.services.idempotency import IdempotencyStore
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client(api_client, make_user):
+    u = make_user("idem-cust")
+    api_client.force_authenticate(u, token={"role": "customer", "scp": " ".join(ROLE_TO_SCOPES["customer"])})
+    api_client.user = u
+    return api_client
+
+
+def payload(car, days=1):
+    start = timezone.now() + timezone.timedelta(days=days)
+    return {"car": car.id, "start": start.isoformat(), "end": (start + timezone.timedelta(days=1)).isoformat()}
+
+
+def post(client, data, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post(reverse("booking-list"), data, format="json", headers=headers)
+
+
+def test_retry_replays_first_response(client, car_factory):
+    data = payload(car_factory())
+    first = post(client, data, key="k-1")
+    assert first.status_code == 201, first.content
+    retry = post(client, data, key="k-1")
+    assert retry.status_code == 201
+    assert retry["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert Booking.objects.count() == 1 and DepositOutbox.objects.count() == 1
+
+
+def test_replay_survives_cache_loss(client, car_factory):
+    from django.core.cache import cache
+    data = payload(car_factory())
+    first = post(client, data, key="k-db")
+    cache.clear()
+    retry = post(client, data, key="k-db")
+    assert retry["Idempotent-Replayed"] == "true" and retry.json() == first.json()
+
+
+def test_without_key_every_post_runs(client, car_factory):
+    car = car_factory()
+    assert post(client, payload(car, 1)).status_code == 201
+    assert post(client, payload(car, 5)).status_code == 201
+    assert not IdempotencyRecord.objects.exists()
+
+
+def test_key_reused_with_other_body_is_rejected(client, car_factory):
+    car = car_factory()
+    post(client, payload(car, 1), key="k-2")
+    r = post(client, payload(car, 5), key="k-2")
+    assert r.status_code == 422 and r.json()["error"]["code"] == "idempotency_key_reused"
+    assert Booking.objects.count() == 1
+
+
+def test_failed_request_releases_the_key(client, car_factory, booking_factory):
+    car = car_factory()
+    data = payload(car)
+    booking_factory(customer=client.user, car=car, start=timezone.now() + timezone.timedelta(hours=12),
+                    end=timezone.now() + timezone.timedelta(days=3))
+    assert post(client, data, key="k-3").status_code == 400
+    assert not IdempotencyRecord.objects.filter(key="k-3").exists()
+
+
+def test_in_flight_duplicate_waits_for_the_outcome(client, car_factory, monkeypatch):
+    car = car_factory()
+    data = payload(car)
+    first = post(client, data, key="k-4")
+    record = IdempotencyRecord.objects.get(key="k-4")
+    done = {"status": record.response_status, "body": record.response_body}
+    # Rewind to "still running": the duplicate finds the claim and polls
+    IdempotencyRecord.objects.filter(pk=record.pk).update(status="in_progress", response_status=None,
+                                                          response_body=None)
+    from django.core.cache import cache
+    cache.clear()
+    sleeps = []
+
+    def owner_finishes(delay):
+        sleeps.append(delay)
+        IdempotencyRecord.objects.filter(pk=record.pk).update(status="done", response_status=done["status"],
+                                                              response_body=done["body"])
+    monkeypatch.setattr(idempotency.time, "sleep", owner_finishes)
+
+    retry = post(client, data, key="k-4")
+    assert sleeps and retry.json() == first.json()
+    assert Booking.objects.count() == 1
+
+
+def test_in_flight_duplicate_gives_up_with_409(customer):
+    store = IdempotencyStore(wait_s=0.05)
+    assert isinstance(store.claim(customer.pk, "k-5", "fp"), IdempotencyRecord)
+    with pytest.raises(idempotency.IdempotencyKeyInUse):
+        store.claim(customer.pk, "k-5", "fp")
+
+
+def test_stale_claim_is_taken_over(customer):
+    store = IdempotencyStore(lock_ttl_s=60)
+    record = store.claim(customer.pk, "k-6", "fp")
+    IdempotencyRecord.objects.filter(pk=record.pk).update(locked_at=timezone.now() - timezone.timedelta(minutes=5))
+    again = store.claim(customer.pk, "k-6", "fp")
+    assert isinstance(again, IdempotencyRecord) and again.pk == record.pk
+
+
+def test_purge_deletes_only_expired_records(customer):
+    store = IdempotencyStore(ttl_s=3600)
+    for i in range(5):
+        store.claim(customer.pk, f"old-{i}", "fp")
+    IdempotencyRecord.objects.update(created_at=timezone.now() - timezone.timedelta(hours=2))
+    store.claim(customer.pk, "fresh", "fp")
+    assert store.purge_expired(batch_size=2) == 5
+    assert list(IdempotencyRecord.objects.values_list("key", flat=True)) == ["fresh"]
+
+    out = StringIO()
+    call_command("purge_idempotency_keys", stdout=out)
+    assert "Deleted 0" in out.getvalue()
@@ -0,0 +1,99 @@
+# tests/test_logging.py
+import io
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory
+
+from lcr import exceptions
+from lcr.exceptions import custom_exception_handler
+from lcr.log import JsonFormatter, LogSampler, QueueingStreamHandler
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """JSON lines written through a QueueingStreamHandler on lcr.exceptions."""
+    stream = io.StringIO()
+    handler = QueueingStreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    log = logging.getLogger("lcr.exceptions")
+    log.addHandler(handler)
+    monkeypatch.setattr(log, "level", logging.INFO)
+
+    def lines():
+        handler.flush_and_stop()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield lines
+    log.removeHandler(handler)
+    handler.flush_and_stop()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(exceptions, "_client_errors", LogSampler(60, clock=lambda: now[0]))
+    return now
+
+
+def _context(view=None):
+    request = APIRequestFactory().post("/api/v1/bookings/")
+    request.request_id = "req-1"
+    return {"request": request, "view": view}
+
+
+def test_sampler_lets_one_through_per_interval():
+    now = [0.0]
+    sampler = LogSampler(10, clock=lambda: now[0])
+    assert sampler.allow("a") == (True, 0)
+    assert sampler.allow("a") == (False, 0) and sampler.allow("a") == (False, 0)
+    assert sampler.allow("b") == (True, 0)
+    now[0] = 10
+    assert sampler.allow("a") == (True, 2)
+    assert LogSampler(0).allow("a") == (True, 0)
+
+
+def test_repeated_validation_errors_are_sampled(captured, clock):
+    for _ in range(5):
+        resp = custom_exception_handler(ValidationError({"start": ["bad"]}), _context())
+        assert resp.status_code == 400 and resp.data["error"]["code"] == "bad_request"
+    clock[0] = 61
+    custom_exception_handler(ValidationError({"start": ["bad"]}), _context())
+
+    entries = captured()
+    assert [e["level"] for e in entries] == ["INFO", "INFO"]
+    assert [e["suppressed"] for e in entries] == [0, 4]
+    assert all("exc" not in e for e in entries)  # no traceback for 4xx
+
+
+def test_unhandled_exception_logged_once_with_traceback(captured):
+    try:
+        raise RuntimeError("db went away")
+    except RuntimeError as exc:
+        resp = custom_exception_handler(exc, _context())
+    assert resp.status_code == 500 and resp.data["trace_id"] == "req-1"
+    assert resp._has_been_logged  # django.request won't log it a second time
+
+    [entry] = captured()
+    assert entry["level"] == "ERROR"
+    assert "RuntimeError: db went away" in entry["exc"] and entry["method"] == "POST"
+
+
+@pytest.mark.django_db
+def test_records_carry_request_trace_id(api_client, captured, clock):
+    resp = api_client.get(reverse("vehicle-list"), HTTP_X_REQUEST_ID="trace-abc")
+    assert resp.status_code == 401
+
+    [entry] = captured()
+    assert entry["trace_id"] == "trace-abc" and entry["status"] == 401
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = QueueingStreamHandler(io.StringIO(), queue_size=1)
+    record = logging.makeLogRecord({"msg": "x"})
+    handler.enqueue(record)
+    handler.enqueue(record)  # listener never started: nothing drains
+    assert handler.dropped == 1
@@ -0,0 +1,72 @@
+# tests/test_login.py
+import asyncio
+import threading
+
+import pytest
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.serializers import resolve_login_user
+from lcr.executors import BoundedExecutor, Overloaded
+
+PASSWORD = "VeryStrong!Pass1"
+
+@pytest.fixture
+def ali(make_user):
+    u = make_user("Ali", email="Ali@Example.com")
+    u.set_password(PASSWORD)
+    u.save()
+    return u
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("given", ["ali", "ALI", "ali@example.com", "ALI@EXAMPLE.COM"])
+def test_login_user_resolved_in_one_query(ali, given):
+    with CaptureQueriesContext(connection) as ctx:
+        assert resolve_login_user(given) == ali
+    assert len(ctx.captured_queries) == 1
+    assert "LOWER" in ctx.captured_queries[0]["sql"].upper()
+
+@pytest.mark.django_db
+def test_sync_login_rejects_bad_password_and_inactive(api_client, ali, hs256_tokens):
+    url = reverse("login")
+    assert api_client.post(url, {"username_or_email": "ali@example.com", "password": PASSWORD}).status_code == 200
+    assert api_client.post(url, {"username_or_email": "ali", "password": "nope"}).status_code == 400
+    ali.is_active = False
+    ali.save()
+    assert api_client.post(url, {"username_or_email": "ali", "password": PASSWORD}).status_code == 400
+
+@pytest.mark.django_db(transaction=True)  # the view's DB work runs on executor threads
+def test_async_login_matches_sync_contract(ali, hs256_tokens):
+    client = AsyncClient()
+    url = reverse("login-async")
+
+    async def go():
+        ok = await client.post(url, {"username_or_email": "ALI@example.com", "password": PASSWORD},
+                               content_type="application/json")
+        bad = await client.post(url, {"username_or_email": "ali", "password": "nope"},
+                                content_type="application/json")
+        return ok, bad
+
+    ok, bad = asyncio.run(go())
+    assert ok.status_code == 200, ok.content
+    body = ok.json()
+    assert body["success"] and body["data"]["user"]["id"] == ali.id
+    assert body["data"]["tokens"]["access"] and ok["X-Request-ID"]
+    assert bad.status_code == 400 and bad.json()["error"]["details"]["password"]
+
+def test_bounded_executor_sheds_load_past_in_flight_cap():
+    executor = BoundedExecutor("test", max_workers=1, max_in_flight=1)
+    release = threading.Event()
+
+    async def go():
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded):
+            await executor.run(lambda: None)
+        release.set()
+        assert await first is True
+        return await executor.run(lambda: "slot freed")
+
+    assert asyncio.run(go()) == "slot freed"
@@ -0,0 +1,135 @@
+# tests/test_metrics.py
+import multiprocessing
+import time
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from lcr.metrics import BUCKETS_S, MetricsFile, RequestTimings, current_timings, get_metrics_store, timed
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def admin_client(api_client, make_user, add_perms):
+    user = add_perms(make_user("boss", role="admin", is_staff=True), ["add_car", "change_car", "view_booking"])
+    api_client.force_authenticate(user)
+    return api_client
+
+
+def _row(view_name, method="GET"):
+    rows = [r for r in get_metrics_store().read()
+            if r["labels"]["route"] == view_name and r["labels"]["method"] == method]
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_server_timing_header_for_staff_roles(admin_client, car_factory):
+    car_factory(plate_no="MTR-1")
+    resp = admin_client.get(reverse("vehicle-list"))
+    assert resp.status_code == 200
+    parts = dict(p.strip().split(";", 1) for p in resp["Server-Timing"].split(","))
+    assert set(parts) == {"db", "perm", "ser", "total"}
+    assert 'queries"' in parts["db"] and not parts["db"].startswith('dur=0.0;desc="0 ')
+
+
+def test_server_timing_hidden_from_customers(api_client, customer):
+    api_client.force_authenticate(customer)
+    assert "Server-Timing" not in api_client.get(reverse("booking-list"))
+    with override_settings(SERVER_TIMING="all"):
+        assert "Server-Timing" in api_client.get(reverse("booking-list"))
+    with override_settings(SERVER_TIMING="off", SERVER_TIMING_ROLES={"customer"}):
+        assert "Server-Timing" not in api_client.get(reverse("booking-list"))
+
+
+def test_requests_aggregate_per_route(admin_client, car_factory):
+    car_factory(plate_no="MTR-2")
+    for _ in range(3):
+        admin_client.get(reverse("vehicle-list"), {"make": "x"})
+    admin_client.get(reverse("booking-list"))
+
+    row = _row("vehicle-list")
+    assert row["labels"]["status"] == "2xx"
+    assert row["total"]["buckets"][-1] == 3 and row["total"]["sum"] > 0
+    assert row["db_queries"] >= 3 and row["db"]["buckets"][-1] == 3
+    assert row["serialize"]["sum"] > 0
+    assert _row("booking-list")["total"]["buckets"][-1] == 1
+
+
+def test_prometheus_exposition(admin_client, api_client, settings):
+    settings.METRICS_TOKEN = "scrape-secret"
+    admin_client.get(reverse("booking-list"))
+    body = api_client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret").content.decode()
+    assert "# TYPE lcr_http_request_duration_seconds histogram" in body
+    assert 'lcr_http_request_duration_seconds_count{route="booking-list",method="GET",status="2xx"} 1' in body
+    assert 'lcr_http_request_phase_seconds_bucket{route="booking-list",method="GET",status="2xx",phase="db",le="+Inf"} 1' in body
+    assert 'lcr_http_request_db_queries_total{route="booking-list"' in body
+
+
+def test_metrics_token(api_client, settings):
+    settings.METRICS_TOKEN = "scrape-secret"
+    assert api_client.get("/api/metrics").status_code == 401
+    assert api_client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 401
+    assert api_client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret").status_code == 200
+
+
+def test_metrics_closed_without_token(api_client, settings):
+    settings.METRICS_TOKEN = ""
+    assert api_client.get("/api/metrics").status_code == 404
+    settings.DEBUG = True
+    assert api_client.get("/api/metrics").status_code == 200
+
+
+def test_phases_exclude_nested_db_time():
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        with timed("serialize"):
+            with timed("serialize"):  # nested: counted once
+                time.sleep(0.05)
+                timings.db_s += 0.05  # as if the sleep had been a query
+    finally:
+        current_timings.reset(token)
+    assert 0 <= timings.serialize_s < 0.02
+
+
+def test_buckets_are_cumulative(tmp_path):
+    store = MetricsFile(str(tmp_path / "m.bin"), slots=8)
+    store.record(("r", "GET", "2xx"), {"total": 0.02, "db": 0.0, "perm": 0.0, "serialize": 0.0}, 2)
+    [row] = store.read()
+    expected = [1 if 0.02 <= b else 0 for b in BUCKETS_S] + [1]
+    assert list(row["total"]["buckets"]) == expected and row["db_queries"] == 2
+    store.close()
+
+
+def test_full_table_overflows_into_one_row(tmp_path):
+    store = MetricsFile(str(tmp_path / "m.bin"), slots=4)
+    zero = dict.fromkeys(("total", "db", "perm", "serialize"), 0.0)
+    for i in range(6):
+        store.record((f"r{i}", "GET", "2xx"), zero, 1)
+    rows = store.read()
+    assert len(rows) == 4 and sum(r["db_queries"] for r in rows) == 6
+    assert any(r["labels"]["route"] == "__overflow__" for r in rows)
+    store.close()
+
+
+def _record_many(path, n):
+    store = MetricsFile(path, slots=16)
+    zero = dict.fromkeys(("total", "db", "perm", "serialize"), 0.001)
+    for _ in range(n):
+        store.record(("shared", "GET", "2xx"), zero, 1)
+    store.close()
+
+
+def test_workers_share_one_table(tmp_path):
+    path = str(tmp_path / "m.bin")
+    MetricsFile(path, slots=16).close()
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_record_many, args=(path, 200)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    [row] = MetricsFile(path, slots=16).read()
+    assert row["total"]["buckets"][-1] == 800 and row["db_queries"] == 800
@@ -0,0 +1,89 @@
+# tests/test_pagination.py
+import json
+from base64 import urlsafe_b64encode
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+pytestmark = pytest.mark.django_db
+
+def auth(client, user):
+    client.force_authenticate(user)
+    return client
+
+def walk(client, url, params=None):
+    """Follow `next` links; return (pages, items)."""
+    pages, items = [], []
+    body = client.get(url, params or {}).json()["data"]
+    while True:
+        pages.append(body)
+        items.extend(body["items"])
+        if not body["next"]:
+            return pages, items
+        body = client.get(body["next"]).json()["data"]
+
+def test_bookings_keyset_order_with_tied_starts(api_client, customer, car_factory, booking_factory):
+    start = timezone.now() + timezone.timedelta(days=1)
+    # 7 bookings sharing one start time (different cars) + 3 later ones
+    for i in range(7):
+        booking_factory(customer=customer, car=car_factory(plate_no=f"TIE-{i}"), start=start)
+    for i in range(3):
+        later = start + timezone.timedelta(days=10 + i)
+        booking_factory(customer=customer, car=car_factory(plate_no=f"LATE-{i}"), start=later)
+
+    pages, items = walk(auth(api_client, customer), reverse("booking-list"), {"page_size": 3})
+    assert [len(p["items"]) for p in pages] == [3, 3, 3, 1]
+    keys = [(parse_datetime(i["start"]), i["id"]) for i in items]
+    assert len({k[1] for k in keys}) == 10  # nothing skipped or repeated across pages
+    assert keys == sorted(keys, key=lambda k: (-k[0].timestamp(), k[1]))  # (-start, id)
+
+def test_prev_link_returns_previous_page(api_client, staff_writer, car_factory):
+    for i in range(6):
+        car_factory(plate_no=f"PRV-{i}")
+    client = auth(api_client, staff_writer)
+    first = client.get(reverse("vehicle-list"), {"page_size": 2}).json()["data"]
+    second = client.get(first["next"]).json()["data"]
+    back = client.get(second["prev"]).json()["data"]
+    assert [i["id"] for i in back["items"]] == [i["id"] for i in first["items"]]
+    assert back["prev"] is None
+
+def test_page_size_is_capped_server_side(api_client, staff_writer, car_factory, monkeypatch):
+    from rental.pagination import EnvelopeCursorPagination
+    for i in range(5):
+        car_factory(plate_no=f"CAP-{i}")
+    client = auth(api_client, staff_writer)
+    monkeypatch.setattr(EnvelopeCursorPagination, "max_page_size", 2)
+    body = client.get(reverse("vehicle-list"), {"page_size": 1000}).json()["data"]
+    assert len(body["items"]) == 2 and body["next"]
+
+def test_list_runs_no_count_or_offset(api_client, staff_writer, car_factory):
+    for i in range(3):
+        car_factory(plate_no=f"NOC-{i}")
+    client = auth(api_client, staff_writer)
+    first = client.get(reverse("vehicle-list"), {"page_size": 1}).json()["data"]
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(first["next"])
+    assert res.status_code == 200
+    sql = " ".join(q["sql"].upper() for q in ctx.captured_queries)
+    assert "COUNT(" not in sql and "OFFSET" not in sql
+
+def test_invalid_cursor_is_404(api_client, staff_writer):
+    res = auth(api_client, staff_writer).get(reverse("vehicle-list"), {"cursor": "not-a-cursor"})
+    assert res.status_code == 404
+
+@pytest.mark.parametrize("position", [
+    ["abc", 1],                       # not a datetime
+    ["2026-03-01T10:00:00+00:00", "x"],  # not an id
+    [{"a": 1}, 1],
+    [None, 1],
+    "ab",
+])
+def test_malformed_cursor_values_are_404(api_client, customer, position):
+    raw = json.dumps({"p": position, "r": 0}).encode("ascii")
+    cursor = urlsafe_b64encode(raw).decode("ascii")
+    res = auth(api_client, customer).get(reverse("booking-list"), {"cursor": cursor})
+    assert res.status_code == 404
@@ -0,0 +1,171 @@
+# tests/test_payment_http_gateway.py
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+
+from rental.models import DepositOutbox, Payment
+from rental.payments.http import CircuitBreaker, CircuitOpen, GatewayUnavailable, HTTPDepositGateway
+from rental.services.booking_service import BookingService
+from rental.services.deposits import DepositWorker
+
+
+class StubProvider(ThreadingHTTPServer):
+    """Local deposit API with injectable latency and status codes."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.latency = 0.0
+        self.status = 200
+        self.requests = []
+        self.connections = set()
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        pass  # clients that timed out hang up mid-response
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with srv.lock:
+            srv.connections.add(self.client_address)
+            srv.requests.append({"path": self.path, "body": body, "key": self.headers.get("Idempotency-Key")})
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        time.sleep(srv.latency)
+        with srv.lock:
+            srv.in_flight -= 1
+        if srv.status == 200:
+            payload = {"id": f"dep_{body['reference']}", "status": "succeeded"}
+        else:
+            payload = {"error": "card_declined" if srv.status == 402 else "upstream"}
+        raw = json.dumps(payload).encode()
+        self.send_response(srv.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+@pytest.fixture
+def provider():
+    srv = StubProvider()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def bookings(n):
+    return [{"booking": SimpleNamespace(id=i), "amount_cents": 10000} for i in range(1, n + 1)]
+
+
+def gateway(provider, **kw):
+    return HTTPDepositGateway(base_url=provider.url, **kw)
+
+
+def run_batch(gw, deposits):
+    async def go():
+        try:
+            return await gw.create_deposits(deposits)
+        finally:
+            await gw.aclose()
+    return asyncio.run(go())
+
+
+def test_deposit_succeeds_with_idempotency_key(provider):
+    result = gateway(provider).create_deposit(booking=SimpleNamespace(id=7), amount_cents=500)
+    assert result.ok and result.transaction_id == "dep_booking-7"
+    assert provider.requests[0]["key"] == "deposit-7"
+    assert provider.requests[0]["body"]["amount"] == 500
+
+
+def test_batch_reuses_pooled_connections_within_concurrency_limit(provider):
+    provider.latency = 0.02
+    results = run_batch(gateway(provider, max_connections=4, max_concurrency=4), bookings(40))
+    assert all(r.ok for r in results)
+    assert len(provider.requests) == 40
+    assert len(provider.connections) <= 4  # keep-alive: no connection per deposit
+    assert provider.max_in_flight <= 4
+
+
+def test_declined_is_a_result_not_an_error(provider):
+    provider.status = 402
+    gw = gateway(provider, breaker_failures=1)
+    [result] = run_batch(gw, bookings(1))
+    assert not result.ok and result.error == "card_declined"
+    assert gw.breaker.state == "closed"
+
+
+def test_timeout_is_retryable(provider):
+    provider.latency = 0.5
+    [result] = run_batch(gateway(provider, timeout_s=0.1), bookings(1))
+    assert isinstance(result, GatewayUnavailable) and "Timeout" in str(result)
+
+
+def test_breaker_opens_and_fails_fast(provider):
+    provider.status = 503
+    gw = gateway(provider, breaker_failures=3, breaker_reset_s=60, max_concurrency=1)
+    results = run_batch(gw, bookings(10))
+    assert len(provider.requests) == 3  # the rest never reached the provider
+    assert all(isinstance(r, GatewayUnavailable) for r in results)
+    assert sum(isinstance(r, CircuitOpen) for r in results) == 7
+    assert gw.breaker.state == "open"
+
+
+def test_breaker_half_open_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(failures=2, reset_s=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpen) as exc:
+        breaker.before_call()
+    assert exc.value.retry_after_s == 10
+    now[0] = 11
+    breaker.before_call()  # the probe
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 22
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.django_db
+def test_deposit_worker_batches_through_async_gateway(provider, customer, car_factory):
+    start = timezone.now() + timezone.timedelta(days=1)
+    service = BookingService()
+    booked = [
+        service.create_booking(user=customer, car=car_factory(plate_no=f"HTTP-{i}"), start=start,
+                               end=start + timezone.timedelta(days=1), deposit_cents=10000)
+        for i in range(5)
+    ]
+    worker = DepositWorker(gateway(provider, max_connections=2))
+    try:
+        assert worker.run_once().succeeded == 5
+    finally:
+        worker.close()
+    assert Payment.objects.filter(booking__in=booked, status="succeeded").count() == 5
+    assert not DepositOutbox.objects.filter(status="pending").exists()
+    assert len(provider.connections) <= 2
@@ -0,0 +1,152 @@
+# tests/test_query_budgets.py
+"""
+SQL query budgets per API route and role.
+
+Every route in ROUTES is called as each role in ROLES with 1, 10 and 1000
+bookings (each on its own car, with a payment) visible to it. A route fails if
+
+  * its query count changes with the row count (an N+1: a serializer field,
+    a lazy relation, a per-row permission check), or
+  * it runs more queries than tests/query_budgets.json allows.
+
+DRF routes authenticate a fresh model user per request (force_authenticate),
+so role-based has_perm() checks hit the permission tables like a scopeless
+token would; the async routes use a bearer token (claims only). Caches are
+cleared before each call, so cached responses don't hide queries.
+
+After an intended change in query count, regenerate the budgets with
+
+    UPDATE_QUERY_BUDGETS=1 python -m pytest tests/test_query_budgets.py
+
+and commit the diff.
+"""
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.auth import tokens_for_user
+from accounts.roles import sync_role_permissions
+from rental.models import Booking, Car, Payment
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("hs256_tokens")]
+
+BUDGET_FILE = Path(__file__).with_name("query_budgets.json")
+UPDATE = os.getenv("UPDATE_QUERY_BUDGETS") == "1"
+ROW_COUNTS = (1, 10, 1000)
+ROLES = ("customer", "fleet_manager", "support", "finance")
+
+
+def _window(days):
+    start = (timezone.now() + timedelta(days=days)).replace(microsecond=0)
+    return {"start": start.isoformat(), "end": (start + timedelta(hours=2)).isoformat()}
+
+
+# route -> (method, url name, auth, request data for a given row count)
+ROUTES = {
+    "vehicles.list": ("get", "vehicle-list", "model", lambda n: {}),
+    "vehicles.available": ("get", "vehicle-available", "model", lambda n: _window(30)),
+    "bookings.list": ("get", "booking-list", "model", lambda n: {}),
+    "bookings.create": ("post", "booking-list", "model", lambda n: {"car": "first", **_window(60 + n)}),
+    "bookings.export.ndjson": ("get", "booking-export", "model", lambda n: {"format": "ndjson"}),
+    "bookings.export.csv": ("get", "booking-export", "model", lambda n: {"format": "csv"}),
+    "async.vehicles.list": ("get", "async-vehicle-list", "bearer", lambda n: {}),
+    "async.bookings.list": ("get", "async-booking-list", "bearer", lambda n: {}),
+}
+
+
+@pytest.fixture
+def role_users(make_user, settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]  # four users per test
+    sync_role_permissions()
+    users = {}
+    for role in ROLES:
+        user = make_user(f"qb-{role}", role=role, is_staff=role != "customer")
+        user.groups.add(Group.objects.get(name=role))
+        users[role] = user
+    return users
+
+
+def _grow(owner, total):
+    """Bring the data set to `total` past bookings by `owner`, one car and payment each."""
+    have = Car.objects.count()
+    if have >= total:
+        return
+    base = timezone.now().replace(microsecond=0) - timedelta(days=400)
+    cars = Car.objects.bulk_create([
+        Car(plate_no=f"QB-{i}", make="Toyota", model="Corolla", year=2022) for i in range(have, total)
+    ])
+    bookings = Booking.objects.bulk_create([
+        Booking(customer=owner, car=car, start=base + timedelta(hours=3 * i), end=base + timedelta(hours=3 * i + 2),
+                status="completed")
+        for i, car in enumerate(cars, start=have)
+    ])
+    Payment.objects.bulk_create([Payment(booking=b, amount_cents=10000, status="succeeded") for b in bookings])
+
+
+def _call(user, route, rows):
+    method, name, auth, data = ROUTES[route]
+    payload = data(rows)
+    if payload.get("car") == "first":
+        payload["car"] = Car.objects.order_by("id").values_list("id", flat=True).first()
+    fresh = type(user).objects.get(pk=user.pk)  # no permission cache carried between calls
+    api_client = APIClient()
+    if auth == "model":
+        api_client.force_authenticate(fresh)
+    else:
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(fresh)['access']}")
+    cache.clear()
+
+    with CaptureQueriesContext(connection) as ctx:
+        if method == "post":
+            res = api_client.post(reverse(name), payload, format="json")
+        else:
+            res = api_client.get(reverse(name), payload)
+        if res.streaming:
+            b"".join(res.streaming_content)
+    return len(ctx.captured_queries), res.status_code, ctx.captured_queries
+
+
+def _budgets() -> dict:
+    return json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {}
+
+
+def _save_budget(route, role, count):
+    budgets = _budgets()
+    budgets.setdefault(route, {})[role] = count
+    BUDGET_FILE.write_text(json.dumps(dict(sorted(budgets.items())), indent=2, sort_keys=True) + "\n")
+
+
+@pytest.mark.parametrize("role", ROLES)
+@pytest.mark.parametrize("route", ROUTES)
+def test_query_budget(role_users, route, role):
+    user = role_users[role]
+    counts, statuses = {}, set()
+    for rows in ROW_COUNTS:
+        _grow(role_users["customer"], rows)
+        counts[rows], status, queries = _call(user, route, rows)
+        statuses.add(status)
+    assert len(statuses) == 1, f"{route} as {role}: status changed with row count {statuses}"
+
+    assert len(set(counts.values())) == 1, (
+        f"{route} as {role}: query count grows with rows {counts}; last run:\n"
+        + "\n".join(q["sql"] for q in queries)
+    )
+    if UPDATE:
+        _save_budget(route, role, counts[ROW_COUNTS[-1]])
+        return
+    budget = _budgets().get(route, {}).get(role)
+    assert budget is not None, f"no budget for {route} as {role}; run with UPDATE_QUERY_BUDGETS=1"
+    assert counts[ROW_COUNTS[-1]] <= budget, (
+        f"{route} as {role}: {counts[ROW_COUNTS[-1]]} queries, budget {budget}:\n"
+        + "\n".join(q["sql"] for q in queries)
+    )
@@ -0,0 +1,110 @@
+# tests/test_query_plans.py
+"""
+Query-plan regression suite for the booking hot paths.
+
+Seeds a realistic volume once per module, ANALYZEs, then asserts that
+EXPLAIN for each hot query goes through the index we built for it and
+never falls back to a sequential/full scan of the big tables.
+Runs on whatever DATABASE_URL points at (SQLite locally, PostgreSQL in CI).
+"""
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from accounts.serializers import login_user_queryset
+from rental.models import Booking, Car
+from rental.services.availability import available_cars
+from rental.services.overlap import ACTIVE_BOOKING_STATUSES
+
+User = get_user_model()
+
+N_USERS = 500
+N_CARS = 2000
+BOOKINGS_PER_CAR = 12
+MAKES = [f"Make{i:02d}" for i in range(25)]
+
+# query -> {vendor: index expected in the plan}
+# SQLite can't prove a parameterized IN() implies a partial index predicate, so
+# overlap probes use the FK index there; PostgreSQL uses the partial index.
+EXPECTED_INDEX = {
+    "overlap_check": {"postgresql": "booking_car_active_win_idx", "sqlite": "rental_booking_car_id"},
+    "availability": {"postgresql": "car_make_lower_idx", "sqlite": "car_make_lower_idx"},
+    "availability_probe": {"postgresql": "booking_car_active_win_idx", "sqlite": "rental_booking_car_id"},
+    "customer_list": {"postgresql": "booking_customer_start_idx", "sqlite": "booking_customer_start_idx"},
+    "staff_list": {"postgresql": "booking_start_id_idx", "sqlite": "booking_start_id_idx"},
+    "vehicle_make_search": {"postgresql": "car_make_trgm_idx"},  # pg_trgm is PostgreSQL-only
+    "login_lookup": {"postgresql": "user_email_lower_idx", "sqlite": "user_email_lower_idx"},
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        users = User.objects.bulk_create([
+            User(username=f"plan-u{i}", email=f"plan-u{i}@example.com") for i in range(N_USERS)
+        ])
+        cars = Car.objects.bulk_create([
+            Car(plate_no=f"PLAN-{i}", make=MAKES[i % len(MAKES)], model=f"Model{i % 40}", year=2020)
+            for i in range(N_CARS)
+        ])
+        base = timezone.now().replace(microsecond=0)
+        statuses = ["pending", "confirmed", "completed", "cancelled"]
+        Booking.objects.bulk_create([
+            Booking(
+                customer=users[(c * 7 + j) % N_USERS],
+                car=car,
+                start=base + timedelta(days=3 * j, hours=c % 24),
+                end=base + timedelta(days=3 * j + 2, hours=c % 24),
+                status=statuses[j % len(statuses)],
+            )
+            for c, car in enumerate(cars)
+            for j in range(BOOKINGS_PER_CAR)
+        ], batch_size=5000)
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE")
+        yield {"user": users[3], "car": cars[5], "window": (base + timedelta(days=10), base + timedelta(days=11))}
+        Booking.objects.filter(customer__username__startswith="plan-u").delete()
+        Car.objects.filter(plate_no__startswith="PLAN-").delete()
+        User.objects.filter(username__startswith="plan-u").delete()
+
+
+def hot_queries(ctx):
+    start, end = ctx["window"]
+    return {
+        "overlap_check": Booking.objects.filter(
+            car_id=ctx["car"].id, start__lt=end, end__gt=start, status__in=ACTIVE_BOOKING_STATUSES
+        ),
+        "availability": available_cars(start=start, end=end, make="make07").order_by("id")[:51],
+        # the per-car NOT EXISTS sub-query inside available_cars
+        "availability_probe": Booking.objects.filter(
+            car=ctx["car"], status__in=ACTIVE_BOOKING_STATUSES, start__lt=end, end__gt=start
+        ),
+        "customer_list": Booking.objects.filter(customer_id=ctx["user"].id).order_by("-start", "id")[:51],
+        "staff_list": Booking.objects.order_by("-start", "id")[:51],
+        "vehicle_make_search": Car.objects.filter(make__icontains="ke07").order_by("id")[:51],
+        # username OR email: each branch probes its own Lower() index
+        "login_lookup": login_user_queryset("PLAN-U3@example.com"),
+    }
+
+
+def full_scans(plan: str):
+    """Lines that read a whole table without an index."""
+    markers = {"postgresql": ("Seq Scan on rental_booking", "Seq Scan on rental_car"),
+               "sqlite": ("SCAN rental_booking\n", "SCAN rental_car\n", "SCAN U0\n")}[connection.vendor]
+    return [m.strip() for m in markers if m in plan + "\n"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", sorted(EXPECTED_INDEX))
+def test_hot_query_uses_its_index(seeded, name):
+    if connection.vendor not in ("postgresql", "sqlite"):
+        pytest.skip(f"no plan expectations for {connection.vendor}")
+    expected = EXPECTED_INDEX[name].get(connection.vendor)
+    if expected is None:
+        pytest.skip(f"{name} has no index on {connection.vendor}")
+
+    plan = hot_queries(seeded)[name].explain()
+    assert expected in plan, f"{name}: expected {expected} in plan:\n{plan}"
+    assert not full_scans(plan), f"{name}: full scan in plan:\n{plan}"
@@ -0,0 +1,72 @@
+# tests/test_resilient_cache.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from lcr.cache import ResilientRedisCache, cache_health
+
+DOWN = "redis://127.0.0.1:1/{}"  # nothing listens on port 1
+
+
+def make(db, **params):
+    return ResilientRedisCache(DOWN.format(db), {"OPTIONS": {"socket_connect_timeout": 0.1}, **params})
+
+
+def test_outage_falls_back_to_local_cache_and_is_reported():
+    c = make(1, PROBE_INTERVAL_S=60)
+    assert c.get("missing") is None
+    c.set("k", {"v": 1})
+    assert c.get("k") == {"v": 1}
+    c.add("n", 1)
+    assert c.incr("n") == 2
+    health = cache_health()[DOWN.format(1)]
+    assert health["state"] == "degraded" and health["trips"] == 1
+    assert health["fallback_ops"] == 5 and "ConnectionError" in health["last_error"]
+
+
+def test_degraded_calls_skip_redis(monkeypatch):
+    c = make(2, PROBE_INTERVAL_S=60)
+    c.get("x")  # trips
+    calls = []
+    monkeypatch.setattr(type(c._cache), "get_client", lambda *a, **kw: calls.append(1))
+    for _ in range(10):
+        c.set("x", 1)
+    assert calls == []
+
+
+def test_probe_restores_redis(monkeypatch):
+    c = make(3, PROBE_INTERVAL_S=0.01)
+    c.get("x")
+    assert c.health.degraded
+    monkeypatch.setattr(ResilientRedisCache, "ping", lambda self: None)  # Redis is back
+    deadline = time.monotonic() + 2
+    while c.health.degraded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache_health()[DOWN.format(3)]["state"] == "ok"
+
+
+def test_one_pool_per_process_across_threads():
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(make(4)._cache)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in clients}) == 1
+
+
+def test_settings_import_does_no_network_io():
+    code = (
+        "import socket\n"
+        "def refuse(*a, **kw): raise AssertionError('network I/O during startup')\n"
+        "socket.socket.connect = refuse\n"
+        "import django; django.setup()\n"
+        "from django.conf import settings; print(settings.CACHES['default']['BACKEND'])\n"
+    )
+    env = {**os.environ, "CACHE_URL": "redis://10.255.255.1:6379/1",
+           "DJANGO_SETTINGS_MODULE": "lcr.settings.base"}
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == "lcr.cache.ResilientRedisCache"
@@ -0,0 +1,132 @@
+# tests/test_revenue_rollups.py
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.auth import tokens_for_user
+from rental.models import DepositOutbox, Payment, PaymentDailyRollup
+from rental.payments.gateways import DepositResult, MockStripeGateway, PaymentGateway
+from rental.services.deposits import DepositWorker
+
+pytestmark = pytest.mark.django_db
+
+
+class DecliningGateway(PaymentGateway):
+    def create_deposit(self, *, booking, amount_cents, meta=None):
+        return DepositResult(ok=False, provider="test", transaction_id=None, error="card_declined")
+
+
+@pytest.fixture
+def bookings(customer, car_factory, booking_factory):
+    toyota = car_factory(plate_no="RV-1", make="Toyota")
+    honda = car_factory(plate_no="RV-2", make="Honda")
+    start = timezone.now() + timedelta(days=3)
+    return [booking_factory(customer, car, start + timedelta(days=3 * i), start + timedelta(days=3 * i + 1))
+            for i, car in enumerate([toyota, toyota, honda])]
+
+
+def _rollups():
+    return {(r.day, r.make): r for r in PaymentDailyRollup.objects.all()}
+
+
+def _table():
+    return sorted(PaymentDailyRollup.objects.values_list(
+        "day", "make", "succeeded_cents", "succeeded_count", "failed_cents", "failed_count",
+        "refunded_cents", "refunded_count"))
+
+
+def test_saves_and_deletes_move_amounts_between_columns(bookings):
+    today = timezone.localdate()
+    payment = Payment.objects.create(booking=bookings[0], amount_cents=5000, status="succeeded")
+    Payment.objects.create(booking=bookings[1], amount_cents=7000, status="succeeded")
+    assert _rollups()[(today, "Toyota")].succeeded_cents == 12000
+
+    payment.status = "refunded"
+    payment.save()
+    row = _rollups()[(today, "Toyota")]
+    assert (row.succeeded_cents, row.succeeded_count, row.refunded_cents, row.refunded_count) == (7000, 1, 5000, 1)
+
+    payment.delete()
+    row = _rollups()[(today, "Toyota")]
+    assert (row.succeeded_cents, row.refunded_cents, row.refunded_count) == (7000, 0, 0)
+
+
+def test_payment_write_and_rollup_are_atomic(bookings, monkeypatch):
+    def rollup_fails(changes):
+        raise RuntimeError("rollup write failed")
+
+    monkeypatch.setattr("rental.signals.record_payment_writes", rollup_fails)
+    with pytest.raises(RuntimeError):
+        Payment.objects.create(booking=bookings[0], amount_cents=5000, status="succeeded")
+    assert not Payment.objects.exists()
+
+    monkeypatch.undo()
+    payment = Payment.objects.create(booking=bookings[0], amount_cents=5000, status="succeeded")
+    monkeypatch.setattr("rental.signals.record_payment_writes", rollup_fails)
+    with pytest.raises(RuntimeError):
+        payment.delete()
+    assert Payment.objects.filter(pk=payment.pk).exists()
+
+
+def test_deposit_worker_rolls_up_its_upserts(bookings):
+    for booking in bookings:
+        DepositOutbox.objects.create(booking=booking, amount_cents=10000)
+    DepositWorker(MockStripeGateway()).run_once()
+    today = timezone.localdate()
+    assert _rollups()[(today, "Toyota")].succeeded_cents == 20000
+    assert _rollups()[(today, "Honda")].succeeded_count == 1
+
+    # A retried delivery that now fails replaces the earlier success, on the same day
+    DepositOutbox.objects.filter(booking=bookings[2]).update(status="pending", available_at=timezone.now())
+    DepositWorker(DecliningGateway()).run_once()
+    honda = _rollups()[(today, "Honda")]
+    assert (honda.succeeded_cents, honda.succeeded_count, honda.failed_cents, honda.failed_count) == (0, 0, 10000, 1)
+
+
+def test_backfill_matches_incremental_rollups(bookings):
+    earlier = timezone.now() - timedelta(days=40)
+    Payment.objects.create(booking=bookings[0], amount_cents=5000, status="succeeded", created_at=earlier)
+    Payment.objects.create(booking=bookings[1], amount_cents=3000, status="refunded")
+    legacy = Payment.objects.create(booking=bookings[2], amount_cents=2000, status="failed")
+    Payment.objects.filter(pk=legacy.pk).update(created_at=None)  # predates the column: dated by booking start
+    incremental = _table()
+
+    PaymentDailyRollup.objects.all().delete()
+    call_command("backfill_revenue_rollups", "--chunk-days", "7", stdout=StringIO())
+    rebuilt = _table()
+    assert rebuilt[0][:3] == (timezone.localdate(earlier), "Toyota", 5000)
+    assert (timezone.localdate(bookings[2].start), "Honda", 0, 0, 2000, 1, 0, 0) in rebuilt
+    # Incremental rollups dated the legacy row by its created_at before it was cleared
+    assert [r for r in rebuilt if r[1] != "Honda"] == [r for r in incremental if r[1] != "Honda"]
+
+
+def test_summary_reads_rollups_only(api_client, make_user, bookings, hs256_tokens):
+    Payment.objects.create(booking=bookings[0], amount_cents=5000, status="succeeded")
+    Payment.objects.create(booking=bookings[1], amount_cents=3000, status="refunded")
+    Payment.objects.create(booking=bookings[2], amount_cents=2000, status="succeeded")
+    url = reverse("finance-summary")
+
+    customer = make_user("rv-customer", role="customer")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(customer)['access']}")
+    assert api_client.get(url).status_code == 403
+
+    finance = make_user("rv-finance", role="finance")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(finance)['access']}")
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(url)
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    totals = data["totals"]
+    assert (totals["gross_cents"], totals["refunded_cents"], totals["net_cents"]) == (10000, 3000, 7000)
+    assert [m["make"] for m in data["by_make"]] == ["Honda", "Toyota"]
+    assert len(data["by_day"]) == 1
+    assert not any("rental_payment\"" in q["sql"] or "rental_booking" in q["sql"] for q in ctx.captured_queries)
+
+    assert api_client.get(url, {"make": "honda"}).json()["data"]["totals"]["net_cents"] == 2000
+    assert api_client.get(url, {"start": "2020-01-01", "end": "2026-01-01"}).status_code == 400
@@ -0,0 +1,54 @@
+# tests/test_scope_permissions.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.auth import ROLE_TO_SCOPES
+
+pytestmark = pytest.mark.django_db
+
+def scoped(client, user, scopes):
+    # what JWTAuthentication hands the views for a verified access token
+    client.force_authenticate(user, token={"role": user.role, "scp": " ".join(sorted(scopes))})
+    return client
+
+def perm_queries(ctx):
+    return [q["sql"] for q in ctx.captured_queries if "auth_permission" in q["sql"]]
+
+def test_vehicle_list_from_scopes_skips_permission_queries(api_client, staff_writer, car_factory):
+    car_factory()
+    url = reverse("vehicle-list")
+
+    api_client.force_authenticate(staff_writer)  # no token -> DB permissions
+    with CaptureQueriesContext(connection) as fallback:
+        assert api_client.get(url).status_code == 200
+    staff_writer.refresh_from_db()  # drop ModelBackend's per-instance perm cache
+
+    with CaptureQueriesContext(connection) as fast:
+        body = scoped(api_client, staff_writer, ROLE_TO_SCOPES["fleet_manager"]).get(url).json()
+    assert len(body["data"]["items"]) == 1  # still sees every car as a writer
+    assert perm_queries(fallback) and not perm_queries(fast)
+    assert len(fast) < len(fallback)
+
+def test_booking_create_authorized_by_scope_alone(api_client, make_user, car_factory):
+    u = make_user("scoped-cust")  # no Django permissions at all
+    start = timezone.now() + timezone.timedelta(days=1)
+    payload = {"car": car_factory().id, "start": start.isoformat(),
+               "end": (start + timezone.timedelta(days=1)).isoformat()}
+    with CaptureQueriesContext(connection) as ctx:
+        r = scoped(api_client, u, ROLE_TO_SCOPES["customer"]).post(reverse("booking-list"), payload, format="json")
+    assert r.status_code == 201, r.content
+    assert not perm_queries(ctx)
+
+def test_token_scopes_are_authoritative(api_client, staff_writer):
+    # scp present but lacking car:write: DB permissions are not consulted
+    client = scoped(api_client, staff_writer, ROLE_TO_SCOPES["customer"])
+    r = client.post(reverse("vehicle-list"), {"make": "Honda", "model": "City", "year": 2022, "plate_no": "SCP-1"})
+    assert r.status_code == 403
+
+def test_wildcard_scope_grants_writes(api_client, make_user):
+    client = scoped(api_client, make_user("root-ish", role="admin"), {"*"})
+    r = client.post(reverse("vehicle-list"), {"make": "Honda", "model": "City", "year": 2022, "plate_no": "SCP-2"})
+    assert r.status_code == 201
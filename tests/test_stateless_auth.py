@@ -0,0 +1,68 @@
+# tests/test_stateless_auth.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.auth import tokens_for_user
+from accounts.authentication import ClaimsUser
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture(autouse=True)
+def isolated_cache(hs256_tokens, settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                   "LOCATION": "stateless-auth-tests"}}
+
+def bearer(client, user):
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+    return client
+
+def test_request_user_built_from_claims_without_user_query(api_client, make_user):
+    u = make_user("claims", role="customer")
+    client = bearer(api_client, u)
+    assert client.get(reverse("booking-list")).status_code == 200  # warms the version cache
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = client.get(reverse("booking-list"))
+    assert r.status_code == 200
+    assert not [q for q in ctx.captured_queries if "accounts_user" in q["sql"]]
+
+def test_claims_user_exposes_role_and_scopes(make_user):
+    u = make_user("cu", role="fleet_manager")
+    cu = ClaimsUser({"user_id": u.pk, "role": "fleet_manager", "scp": "car:read car:write"})
+    assert cu.pk == u.pk and cu.is_authenticated
+    assert cu.role == "fleet_manager" and "car:write" in cu.scopes
+    assert cu.email == u.email  # non-claim attributes load the row lazily
+
+def test_bumping_token_version_revokes_issued_tokens(api_client, make_user):
+    u = make_user("revoke", role="customer")
+    client = bearer(api_client, u)
+    assert client.get(reverse("booking-list")).status_code == 200
+
+    u.bump_token_version()
+    assert client.get(reverse("booking-list")).status_code == 401
+    assert bearer(api_client, u).get(reverse("booking-list")).status_code == 200  # fresh token works
+
+def test_role_change_revokes_issued_tokens(api_client, make_user):
+    u = make_user("demoted", role="fleet_manager")
+    client = bearer(api_client, u)
+    assert client.get(reverse("booking-list")).status_code == 200
+
+    u.role = "customer"
+    u.save()
+    assert client.get(reverse("booking-list")).status_code == 401
+    assert bearer(api_client, u).get(reverse("booking-list")).status_code == 200
+
+    version = u.token_version
+    u.phone = "0300-1234567"
+    u.save()  # other fields leave issued tokens alone
+    assert u.token_version == version
+
+def test_deactivated_user_is_rejected_despite_cache(api_client, make_user):
+    u = make_user("inactive", role="customer")
+    client = bearer(api_client, u)
+    assert client.get(reverse("booking-list")).status_code == 200
+    u.is_active = False
+    u.save()
+    assert client.get(reverse("booking-list")).status_code == 401
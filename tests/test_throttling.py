@@ -0,0 +1,98 @@
+# tests/test_throttling.py
+import multiprocessing
+import os
+
+import pytest
+from django.urls import reverse
+
+from lcr import throttling
+from lcr.throttling import FileWindowBackend, RedisWindowBackend, _wait_s, throttle_hit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [999_960.0]  # start of a 60s window
+    monkeypatch.setattr(throttling.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def backend(tmp_path):
+    b = FileWindowBackend(str(tmp_path / "t.bin"), slots=64)
+    yield b
+    b.close()
+
+
+def test_limit_within_a_window(backend, clock):
+    assert all(backend.hit("k", 5, 60)[0] for _ in range(5))
+    allowed, wait = backend.hit("k", 5, 60)
+    assert not allowed and wait == pytest.approx(60 + 12)  # roll over, then decay to 4
+    assert backend.hit("other", 5, 60)[0]  # keys are independent
+
+
+def test_previous_window_decays(backend, clock):
+    for _ in range(10):
+        backend.hit("k", 10, 60)
+    clock[0] += 60  # next window starts: previous=10 still weighs fully
+    assert not backend.hit("k", 10, 60)[0]
+    clock[0] += 30  # halfway: estimate 5 -> five more fit
+    assert [backend.hit("k", 10, 60)[0] for _ in range(6)] == [True] * 5 + [False]
+    clock[0] += 90  # both windows old
+    assert backend.hit("k", 10, 60)[0]
+
+
+def test_wait_is_time_until_next_hit_fits():
+    # previous=10 decaying over a 60s window, current empty, limit 10: one slot frees after 6s
+    assert _wait_s(0, 10, 10, 60, 0) == pytest.approx(6.0)
+    # current window alone is full: roll over, then decay 10%
+    assert _wait_s(10, 0, 10, 60, 15) == pytest.approx(45 + 6)
+
+
+def test_table_size_is_fixed(backend, clock):
+    for i in range(1000):
+        backend.hit(f"key-{i}", 5, 60)
+    assert os.path.getsize(backend.path) == 64 * FileWindowBackend.SLOT.size
+
+
+def _hammer(path, n, out):
+    b = FileWindowBackend(path, slots=64)
+    out.put(sum(b.hit("shared", 100, 3600)[0] for _ in range(n)))
+    b.close()
+
+
+def test_limit_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "shared.bin")
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_hammer, args=(path, 60, out)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    allowed = sum(out.get(timeout=30) for _ in procs)
+    for p in procs:
+        p.join()
+    assert allowed == 100  # not 4 x 100
+
+
+def test_redis_outage_falls_back_to_local(settings, clock):
+    settings.THROTTLE_BACKEND = "redis"
+    settings.THROTTLE_REDIS_URL = "redis://127.0.0.1:1/0"  # nothing listens on port 1
+    throttling.reset_throttle_backend()
+    assert [throttle_hit("k", 2, 60)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_redis_backend(clock):
+    url = os.environ.get("THROTTLE_TEST_REDIS_URL")
+    if not url:
+        pytest.skip("set THROTTLE_TEST_REDIS_URL to run against a real Redis")
+    b = RedisWindowBackend(url, prefix=f"throttle-test-{os.getpid()}")
+    assert [b.hit("k", 3, 60)[0] for _ in range(4)] == [True, True, True, False]
+
+
+@pytest.mark.django_db
+def test_login_scope_is_throttled(api_client, monkeypatch):
+    from lcr.throttling import SlidingScopedRateThrottle
+    monkeypatch.setattr(SlidingScopedRateThrottle, "THROTTLE_RATES",
+                        {**SlidingScopedRateThrottle.THROTTLE_RATES, "auth": "2/min"})
+    codes = [api_client.post(reverse("login"), {"username": "x", "password": "y"}, format="json").status_code
+             for _ in range(3)]
+    assert codes == [400, 400, 429]
@@ -0,0 +1,116 @@
+# tests/test_utilization.py
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.auth import tokens_for_user
+from rental.models import Booking
+from rental.services.utilization import OccupancyMatrix, reset_utilization_cache
+
+pytestmark = pytest.mark.django_db
+
+DAY = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)  # a Monday
+
+
+@pytest.fixture(autouse=True)
+def fresh_matrices():
+    cache.clear()
+    reset_utilization_cache()
+    yield
+    reset_utilization_cache()
+
+
+@pytest.fixture
+def fleet(car_factory, booking_factory, make_user):
+    owner = make_user("util-owner")
+    cars = {
+        "busy": car_factory(plate_no="UT-1", make="Toyota"),
+        "half": car_factory(plate_no="UT-2", make="Toyota"),
+        "idle": car_factory(plate_no="UT-3", make="Honda"),
+    }
+    # Day 1 10:30-12:15 and day 2 all day; a cancellation doesn't count
+    booking_factory(owner, cars["busy"], DAY + timedelta(hours=10, minutes=30), DAY + timedelta(hours=12, minutes=15),
+                    status="completed")
+    booking_factory(owner, cars["busy"], DAY + timedelta(days=1), DAY + timedelta(days=2), status="confirmed")
+    booking_factory(owner, cars["half"], DAY + timedelta(hours=11), DAY + timedelta(hours=23), status="pending")
+    booking_factory(owner, cars["idle"], DAY + timedelta(hours=11), DAY + timedelta(hours=12), status="cancelled")
+    return owner, cars
+
+
+def _client(api_client, make_user, role):
+    user = make_user(f"util-{role}", role=role)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user)['access']}")
+    return api_client
+
+
+def test_matrix_counts_partial_hours(fleet):
+    matrix = OccupancyMatrix(DAY, DAY + timedelta(days=7))
+    busy = matrix.occupancy[matrix.row_of[fleet[1]["busy"].pk]]
+    assert busy[10] == pytest.approx(0.5) and busy[11] == 1 and busy[12] == pytest.approx(0.25)
+    assert busy.sum() == pytest.approx(1.75 + 24)
+
+    report = matrix.report(granularity="week")
+    by_car = {c["plate_no"]: c for c in report["by_car"]}
+    assert by_car["UT-1"]["utilization"] == pytest.approx(25.75 / 168, abs=1e-4)
+    assert by_car["UT-2"]["periods"] == [pytest.approx(12 / 168, abs=1e-4)]
+    assert [c["plate_no"] for c in report["idle_cars"]] == ["UT-3"]
+    assert {m["make"]: m["cars"] for m in report["by_make"]} == {"Honda": 1, "Toyota": 2}
+    assert report["peak_hours"]["top"][0]["hour"] == 11  # both Toyotas are out 11:00-12:00
+    assert report["peak_hours"]["peak"]["cars_booked"] == pytest.approx(2.0)
+
+
+def test_api_is_for_fleet_managers(api_client, make_user, fleet, hs256_tokens):
+    url = reverse("analytics-utilization")
+    params = {"start": "2026-03-02", "end": "2026-03-04", "make": "toyota"}
+    assert _client(api_client, make_user, "customer").get(url, params).status_code == 403
+
+    resp = _client(api_client, make_user, "fleet_manager").get(url, params)
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert data["fleet"]["cars"] == 2 and [p["start"] for p in data["fleet"]["periods"]] == ["2026-03-02", "2026-03-03"]
+    assert data["fleet"]["periods"][1]["booked_hours"] == 24
+
+    too_long = {"start": "2020-01-01", "end": "2026-01-01"}
+    assert api_client.get(url, too_long).status_code == 400
+
+
+def test_booking_writes_repaint_only_their_car(api_client, make_user, fleet, hs256_tokens,
+                                               django_capture_on_commit_callbacks):
+    owner, cars = fleet
+    client = _client(api_client, make_user, "admin")
+    url = reverse("analytics-utilization")
+    params = {"start": date(2026, 3, 2), "end": date(2026, 3, 3)}
+    assert client.get(url, params).json()["data"]["idle_cars"][0]["plate_no"] == "UT-3"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        booking = Booking.objects.create(customer=owner, car=cars["idle"], start=DAY, end=DAY + timedelta(hours=6),
+                                         status="confirmed")
+    with CaptureQueriesContext(connection) as ctx:
+        data = client.get(url, params).json()["data"]
+    assert data["idle_cars"] == []
+    tables = [q["sql"] for q in ctx.captured_queries if "rental_" in q["sql"]]
+    assert len(tables) == 1 and 'FROM "rental_booking"' in tables[0]  # that car's bookings; no rebuild
+
+    with django_capture_on_commit_callbacks(execute=True):
+        booking.status = "cancelled"
+        booking.save()
+    assert client.get(url, params).json()["data"]["idle_cars"][0]["plate_no"] == "UT-3"
+
+
+def test_old_matrix_is_rebuilt_without_journal_entries(fleet, settings, monkeypatch):
+    owner, cars = fleet
+    matrix = OccupancyMatrix(DAY, DAY + timedelta(days=1))
+    idle = matrix.row_of[cars["idle"].pk]
+    # Another worker's write, journaled where this process can't see it
+    Booking.objects.filter(car=cars["idle"]).update(status="confirmed")
+    assert matrix.refresh() == 0 and matrix.occupancy[idle].sum() == 0
+
+    settings.ANALYTICS_MATRIX_MAX_AGE_S = 60
+    built_at = matrix.built_at
+    monkeypatch.setattr("rental.services.utilization.time.monotonic", lambda: built_at + 61)
+    assert matrix.refresh() == 3
+    assert matrix.occupancy[idle].sum() == pytest.approx(1)
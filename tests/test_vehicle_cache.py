@@ -0,0 +1,96 @@
+# tests/test_vehicle_cache.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rental.services.catalogue_cache import CATALOGUE_CACHE_STATS
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def writer(api_client, staff_writer):
+    api_client.force_authenticate(staff_writer)
+    CATALOGUE_CACHE_STATS.reset()
+    return api_client
+
+
+def rental_queries(ctx):
+    return [q["sql"] for q in ctx.captured_queries if "rental_" in q["sql"]]
+
+
+def test_second_list_is_served_from_cache(writer, car_factory):
+    car_factory(plate_no="CCH-1")
+    url = reverse("vehicle-list")
+    first = writer.get(url)
+    assert first["X-Cache"] == "MISS"
+    with CaptureQueriesContext(connection) as ctx:
+        second = writer.get(url)
+    assert second["X-Cache"] == "HIT" and not rental_queries(ctx)
+    assert second.json()["data"] == first.json()["data"]
+    assert second["ETag"] == first["ETag"]
+
+
+def test_if_none_match_returns_304_without_queries(writer, car_factory):
+    car_factory(plate_no="CCH-2")
+    url = reverse("vehicle-list")
+    etag = writer.get(url)["ETag"]
+    with CaptureQueriesContext(connection) as ctx:
+        r = writer.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r["ETag"] == etag
+    assert not rental_queries(ctx)
+    assert CATALOGUE_CACHE_STATS.snapshot()["not_modified"] == 1
+
+
+def test_car_write_changes_etag_and_content(writer, car_factory):
+    car_factory(plate_no="CCH-3")
+    url = reverse("vehicle-list")
+    before = writer.get(url)
+    car_factory(plate_no="CCH-4")
+    after = writer.get(url, headers={"If-None-Match": before["ETag"]})
+    assert after.status_code == 200 and after["X-Cache"] == "MISS"
+    assert after["ETag"] != before["ETag"]
+    assert len(after.json()["data"]["items"]) == 2
+
+
+def test_booking_write_refreshes_customer_scope(api_client, customer, car_factory, booking_factory):
+    api_client.force_authenticate(customer)
+    url = reverse("vehicle-list")
+    assert api_client.get(url).json()["data"]["items"] == []
+    booking_factory(customer=customer, car=car_factory(plate_no="CCH-5"))
+    assert [c["plate_no"] for c in api_client.get(url).json()["data"]["items"]] == ["CCH-5"]
+
+
+def test_scopes_and_filters_are_cached_separately(writer, customer, car_factory, booking_factory):
+    car_factory(plate_no="CCH-6", make="Honda")
+    booking_factory(customer=customer, car=car_factory(plate_no="CCH-7", make="Toyota"))
+    url = reverse("vehicle-list")
+    assert len(writer.get(url).json()["data"]["items"]) == 2
+    assert [c["plate_no"] for c in writer.get(url, {"make": "hon"}).json()["data"]["items"]] == ["CCH-6"]
+    writer.force_authenticate(customer)
+    assert [c["plate_no"] for c in writer.get(url).json()["data"]["items"]] == ["CCH-7"]
+
+
+def test_cache_stats_for_writers_only(writer, api_client, customer, car_factory):
+    car_factory(plate_no="CCH-8")
+    url = reverse("vehicle-list")
+    writer.get(url)
+    writer.get(url)
+    stats = writer.get(reverse("vehicle-cache-stats")).json()["data"]
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_ratio"] == 0.5
+    writer.force_authenticate(customer)
+    assert writer.get(reverse("vehicle-cache-stats")).status_code == 403
+
+
+def test_active_list_is_never_cached(api_client, customer, car_factory, booking_factory):
+    from django.utils import timezone
+    api_client.force_authenticate(customer)
+    now = timezone.now()
+    booking_factory(customer=customer, car=car_factory(plate_no="CCH-ACT"),
+                    start=now - timezone.timedelta(hours=1), end=now + timezone.timedelta(hours=1))
+    url = reverse("vehicle-list")
+    first = api_client.get(url, {"active": "true"})
+    assert first["X-Cache"] == "BYPASS" and "ETag" not in first
+    assert [c["plate_no"] for c in first.json()["data"]["items"]] == ["CCH-ACT"]
+    assert api_client.get(url, {"active": "true"})["X-Cache"] == "BYPASS"